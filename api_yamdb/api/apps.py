@@ -15,3 +15,7 @@ class ApiConfig(AppConfig):
     """
 
     name = 'api'
+
+    def ready(self):
+        """Подключает обработчики сигналов для сброса кэша ответов."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,123 @@
+"""
+Аутентификация по JWT без загрузки пользователя на каждый запрос.
+
+GetTokenView выдает токены RoleAccessToken, в утверждениях которых
+хранятся роль, is_staff, is_active и версия утверждений token_version
+пользователя. Версия увеличивается в базе данных при изменении роли,
+is_staff или is_active. При включенной настройке
+JWT_STATELESS_AUTHENTICATION пользователь запроса строится из
+утверждений, если их версия совпадает с текущей, которая берется из кэша
+с коротким временем жизни AUTH_USER_CACHE_TIMEOUT, а при ее отсутствии в
+кэше - из базы данных. Токены без утверждений и токены с устаревшей
+версией проверяются по пользователю из того же кэша или из базы данных.
+Без настройки пользователь загружается из базы данных, как в
+JWTAuthentication.
+"""
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import User
+from .cache import auth_user_cache, token_version_cache
+
+ROLE_CLAIMS = (
+    'username', 'role', 'is_staff', 'is_active', 'token_version'
+)
+
+
+class RoleAccessToken(AccessToken):
+    """Токен доступа с ролью пользователя в утверждениях."""
+
+    @classmethod
+    def for_user(cls, user):
+        """Возвращает токен с утверждениями ROLE_CLAIMS пользователя."""
+        token = super().for_user(user)
+        for claim in ROLE_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+class RoleTokenUser(TokenUser):
+    """
+    Пользователь, построенный по утверждениям токена.
+
+    Признаки ролей вычисляются так же, как у модели User, поэтому
+    классы разрешений работают с ним без изменений.
+    """
+
+    is_admin = User.is_admin
+    is_moderator = User.is_moderator
+    is_user = User.is_user
+
+    @cached_property
+    def role(self):
+        """Роль пользователя из утверждения токена."""
+        return self.token['role']
+
+    @cached_property
+    def is_active(self):
+        """Признак активности пользователя из утверждения токена."""
+        return self.token['is_active']
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """Аутентификация по JWT с пользователем из утверждений токена."""
+
+    @staticmethod
+    def get_token_version(user_id):
+        """
+        Возвращает текущую версию утверждений токенов пользователя.
+
+        Для удаленного пользователя возвращает None.
+        """
+        version, generation = token_version_cache.get(user_id)
+        if version is None:
+            version = User.objects.filter(pk=user_id).values_list(
+                'token_version', flat=True
+            ).first()
+            if version is not None:
+                token_version_cache.set(user_id, version, generation)
+        return version
+
+    def has_fresh_claims(self, token):
+        """Проверяет, что утверждения токена отражают текущую роль."""
+        if any(claim not in token for claim in ROLE_CLAIMS):
+            return False
+        return token['token_version'] == self.get_token_version(
+            token[api_settings.USER_ID_CLAIM]
+        )
+
+    def get_user(self, validated_token):
+        """Возвращает пользователя из утверждений токена или из кэша."""
+        if not settings.JWT_STATELESS_AUTHENTICATION:
+            return super().get_user(validated_token)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None and self.has_fresh_claims(validated_token):
+            user = RoleTokenUser(validated_token)
+            if not user.is_active:
+                raise AuthenticationFailed(
+                    'Пользователь неактивен.', code='user_inactive'
+                )
+            return user
+        user, generation = auth_user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            auth_user_cache.set(user_id, user, generation)
+        return user
+
+
+def get_user_instance(user):
+    """
+    Возвращает экземпляр модели User для пользователя запроса.
+
+    Пользователь, построенный по утверждениям токена, загружается из
+    базы данных.
+    """
+    if isinstance(user, User):
+        return user
+    return get_object_or_404(User, pk=user.pk)
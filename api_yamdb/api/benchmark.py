@@ -0,0 +1,304 @@
+"""
+Модуль для измерения производительности конечных точек API.
+
+Прогоняет GET-запросы ко всем маршрутам router_v1, PATCH-запросы к
+отзыву и комментарию и POST-запросы к эндпоинтам аутентификации на
+подготовленном наборе данных и собирает по каждому эндпоинту число
+SQL-запросов, задержку (p50/p95) и пиковый объем выделенной памяти.
+Эндпоинты, для которых в наборе данных нет объектов, пропускаются и
+перечисляются в отчете отдельно.
+Результат - словарь, пригодный для сохранения в JSON и сравнения между
+коммитами.
+
+Отдельно сравнивается поиск SearchFilter (icontains) с поиском по
+триграммному индексу на тех же словах запроса.
+"""
+import json
+import re
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.authentication import RoleAccessToken
+from api.filters import NGramSearchFilter
+from api.urls import router_v1
+from api_yamdb.constants import ADMIN
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.search import NGRAM_INDEXES
+
+API_PREFIX = '/api/v1/'
+BENCHMARK_ADMIN = 'benchmark-admin'
+BENCHMARK_CONFIRMATION_CODE = '00000000'
+# Изменение отзывов и комментариев администратором проверяет права на
+# объект, не являясь его автором.
+UPDATE_ENDPOINTS = ('reviews', 'comments')
+URL_KWARG_PATTERN = re.compile(r'\(\?P<(\w+)>[^)]+\)')
+
+
+def get_admin_client():
+    """Возвращает клиент, аутентифицированный как администратор."""
+    admin, _ = User.objects.get_or_create(
+        username=BENCHMARK_ADMIN,
+        defaults={
+            'email': f'{BENCHMARK_ADMIN}@yamdb.fake',
+            'role': ADMIN,
+            'confirmation_code': BENCHMARK_CONFIRMATION_CODE,
+        }
+    )
+    return Client(
+        HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(admin)}'
+    )
+
+
+def get_url_kwargs():
+    """
+    Выбирает идентификаторы объектов для подстановки в маршруты.
+
+    Для отсутствующих в базе данных объектов возвращает None.
+    """
+    review = (
+        Review.objects.filter(comments__isnull=False).first()
+        or Review.objects.first()
+    )
+    comment = review.comments.first() if review else None
+    title_id = (
+        review.title_id if review
+        else Title.objects.values_list('pk', flat=True).first()
+    )
+    return {
+        'categories': Category.objects.values_list('slug', flat=True).first(),
+        'genres': Genre.objects.values_list('slug', flat=True).first(),
+        'titles': title_id,
+        'reviews': review.pk if review else None,
+        'comments': comment.pk if comment else None,
+        'users': User.objects.values_list('username', flat=True).first(),
+        'title_id': title_id,
+        'review_id': review.pk if review else None,
+    }
+
+
+def get_route_endpoints(prefix, viewset, basename, kwargs):
+    """
+    Возвращает эндпоинты маршрута router_v1 и имена пропущенных.
+
+    Список пропускается, если в базе данных нет родителя из URL, а
+    операции с объектом - если нет объекта.
+    """
+    has_parent = all(
+        kwargs[name] is not None
+        for name in URL_KWARG_PATTERN.findall(prefix)
+    )
+    names = [f'{basename}-list']
+    if hasattr(viewset, 'retrieve'):
+        names.append(f'{basename}-detail')
+        if basename in UPDATE_ENDPOINTS:
+            names.append(f'{basename}-update')
+    if not has_parent:
+        return [], names
+    path = URL_KWARG_PATTERN.sub(
+        lambda match: str(kwargs[match.group(1)]), prefix
+    )
+    list_url = f'{API_PREFIX}{path}/'
+    endpoints = [
+        (names[0], 'get', lambda i, url=list_url: {'path': url})
+    ]
+    if len(names) == 1:
+        return endpoints, []
+    if kwargs[basename] is None:
+        return endpoints, names[1:]
+    detail_url = f'{list_url}{kwargs[basename]}/'
+    endpoints.append(
+        (names[1], 'get', lambda i, url=detail_url: {'path': url})
+    )
+    if len(names) > 2:
+        endpoints.append((names[2], 'patch', lambda i, url=detail_url: {
+            'path': url,
+            'data': json.dumps({'text': f'Текст {i}'}),
+            'content_type': 'application/json',
+        }))
+    return endpoints, []
+
+
+def get_endpoints():
+    """
+    Возвращает список замеряемых эндпоинтов и имена пропущенных.
+
+    Каждый элемент списка - кортеж из имени, HTTP-метода и фабрики
+    аргументов запроса, получающей номер повтора. Эндпоинты, для которых
+    в базе данных нет объектов (например, отзывы при пустой таблице
+    отзывов), пропускаются.
+    """
+    kwargs = get_url_kwargs()
+    endpoints = []
+    skipped = []
+    for prefix, viewset, basename in router_v1.registry:
+        route_endpoints, route_skipped = get_route_endpoints(
+            prefix, viewset, basename, kwargs
+        )
+        endpoints.extend(route_endpoints)
+        skipped.extend(route_skipped)
+    endpoints.append(('auth-signup', 'post', lambda i: {
+        'path': f'{API_PREFIX}auth/signup/',
+        'data': {
+            'username': f'signup-{i}',
+            'email': f'signup-{i}@yamdb.fake'
+        },
+    }))
+    endpoints.append(('auth-token', 'post', lambda i: {
+        'path': f'{API_PREFIX}auth/token/',
+        'data': {
+            'username': BENCHMARK_ADMIN,
+            'confirmation_code': BENCHMARK_CONFIRMATION_CODE,
+        },
+        # Каждый повтор приходит с нового адреса, чтобы не упереться
+        # в ограничение частоты запросов к эндпоинту.
+        'REMOTE_ADDR': f'10.0.{i // 256 % 256}.{i % 256}',
+    }))
+    return endpoints, skipped
+
+
+def percentile(values, percent):
+    """Возвращает перцентиль выборки методом ближайшего ранга."""
+    ordered = sorted(values)
+    index = max(0, round(percent / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def measure_endpoint(client, method, make_request, repeat):
+    """Замеряет один эндпоинт и возвращает словарь метрик."""
+    send = getattr(client, method)
+    with CaptureQueriesContext(connection) as context:
+        response = send(**make_request(0))
+    queries = len(context.captured_queries)
+    status = response.status_code
+
+    tracemalloc.start()
+    send(**make_request(1))
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = []
+    for i in range(2, repeat + 2):
+        started = time.perf_counter()
+        send(**make_request(i))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {
+        'method': method.upper(),
+        'path': make_request(0)['path'],
+        'status': status,
+        'queries': queries,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'mean_ms': round(statistics.mean(latencies), 3),
+        'peak_memory_kb': round(peak_memory / 1024, 1),
+    }
+
+
+def run_benchmark(repeat=20, only=None):
+    """Замеряет все эндпоинты и возвращает отчет."""
+    if repeat < 1:
+        raise ValueError('Количество замеров должно быть не меньше 1.')
+    client = get_admin_client()
+    endpoints, skipped = get_endpoints()
+    results = {}
+    for name, method, make_request in endpoints:
+        if only and name not in only:
+            continue
+        results[name] = measure_endpoint(client, method, make_request, repeat)
+    return {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'vendor': connection.vendor,
+        'repeat': repeat,
+        'dataset': {
+            'users': User.objects.count(),
+            'titles': Title.objects.count(),
+            'reviews': Review.objects.count(),
+            'comments': Comment.objects.count(),
+        },
+        'endpoints': results,
+        'skipped': [name for name in skipped if not only or name in only],
+    }
+
+
+def compare_reports(previous, current, tolerance=0.2):
+    """
+    Сравнивает два отчета.
+
+    Возвращает список регрессий: рост числа SQL-запросов или рост p95
+    больше чем на долю tolerance.
+    """
+    regressions = []
+    for name, metrics in current['endpoints'].items():
+        before = previous['endpoints'].get(name)
+        if before is None:
+            continue
+        if metrics['queries'] > before['queries']:
+            regressions.append(
+                f'{name}: SQL-запросов {before["queries"]} -> '
+                f'{metrics["queries"]}'
+            )
+        if metrics['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(
+                f'{name}: p95 {before["p95_ms"]} мс -> '
+                f'{metrics["p95_ms"]} мс'
+            )
+    return regressions
+
+
+def measure_search(backend, model, field, term, repeat):
+    """Замеряет поиск одним фильтром и возвращает задержки и результат."""
+    request = Request(APIRequestFactory().get('/', {'search': term}))
+    view = type('SearchView', (), {'search_fields': (field,)})()
+    queryset = backend.filter_queryset(
+        request, model.objects.order_by('pk'), view
+    ).values_list('pk', flat=True)
+    found = list(queryset)
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(queryset.all())
+        latencies.append((time.perf_counter() - started) * 1000)
+    return found, latencies
+
+
+def run_search_benchmark(terms, repeat=20):
+    """
+    Сравнивает SearchFilter с поиском по триграммному индексу.
+
+    Для каждого индексированного поля и слова запроса возвращает число
+    найденных объектов и p50/p95 обоих фильтров. Слова короче трех
+    символов индекс ищет по началу слов, поэтому для них его результат
+    лишь входит в результат icontains.
+    """
+    results = []
+    for model, field in NGRAM_INDEXES:
+        for term in terms:
+            icontains, icontains_ms = measure_search(
+                SearchFilter(), model, field, term, repeat
+            )
+            ngram, ngram_ms = measure_search(
+                NGramSearchFilter(), model, field, term, repeat
+            )
+            results.append({
+                'source': f'{model._meta.label_lower}.{field}',
+                'term': term,
+                'found': len(icontains),
+                'ngram_found': len(ngram),
+                'consistent': (
+                    ngram == icontains if len(term) >= 3
+                    else set(ngram) <= set(icontains)
+                ),
+                'icontains_p50_ms': round(percentile(icontains_ms, 50), 3),
+                'icontains_p95_ms': round(percentile(icontains_ms, 95), 3),
+                'ngram_p50_ms': round(percentile(ngram_ms, 50), 3),
+                'ngram_p95_ms': round(percentile(ngram_ms, 95), 3),
+            })
+    return results
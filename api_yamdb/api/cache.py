@@ -0,0 +1,270 @@
+"""
+Модуль кэширования ответов API.
+
+Сериализованные данные объектов хранятся в кэше Django с псевдонимом
+RESPONSE_CACHE_ALIAS, поэтому хранилище (память процесса, Redis,
+Memcached) выбирается настройкой CACHES. Записи хранятся вместе с
+поколением объекта, которое обработчики сигналов увеличивают после
+фиксации изменения, а время жизни RESPONSE_CACHE_TIMEOUT ограничивает
+устаревание после массовых изменений в обход сигналов.
+
+Распределения оценок произведений кэшируются так же и сбрасываются
+вместе с кэшем произведения при изменении его отзывов.
+
+Ответы на условные запросы к отзывам и комментариям не кэшируются:
+заголовки ETag и Last-Modified вычисляются по времени изменения отзывов
+произведения и комментариев отзыва, которое хранится в базе данных, а
+здесь хранятся только счетчики ответов 304.
+
+Пользователи для аутентификации по JWT и текущие версии утверждений их
+токенов хранятся с коротким временем жизни AUTH_USER_CACHE_TIMEOUT.
+Версия хранится в базе данных, поэтому при ее отсутствии в кэше
+утверждения токена проверяются по базе данных.
+
+Небольшие почти неизменные списки (категории, жанры) хранятся в памяти
+процесса вместе с ETag и номером версии. Версия хранится в кэше
+RESPONSE_CACHE_ALIAS и увеличивается при каждом изменении. С общим для
+процессов хранилищем (Redis, Memcached) все процессы приложения
+одновременно перестают использовать устаревшие списки, с хранилищем в
+памяти процесса (LocMemCache по умолчанию) изменение, сделанное другим
+процессом, становится видно не позже чем через RESPONSE_CACHE_TIMEOUT.
+"""
+import json
+from hashlib import md5
+from threading import Lock
+from time import monotonic, time_ns
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.http import parse_etags
+
+HITS = 'hits'
+MISSES = 'misses'
+
+
+class CacheCounters:
+    """
+    Счетчики попаданий и промахов именованного кэша.
+
+    Счетчики хранятся в кэше RESPONSE_CACHE_ALIAS и общие для всех
+    процессов приложения, если его хранилище общее (Redis, Memcached).
+    """
+
+    registry = {}
+
+    def __init__(self, name):
+        """Регистрирует кэш под заданным именем."""
+        self.name = name
+        self.registry[name] = self
+
+    @property
+    def backend(self):
+        """Хранилище кэша из настройки CACHES."""
+        return caches[settings.RESPONSE_CACHE_ALIAS]
+
+    def make_stats_key(self, counter):
+        """Возвращает ключ счетчика попаданий или промахов."""
+        return f'response-stats:{self.name}:{counter}'
+
+    def increment(self, key, initial=1, timeout=None):
+        """Увеличивает целое значение в хранилище на единицу."""
+        if not self.backend.add(key, initial, timeout=timeout):
+            try:
+                self.backend.incr(key)
+            except ValueError:
+                # Значение вытеснено из кэша между add и incr.
+                self.backend.add(key, initial, timeout=timeout)
+
+    def count(self, counter):
+        """Увеличивает счетчик попаданий или промахов."""
+        self.increment(self.make_stats_key(counter))
+
+    def get_stats(self):
+        """Возвращает счетчики попаданий и промахов."""
+        keys = {
+            counter: self.make_stats_key(counter)
+            for counter in (HITS, MISSES)
+        }
+        values = self.backend.get_many(keys.values())
+        return {
+            counter: values.get(key, 0) for counter, key in keys.items()
+        }
+
+    def reset_stats(self):
+        """Обнуляет счетчики попаданий и промахов."""
+        self.backend.delete_many([
+            self.make_stats_key(counter) for counter in (HITS, MISSES)
+        ])
+
+
+class ResponseCache(CacheCounters):
+    """
+    Кэш сериализованных данных объектов по первичному ключу.
+
+    Запись хранится вместе с поколением объекта, прочитанным до
+    получения данных из базы данных, и используется, только пока
+    поколение не изменилось. Поколение увеличивается после фиксации
+    транзакции, изменившей объект, поэтому данные, прочитанные
+    параллельным запросом до изменения и сохраненные после него, не
+    возвращаются. Время жизни записей задается настройкой с именем
+    timeout_setting.
+    """
+
+    timeout_setting = 'RESPONSE_CACHE_TIMEOUT'
+
+    @property
+    def timeout(self):
+        """Время жизни записей в секундах."""
+        return getattr(settings, self.timeout_setting)
+
+    def make_key(self, pk):
+        """Возвращает ключ записи объекта."""
+        return f'response:{self.name}:{pk}'
+
+    def make_generation_key(self, pk):
+        """Возвращает ключ поколения объекта."""
+        return f'response-generation:{self.name}:{pk}'
+
+    def get(self, pk):
+        """
+        Возвращает данные объекта из кэша или None и поколение объекта.
+
+        Поколение передается в set вместе с данными, полученными после
+        вызова get. Начальное поколение берется из текущего времени,
+        чтобы после вытеснения из хранилища оно не совпало с прежним.
+        """
+        key = self.make_key(pk)
+        generation_key = self.make_generation_key(pk)
+        values = self.backend.get_many([key, generation_key])
+        generation = values.get(generation_key)
+        if generation is None:
+            self.backend.add(generation_key, time_ns(), self.timeout)
+            generation = self.backend.get(generation_key)
+        entry = values.get(key)
+        if generation is None or entry is None or entry[0] != generation:
+            self.count(MISSES)
+            return None, generation
+        self.count(HITS)
+        return entry[1], generation
+
+    def set(self, pk, data, generation):
+        """Сохраняет данные объекта, полученные при этом поколении."""
+        if generation is not None:
+            self.backend.set(
+                self.make_key(pk), (generation, data), self.timeout
+            )
+
+    def invalidate(self, *pks):
+        """
+        Делает записи объектов устаревшими.
+
+        Поколения объектов увеличиваются после фиксации транзакции, и
+        записи, сохраненные с прежним поколением, больше не возвращаются.
+        """
+        keys = [self.make_generation_key(pk) for pk in pks]
+        if keys:
+            transaction.on_commit(lambda: self.bump_generations(keys))
+
+    def bump_generations(self, keys):
+        """Увеличивает поколения объектов по их ключам."""
+        for key in keys:
+            self.increment(key, initial=time_ns(), timeout=self.timeout)
+
+
+class UserCache(ResponseCache):
+    """Кэш пользователей для аутентификации с коротким временем жизни."""
+
+    timeout_setting = 'AUTH_USER_CACHE_TIMEOUT'
+
+
+class VersionedListCache(CacheCounters):
+    """
+    Кэш списков в памяти процесса с общим номером версии.
+
+    Записи хранятся вместе с номером версии, при котором они получены,
+    и не используются после его увеличения или по истечении
+    RESPONSE_CACHE_TIMEOUT.
+    """
+
+    max_entries = 256
+
+    def __init__(self, name):
+        """Регистрирует кэш и создает хранилище записей процесса."""
+        super().__init__(name)
+        self.entries = {}
+        self.lock = Lock()
+
+    @property
+    def version_key(self):
+        """Ключ номера версии в общем хранилище."""
+        return f'response-version:{self.name}'
+
+    def get_version(self):
+        """
+        Возвращает текущий номер версии списков.
+
+        Начальное значение берется из текущего времени, чтобы после
+        вытеснения версии из хранилища она не совпала с прежней.
+        """
+        version = self.backend.get(self.version_key)
+        if version is None:
+            self.backend.add(self.version_key, time_ns(), timeout=None)
+            version = self.backend.get(self.version_key)
+        return version
+
+    def bump_version(self):
+        """Увеличивает номер версии после фиксации транзакции."""
+        transaction.on_commit(
+            lambda: self.increment(self.version_key, initial=time_ns())
+        )
+
+    def get(self, key, version):
+        """Возвращает ETag и данные списка указанной версии или None."""
+        entry = self.entries.get(key)
+        if (entry is None or entry[0] != version
+                or entry[1] < monotonic()):
+            self.count(MISSES)
+            return None
+        self.count(HITS)
+        return entry[2:]
+
+    def set(self, key, version, etag, data):
+        """Сохраняет ETag и данные списка указанной версии."""
+        with self.lock:
+            if len(self.entries) >= self.max_entries:
+                self.entries.clear()
+            self.entries[key] = (
+                version,
+                monotonic() + settings.RESPONSE_CACHE_TIMEOUT,
+                etag,
+                data,
+            )
+
+
+def make_etag(*parts):
+    """Возвращает сильный ETag для переданных значений."""
+    content = json.dumps(parts, cls=DjangoJSONEncoder, sort_keys=True)
+    return '"{}"'.format(md5(content.encode()).hexdigest())
+
+
+def etag_matches(request, etag):
+    """Проверяет, совпадает ли ETag с заголовком If-None-Match запроса."""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag in etags
+
+
+title_cache = ResponseCache('title')
+score_distribution_cache = ResponseCache('score-distribution')
+category_list_cache = VersionedListCache('category-list')
+genre_list_cache = VersionedListCache('genre-list')
+# Попаданием считается ответ 304 на условный запрос, промахом - полный
+# ответ.
+review_conditional_counters = CacheCounters('reviews')
+comment_conditional_counters = CacheCounters('comments')
+auth_user_cache = UserCache('auth-user')
+token_version_cache = UserCache('token-version')
@@ -1,7 +1,23 @@
-"""Модуль, определяющий фильтры для конечной точки API, связанной с Title."""
-from django_filters.rest_framework import CharFilter, FilterSet
+"""Модуль, определяющий фильтры для конечных точек API."""
+from functools import reduce
+from operator import and_, or_
 
-from reviews.models import Title
+from django.db.models import Subquery
+from django_filters.rest_framework import (
+    CharFilter,
+    FilterSet,
+    IsoDateTimeFilter,
+    NumberFilter
+)
+from rest_framework.filters import BaseFilterBackend, SearchFilter
+
+from api_yamdb.constants import (
+    RANKING_CATEGORY,
+    RANKING_GENRE,
+    RANKING_GLOBAL
+)
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.search import NGRAM_INDEXES
 
 
 class TitleFilter(FilterSet):
@@ -14,3 +30,132 @@ class TitleFilter(FilterSet):
     class Meta:
         model = Title
         fields = ['year']
+
+
+class ReviewSearchFilter(FilterSet):
+    """Фильтр результатов поиска по отзывам."""
+
+    title = NumberFilter(field_name='title')
+    author = CharFilter(field_name='author__username')
+    score_min = NumberFilter(field_name='score', lookup_expr='gte')
+    score_max = NumberFilter(field_name='score', lookup_expr='lte')
+    date_from = IsoDateTimeFilter(field_name='pub_date', lookup_expr='gte')
+    date_to = IsoDateTimeFilter(field_name='pub_date', lookup_expr='lte')
+
+    class Meta:
+        model = Review
+        fields = []
+
+
+class CommentSearchFilter(FilterSet):
+    """Фильтр результатов поиска по комментариям.
+
+    Диапазон оценок относится к отзыву, к которому оставлен комментарий.
+    """
+
+    title = NumberFilter(field_name='review__title')
+    review = NumberFilter(field_name='review')
+    author = CharFilter(field_name='author__username')
+    score_min = NumberFilter(field_name='review__score', lookup_expr='gte')
+    score_max = NumberFilter(field_name='review__score', lookup_expr='lte')
+    date_from = IsoDateTimeFilter(field_name='pub_date', lookup_expr='gte')
+    date_to = IsoDateTimeFilter(field_name='pub_date', lookup_expr='lte')
+
+    class Meta:
+        model = Comment
+        fields = []
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Полнотекстовый поиск по параметру search.
+
+    Использует полнотекстовый индекс из атрибута search_index
+    представления и упорядочивает результаты по релевантности.
+    """
+
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        """Возвращает объекты, найденные по поисковому запросу."""
+        index = getattr(view, 'search_index', None)
+        text = request.query_params.get(self.search_param, '')
+        if index is None or not index.get_terms(text):
+            return queryset
+        return index.search(queryset, text)
+
+
+class NGramSearchFilter(SearchFilter):
+    """
+    Поиск по параметру search с использованием триграммного индекса.
+
+    Объект должен содержать каждое слово запроса хотя бы в одном из полей
+    search_fields. Слова короче трех символов ищутся по началу слов
+    значения. Если для поля нет индекса, используется поиск SearchFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        """Возвращает объекты, найденные по поисковому запросу."""
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+        indexes = [
+            NGRAM_INDEXES.get((queryset.model, field))
+            for field in search_fields
+        ]
+        if None in indexes:
+            return super().filter_queryset(request, queryset, view)
+        return queryset.filter(reduce(and_, (
+            reduce(or_, (index.get_condition(term) for index in indexes))
+            for term in search_terms
+        )))
+
+
+class RankingOrderingFilter(BaseFilterBackend):
+    """
+    Сортировка произведений по материализованному рейтингу.
+
+    Параметр ordering принимает значения rating и reviews_count, в том
+    числе с минусом для сортировки по убыванию. Строки выбираются из
+    рейтинга жанра или категории, если задан соответствующий фильтр,
+    иначе из общего рейтинга, поэтому страница читается по индексу
+    рейтинга без сортировки всех произведений.
+    """
+
+    ordering_param = 'ordering'
+    ordering_fields = ('rating', 'reviews_count')
+
+    def get_ordering(self, request):
+        """Возвращает сортировку из запроса или None."""
+        ordering = request.query_params.get(self.ordering_param, '')
+        if ordering.lstrip('-') not in self.ordering_fields:
+            return None
+        return ordering
+
+    @staticmethod
+    def get_scope(request):
+        """Возвращает область рейтинга и условие на ее id."""
+        for scope, model, param in (
+            (RANKING_GENRE, Genre, 'genre'),
+            (RANKING_CATEGORY, Category, 'category'),
+        ):
+            slug = request.query_params.get(param)
+            if slug:
+                return scope, Subquery(
+                    model.objects.filter(slug=slug).values('pk')[:1]
+                )
+        return RANKING_GLOBAL, 0
+
+    def filter_queryset(self, request, queryset, view):
+        """Сортирует произведения по строкам выбранного рейтинга."""
+        ordering = self.get_ordering(request)
+        if ordering is None:
+            return queryset
+        scope, scope_id = self.get_scope(request)
+        prefix = '-' if ordering.startswith('-') else ''
+        return queryset.filter(
+            rankings__scope=scope, rankings__scope_id=scope_id
+        ).order_by(
+            f'{prefix}rankings__{ordering.lstrip("-")}', f'{prefix}pk'
+        )
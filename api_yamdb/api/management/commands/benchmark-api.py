@@ -0,0 +1,112 @@
+"""
+Модуль management команды для замеров производительности API.
+
+Создает отдельную тестовую базу данных, заполняет ее синтетическими
+данными заданного объема, замеряет все эндпоинты и сохраняет отчет в JSON.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.benchmark import compare_reports, run_benchmark
+from reviews.generator import DatasetGenerator
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    """Команда для замеров производительности эндпоинтов API."""
+
+    help = 'Замеряет число SQL-запросов, задержку и память эндпоинтов API.'
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы командной строки."""
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Количество замеров задержки на эндпоинт.'
+        )
+        parser.add_argument(
+            '--endpoint', action='append', dest='endpoints',
+            help='Замерить только указанный эндпоинт, например titles-list.'
+        )
+        parser.add_argument(
+            '--output', help='Файл для сохранения отчета в формате JSON.'
+        )
+        parser.add_argument(
+            '--compare', help='Отчет предыдущего запуска для сравнения.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый относительный рост p95 при сравнении.'
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Не удалять тестовую базу и переиспользовать ее данные.'
+        )
+
+    def write_report(self, report):
+        """Выводит метрики эндпоинтов и пропущенные эндпоинты."""
+        for name, metrics in report['endpoints'].items():
+            self.stdout.write(
+                f'{name:<20} {metrics["status"]:>3} '
+                f'queries={metrics["queries"]:<3} '
+                f'p50={metrics["p50_ms"]:.2f}ms '
+                f'p95={metrics["p95_ms"]:.2f}ms '
+                f'mem={metrics["peak_memory_kb"]:.0f}KB'
+            )
+        if report['skipped']:
+            self.stdout.write(self.style.WARNING(
+                'Пропущены эндпоинты без данных: '
+                + ', '.join(report['skipped'])
+            ))
+
+    def handle(self, *args, **options) -> None:
+        """Готовит данные, выполняет замеры и выводит отчет."""
+        if options['repeat'] < 1:
+            raise CommandError('Параметр --repeat должен быть не меньше 1.')
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb']
+        )
+        try:
+            if not Title.objects.exists():
+                self.stdout.write('Заполнение базы данных...')
+                try:
+                    generator = DatasetGenerator(
+                        users=options['users'],
+                        categories=max(1, options['titles'] // 1000),
+                        genres=max(1, options['titles'] // 300),
+                        titles=options['titles'],
+                        reviews=options['reviews'],
+                        comments=options['comments'],
+                        seed=options['seed'],
+                    )
+                except ValueError as error:
+                    raise CommandError(error)
+                generator.generate()
+            report = run_benchmark(options['repeat'], options['endpoints'])
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options['keepdb']
+            )
+
+        self.write_report(report)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                previous = json.load(file)
+            regressions = compare_reports(
+                previous, report, options['tolerance']
+            )
+            if regressions:
+                raise CommandError(
+                    'Обнаружены регрессии:\n' + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('Регрессий не обнаружено.'))
@@ -0,0 +1,85 @@
+"""
+Модуль management команды для сравнения поиска SearchFilter и триграммного.
+
+Создает отдельную тестовую базу данных с пользователями, категориями и
+жанрами и замеряет поиск по ним обоими фильтрами на одних и тех же словах.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.benchmark import run_search_benchmark
+from reviews.generator import DatasetGenerator
+from reviews.models import User
+
+DEFAULT_TERMS = ('user1', 'ser12', 'er999', 'us', 'u')
+
+
+class Command(BaseCommand):
+    """Команда для сравнения поиска SearchFilter и триграммного индекса."""
+
+    help = 'Сравнивает задержку поиска icontains и по триграммному индексу.'
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы командной строки."""
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--term', action='append', dest='terms',
+            help='Слово запроса; можно указать несколько раз.'
+        )
+        parser.add_argument(
+            '--output', help='Файл для сохранения отчета в формате JSON.'
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Не удалять тестовую базу и переиспользовать ее данные.'
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Готовит данные, выполняет замеры и выводит отчет."""
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb']
+        )
+        try:
+            if not User.objects.exists():
+                self.stdout.write('Заполнение базы данных...')
+                try:
+                    DatasetGenerator(
+                        users=options['users'],
+                        categories=max(1, options['titles'] // 10),
+                        genres=max(1, options['titles'] // 10),
+                        titles=options['titles'],
+                        reviews=0,
+                        comments=0,
+                        seed=options['seed'],
+                    ).generate()
+                except ValueError as error:
+                    raise CommandError(error)
+            report = run_search_benchmark(
+                options['terms'] or DEFAULT_TERMS, options['repeat']
+            )
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options['keepdb']
+            )
+
+        for row in report:
+            self.stdout.write(
+                f'{row["source"]:<22} {row["term"]!r:<8} '
+                f'found={row["found"]:<6} '
+                f'icontains p95={row["icontains_p95_ms"]:.2f}ms '
+                f'ngram p95={row["ngram_p95_ms"]:.2f}ms'
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if not all(row['consistent'] for row in report):
+            raise CommandError(
+                'Результаты поиска по индексу расходятся с SearchFilter.'
+            )
+        self.stdout.write(self.style.SUCCESS('Результаты совпадают.'))
@@ -0,0 +1,288 @@
+"""
+Модуль классов пагинации API.
+
+Помимо стандартной пагинации limit/offset поддерживается пагинация по
+ключу (keyset): страница выбирается условием на значения полей сортировки
+последнего объекта предыдущей страницы, а не смещением. Такой запрос
+использует составной индекс и выполняется за одинаковое время на любой
+глубине списка, а также не требует COUNT(*).
+
+Общее количество объектов в режиме limit/offset вычисляется в зависимости
+от параметра count: exact - точно (из денормализованного счетчика
+представления или запросом COUNT(*)), estimate - приблизительно (из кэша
+или по оценке планировщика PostgreSQL), none - не вычисляется.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework import exceptions
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+COUNT_EXACT = 'exact'
+COUNT_ESTIMATE = 'estimate'
+COUNT_NONE = 'none'
+COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATE, COUNT_NONE)
+
+
+def estimate_count(queryset):
+    """
+    Возвращает оценку количества строк запроса планировщиком PostgreSQL.
+
+    Для других СУБД возвращает None.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination:
+    """
+    Пагинация по ключу сортировки.
+
+    Курсор хранит значения полей сортировки граничного объекта и
+    направление перехода. Последнее поле сортировки должно быть
+    уникальным, чтобы порядок объектов был строгим.
+    """
+
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def __init__(self, ordering, page_size):
+        """Сохраняет сортировку и размер страницы."""
+        self.ordering = tuple(ordering)
+        self.page_size = page_size
+
+    @staticmethod
+    def split(field):
+        """Возвращает имя поля и признак сортировки по убыванию."""
+        return field.lstrip('-'), field.startswith('-')
+
+    def encode_cursor(self, obj, reverse):
+        """Кодирует курсор, указывающий на объект."""
+        values = [
+            obj._meta.get_field(name).value_to_string(obj)
+            for name, _ in map(self.split, self.ordering)
+        ]
+        payload = json.dumps({'v': values, 'r': reverse}).encode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param,
+            urlsafe_b64encode(payload).decode()
+        )
+
+    def decode_cursor(self, model):
+        """
+        Декодирует курсор из параметров запроса.
+
+        Возвращает значения полей сортировки (или None для первой
+        страницы) и направление перехода.
+        """
+        encoded = self.request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode()))
+            if len(payload['v']) != len(self.ordering):
+                raise ValueError('Число значений курсора не совпадает с '
+                                 'числом полей сортировки.')
+            values = [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(
+                    map(self.split, self.ordering), payload['v']
+                )
+            ]
+            return values, bool(payload['r'])
+        except (DecodeError, KeyError, TypeError, ValueError,
+                ValidationError):
+            raise exceptions.NotFound(self.invalid_cursor_message)
+
+    def keyset_filter(self, values, reverse):
+        """
+        Строит условие выборки объектов, следующих за граничным.
+
+        Для сортировки (a, b) и граничных значений (x, y) условие имеет
+        вид a > x OR (a = x AND b > y) с учетом направления сортировки.
+        """
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(
+            map(self.split, self.ordering), values
+        ):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Возвращает объекты страницы, выбранной курсором."""
+        self.request = request
+        values, reverse = self.decode_cursor(queryset.model)
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(
+                name if descending else f'-{name}'
+                for name, descending in map(self.split, ordering)
+            )
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.keyset_filter(values, reverse))
+        page = list(queryset[:self.page_size + 1])
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+        if reverse:
+            page.reverse()
+        # При переходе назад лишняя строка означает наличие предыдущей
+        # страницы, а следующая страница заведомо есть - это граничный
+        # объект курсора. При переходе вперед - наоборот.
+        has_next, has_previous = (
+            (True, has_more) if reverse else (has_more, values is not None)
+        )
+        self.next = self.previous = None
+        if page and has_next:
+            self.next = self.encode_cursor(page[-1], reverse=False)
+        if page and has_previous:
+            self.previous = self.encode_cursor(page[0], reverse=True)
+        return page
+
+    def get_paginated_response(self, data):
+        """Возвращает ответ со ссылками на соседние страницы."""
+        return Response({
+            'next': self.next,
+            'previous': self.previous,
+            'results': data,
+        })
+
+
+class LimitOffsetOrKeysetPagination(LimitOffsetPagination):
+    """
+    Пагинация limit/offset с режимом пагинации по ключу.
+
+    Режим по ключу включается параметром cursor (пустым для первой
+    страницы) для представлений, в которых задан атрибут keyset_ordering.
+    Способ подсчета общего количества объектов задается параметром count.
+    Если представление определяет метод get_list_count, его результат
+    используется вместо COUNT(*).
+    """
+
+    count_query_param = 'count'
+    default_count_mode = COUNT_EXACT
+    count_cache_timeout = 60
+    # Оценка планировщика неточна на маленьких таблицах, поэтому меньшие
+    # значения пересчитываются точно.
+    estimate_threshold = 1000
+
+    def get_count_mode(self, request):
+        """Возвращает способ подсчета количества объектов из запроса."""
+        mode = request.query_params.get(
+            self.count_query_param, self.default_count_mode
+        )
+        if mode not in COUNT_MODES:
+            raise exceptions.ValidationError({
+                self.count_query_param: (
+                    f'Допустимые значения: {", ".join(COUNT_MODES)}.'
+                )
+            })
+        return mode
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Выбирает режим пагинации и возвращает объекты страницы."""
+        ordering = getattr(view, 'keyset_ordering', None)
+        self.keyset = None
+        self.view = view
+        if (ordering
+                and KeysetPagination.cursor_query_param
+                in request.query_params):
+            self.keyset = KeysetPagination(
+                ordering, self.get_limit(request)
+            )
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.count_mode = self.get_count_mode(request)
+        if self.count_mode == COUNT_EXACT:
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_with_lookahead(queryset, request)
+
+    def paginate_with_lookahead(self, queryset, request):
+        """
+        Возвращает объекты страницы без точного подсчета.
+
+        Наличие следующей страницы определяется выборкой одного лишнего
+        объекта.
+        """
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        page = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(page) > self.limit
+        self.count = None
+        if self.count_mode == COUNT_ESTIMATE:
+            self.count = max(
+                self.get_count(queryset), self.offset + len(page)
+            )
+        return page[:self.limit]
+
+    def get_count(self, queryset):
+        """Возвращает количество объектов выбранным способом."""
+        get_list_count = getattr(self.view, 'get_list_count', None)
+        count = get_list_count() if get_list_count else None
+        if count is not None:
+            return count
+        if self.count_mode == COUNT_ESTIMATE:
+            return self.get_estimated_count(queryset)
+        return super().get_count(queryset)
+
+    def get_estimated_count(self, queryset):
+        """
+        Возвращает приблизительное количество объектов.
+
+        Результат кэшируется в кэше RESPONSE_CACHE_ALIAS по тексту
+        SQL-запроса, поэтому для каждого набора фильтров подсчет
+        выполняется не чаще раза в count_cache_timeout секунд.
+        """
+        cache = caches[settings.RESPONSE_CACHE_ALIAS]
+        sql, params = queryset.query.sql_with_params()
+        key = 'pagination-count:' + md5(
+            f'{queryset.db}:{sql}:{params}'.encode()
+        ).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = estimate_count(queryset)
+            if count is None or count < self.estimate_threshold:
+                count = queryset.count()
+            cache.set(key, count, self.count_cache_timeout)
+        return count
+
+    def get_next_link(self):
+        """Возвращает ссылку на следующую страницу."""
+        if self.count_mode == COUNT_EXACT:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = replace_query_param(
+            self.request.build_absolute_uri(),
+            self.limit_query_param, self.limit
+        )
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+    def get_paginated_response(self, data):
+        """Возвращает ответ в формате выбранного режима пагинации."""
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
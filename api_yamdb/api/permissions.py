@@ -1,6 +1,29 @@
-"""Модуль permissions определяет пользовательские разрешения."""
+"""
+Модуль permissions определяет пользовательские разрешения.
+
+Признаки ролей пользователя вычисляются один раз за запрос и
+сохраняются в нем, так как проверяются несколькими классами разрешений
+и для каждого объекта, а авторство объекта проверяется по author_id без
+загрузки автора.
+"""
+from collections import namedtuple
+
 from rest_framework.permissions import SAFE_METHODS, BasePermission
 
+Roles = namedtuple('Roles', ('is_admin', 'is_moderator'))
+ANONYMOUS_ROLES = Roles(is_admin=False, is_moderator=False)
+
+
+def get_roles(request):
+    """Возвращает признаки ролей пользователя запроса."""
+    roles = getattr(request, '_roles', None)
+    if roles is None:
+        user = request.user
+        roles = request._roles = Roles(
+            is_admin=user.is_admin, is_moderator=user.is_moderator
+        ) if user.is_authenticated else ANONYMOUS_ROLES
+    return roles
+
 
 class AdminModeratorAuthorPermission(BasePermission):
     """AdminModeratorAuthorPermission.
@@ -20,11 +43,12 @@ class AdminModeratorAuthorPermission(BasePermission):
 
     def has_object_permission(self, request, view, obj):
         """Определяет, имеет ли пользователь разрешение на доступ к объекту."""
-        return (request.method in SAFE_METHODS
-                or obj.author == request.user
-                or request.user.is_moderator
-                or request.user.is_admin
-                )
+        if request.method in SAFE_METHODS:
+            return True
+        if obj.author_id == request.user.pk:
+            return True
+        roles = get_roles(request)
+        return roles.is_moderator or roles.is_admin
 
 
 class IsAdminPermission(BasePermission):
@@ -36,10 +60,7 @@ class IsAdminPermission(BasePermission):
 
     def has_permission(self, request, view):
         """Определяет права доступа на уровне всего запроса."""
-        return (
-            request.user.is_authenticated
-            and request.user.is_admin
-        )
+        return get_roles(request).is_admin
 
 
 class AdminOrReadOnlyPermission(IsAdminPermission):
@@ -54,3 +75,16 @@ class AdminOrReadOnlyPermission(IsAdminPermission):
         return (super().has_permission(request, view)
                 or request.method in SAFE_METHODS
                 )
+
+
+class IsModeratorPermission(BasePermission):
+    """IsModeratorPermission.
+
+    Разрешение для доступа к конечным точкам API
+    только для модераторов и администраторов.
+    """
+
+    def has_permission(self, request, view):
+        """Определяет права доступа на уровне всего запроса."""
+        roles = get_roles(request)
+        return roles.is_moderator or roles.is_admin
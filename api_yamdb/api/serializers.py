@@ -7,8 +7,10 @@
 
 """
 from django.conf import settings
+from django.db import IntegrityError, transaction
 
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 
 from api_yamdb.constants import (
     MAX_LENGTH_EMAIL_ADDRESS,
@@ -17,6 +19,7 @@ from api_yamdb.constants import (
     MIN_VALUE_SCORE,
 )
 from reviews.models import Category, Genre, Title, Comment, Review, User
+from reviews.ratings import ScoreHistogram, get_global_mean
 from reviews.validators import ValidateUsername, validate_year
 
 
@@ -43,11 +46,22 @@ class GenreSerializer(serializers.ModelSerializer):
 
 
 class ReadTitleSerializer(serializers.ModelSerializer):
-    """Сериализатор для чтения информации о произведении (Title)."""
+    """
+    Сериализатор для чтения информации о произведении (Title).
+
+    Поля из OPTIONAL_FIELDS выводятся, только если перечислены в
+    параметре запроса include, и вычисляются по гистограмме оценок.
+    """
+
+    OPTIONAL_FIELDS = ('mean_rating', 'weighted_rating', 'percentiles')
+    include_query_param = 'include'
 
     genre = GenreSerializer(many=True, )
     category = CategorySerializer()
     rating = serializers.IntegerField(read_only=True)
+    mean_rating = serializers.SerializerMethodField()
+    weighted_rating = serializers.SerializerMethodField()
+    percentiles = serializers.SerializerMethodField()
 
     class Meta:
         fields = (
@@ -57,11 +71,70 @@ class ReadTitleSerializer(serializers.ModelSerializer):
             'rating',
             'description',
             'genre',
-            'category'
+            'category',
+            'mean_rating',
+            'weighted_rating',
+            'percentiles'
         )
         model = Title
         read_only_fields = fields
 
+    @classmethod
+    def get_included_fields(cls, request):
+        """Возвращает необязательные поля, запрошенные параметром include."""
+        if request is None:
+            return set()
+        requested = request.query_params.get(cls.include_query_param, '')
+        return set(requested.split(',')) & set(cls.OPTIONAL_FIELDS)
+
+    def get_fields(self):
+        """Исключает необязательные поля, не запрошенные клиентом."""
+        fields = super().get_fields()
+        included = self.get_included_fields(self.context.get('request'))
+        for name in set(self.OPTIONAL_FIELDS) - included:
+            del fields[name]
+        return fields
+
+    @staticmethod
+    def round(value):
+        """Округляет оценку до сотых."""
+        return None if value is None else round(value, 2)
+
+    def get_mean_rating(self, title):
+        """Возвращает среднюю оценку произведения."""
+        return self.round(ScoreHistogram.for_title(title).mean)
+
+    def get_weighted_rating(self, title):
+        """Возвращает взвешенную оценку произведения."""
+        if not hasattr(self, 'global_mean'):
+            self.global_mean = get_global_mean()
+        return self.round(ScoreHistogram.for_title(title).weighted(
+            self.global_mean, settings.RATING_MIN_VOTES
+        ))
+
+    def get_percentiles(self, title):
+        """Возвращает перцентили оценок произведения."""
+        return ScoreHistogram.for_title(title).percentiles()
+
+
+class ScoreDistributionSerializer(serializers.Serializer):
+    """
+    Сериализатор распределения оценок произведения.
+
+    Принимает гистограмму оценок ScoreHistogram и выводит количество
+    оценок для каждого значения от минимального до максимального.
+    """
+
+    count = serializers.IntegerField(source='total')
+    distribution = serializers.SerializerMethodField()
+
+    def get_distribution(self, histogram):
+        """Возвращает количество оценок для каждого значения."""
+        return [
+            {'score': score, 'count': count}
+            for score, count in histogram.items()
+        ]
+
 
 class WriteTitleSerializer(serializers.ModelSerializer):
     """Сериализатор для записи информации о произведении (Title)."""
@@ -133,21 +206,75 @@ class ReviewSerializer(serializers.ModelSerializer):
         )
         model = Review
 
-    def validate(self, data):
+    def create(self, validated_data):
         """
-        Проверка валидности данных.
-
-        Проверяет, что пользователь не оставляет
-        повторные отзывы для одного произведения.
+        Создание отзыва.
+
+        Повторный отзыв пользователя на произведение отклоняется
+        ограничением unique_author_title при выполнении INSERT, без
+        предварительной проверки запросом. Ошибка целостности
+        перехватывается в точке сохранения, чтобы транзакция запроса
+        осталась пригодной, и возвращается как ошибка валидации, только
+        если отзыв автора на произведение действительно существует.
+        Нарушения других ограничений не скрываются.
         """
-        title_id = self.context.get('view').kwargs.get('title_id')
-        if self.context['request'].method == 'POST' and Review.objects.filter(
-            title=title_id, author=self.context['request'].user
-        ).exists():
-            raise serializers.ValidationError(
-                'Отзыв на это произведение уже оставлен!'
-            )
-        return data
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            if not Review.objects.filter(
+                author_id=validated_data['author_id'],
+                title=validated_data['title']
+            ).exists():
+                raise
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Отзыв на это произведение уже оставлен!'
+                ]
+            })
+
+
+class ReviewSearchSerializer(serializers.ModelSerializer):
+    """Сериализатор для чтения найденных отзывов (Review)."""
+
+    author = serializers.SlugRelatedField(
+        slug_field='username',
+        read_only=True,
+    )
+
+    class Meta:
+        fields = (
+            'id',
+            'title',
+            'text',
+            'author',
+            'score',
+            'pub_date'
+        )
+        model = Review
+        read_only_fields = fields
+
+
+class CommentSearchSerializer(serializers.ModelSerializer):
+    """Сериализатор для чтения найденных комментариев (Comment)."""
+
+    author = serializers.SlugRelatedField(
+        slug_field='username',
+        read_only=True,
+    )
+    title = serializers.IntegerField(source='review.title_id', read_only=True)
+
+    class Meta:
+        fields = (
+            'id',
+            'title',
+            'review',
+            'text',
+            'author',
+            'pub_date'
+        )
+        model = Comment
+        read_only_fields = fields
 
 
 class AdminUserSerializer(serializers.ModelSerializer, ValidateUsername):
@@ -0,0 +1,185 @@
+"""
+Обработчики сигналов для сброса кэша ответов API.
+
+Данные произведения зависят от самого произведения, его отзывов (рейтинг),
+категории и жанров, поэтому запись кэша удаляется при изменении любого
+из этих объектов и связей произведения с жанрами. Версия кэша списков
+категорий и жанров увеличивается при любом их изменении, в том числе
+через CRDSlugSearchViewSet. Время изменения отзывов произведения и
+комментариев отзыва для условных GET-запросов обновляется в базе данных
+в транзакции изменения отзыва, комментария или имени их автора, кроме
+отзывов и комментариев, удаляемых вместе с родителем.
+Пользователи удаляются из кэша аутентификации при любом изменении, а
+при изменении их роли увеличивается версия утверждений токенов.
+"""
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.signals import is_cascade_delete
+from .cache import (
+    auth_user_cache,
+    category_list_cache,
+    genre_list_cache,
+    score_distribution_cache,
+    title_cache,
+    token_version_cache
+)
+
+
+def touch(queryset, field):
+    """Записывает текущее время в поле времени изменения объектов."""
+    queryset.update(**{field: timezone.now()})
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    """Сбрасывает кэш измененного или удаленного произведения."""
+    title_cache.invalidate(instance.pk)
+    if kwargs['signal'] is post_delete:
+        score_distribution_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_title(sender, instance, **kwargs):
+    """
+    Сбрасывает кэш произведения, рейтинг которого изменил отзыв.
+
+    Также сбрасывает кэш распределения оценок произведения и обновляет
+    время изменения отзывов произведения. При удалении отзыва вместе с
+    произведением кэш сбрасывается обработчиком удаления произведения.
+    """
+    if kwargs['signal'] is post_delete and is_cascade_delete(
+        sender, instance
+    ):
+        return
+    title_ids = {instance.title_id}
+    previous = getattr(instance, '_previous_score', None)
+    if previous is not None:
+        title_ids.add(previous[0])
+    title_cache.invalidate(*title_ids)
+    score_distribution_cache.invalidate(*title_ids)
+    touch(Title.objects.filter(pk__in=title_ids), 'reviews_updated_at')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_review_comments(sender, instance, **kwargs):
+    """Обновляет время изменения комментариев отзыва."""
+    if kwargs['signal'] is post_delete and is_cascade_delete(
+        sender, instance
+    ):
+        return
+    touch(Review.objects.filter(pk=instance.review_id), 'comments_updated_at')
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_user(sender, instance, raw=False, **kwargs):
+    """Запоминает имя, роль, is_staff и is_active пользователя."""
+    instance._previous_user = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_user = User.objects.filter(pk=instance.pk).values_list(
+        'username', 'role', 'is_staff', 'is_active'
+    ).first()
+
+
+@receiver(post_save, sender=User)
+def touch_author_publications(sender, instance, **kwargs):
+    """
+    Обновляет время изменения отзывов и комментариев переименованного автора.
+
+    Отзывы и комментарии содержат имена авторов, поэтому изменение имени
+    меняет представление отзывов его произведений и комментариев его
+    отзывов.
+    """
+    previous = getattr(instance, '_previous_user', None)
+    if previous is None or previous[0] == instance.username:
+        return
+    touch(
+        Title.objects.filter(reviews__author=instance), 'reviews_updated_at'
+    )
+    touch(
+        Review.objects.filter(comments__author=instance),
+        'comments_updated_at'
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_user(sender, instance, **kwargs):
+    """
+    Сбрасывает кэш пользователя для аутентификации.
+
+    При изменении роли, is_staff или is_active увеличивает в той же
+    транзакции версию утверждений токенов пользователя, чтобы утверждения
+    ранее выданных токенов перестали приниматься без проверки
+    пользователя.
+    """
+    auth_user_cache.invalidate(instance.pk)
+    token_version_cache.invalidate(instance.pk)
+    previous = getattr(instance, '_previous_user', None)
+    current = (instance.role, instance.is_staff, instance.is_active)
+    if previous is not None and previous[1:] != current:
+        User.objects.filter(pk=instance.pk).update(
+            token_version=F('token_version') + 1
+        )
+        instance.token_version += 1
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Genre)
+def invalidate_related_titles(sender, instance, **kwargs):
+    """
+    Сбрасывает кэш произведений категории или жанра.
+
+    При удалении произведения выбираются до удаления объекта, пока
+    их связь с ним еще существует.
+    """
+    if kwargs.get('created'):
+        return
+    title_cache.invalidate(
+        *instance.titles.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_category_list_version(sender, **kwargs):
+    """Делает устаревшими закэшированные списки категорий."""
+    category_list_cache.bump_version()
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def bump_genre_list_version(sender, **kwargs):
+    """Делает устаревшими закэшированные списки жанров."""
+    genre_list_cache.bump_version()
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    """Сбрасывает кэш произведений при изменении их жанров."""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        title_cache.invalidate(instance.pk)
+    elif action == 'pre_clear':
+        title_cache.invalidate(
+            *instance.titles.values_list('pk', flat=True)
+        )
+    else:
+        title_cache.invalidate(*pk_set)
@@ -5,7 +5,8 @@ from rest_framework.routers import DefaultRouter
 
 from api.views import (
     CategoryViewSet, GenreViewSet, TitleViewSet, CommentViewSet,
-    ReviewViewSet, UserViewSet, SignUpView, GetTokenView
+    ReviewViewSet, UserViewSet, SignUpView, GetTokenView, ExportView,
+    CacheStatsView, ReviewSearchViewSet, CommentSearchViewSet
 )
 
 
@@ -21,6 +22,10 @@ router_v1.register(
 
 router_v1.register('users', UserViewSet,
                    basename='users')
+router_v1.register('search/reviews', ReviewSearchViewSet,
+                   basename='search-reviews')
+router_v1.register('search/comments', CommentSearchViewSet,
+                   basename='search-comments')
 
 auth_urls = [
     path('auth/signup/', SignUpView.as_view()),
@@ -30,4 +35,6 @@ auth_urls = [
 urlpatterns = [
     path('v1/', include(router_v1.urls)),
     path('v1/', include(auth_urls)),
+    path('v1/export/<slug:dataset>/', ExportView.as_view()),
+    path('v1/cache/stats/', CacheStatsView.as_view()),
 ]
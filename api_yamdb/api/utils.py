@@ -1,12 +1,15 @@
-from django.core.mail import send_mail
-from django.conf import settings
+from reviews.mailqueue import enqueue_email
 
 
 def send_confirmation_code(user):
-    """Отправляет код подтверждения на почту пользователя."""
-    send_mail(
+    """
+    Ставит письмо с кодом подтверждения в очередь исходящей почты.
+
+    Письмо отправляется командой send-mail, поэтому ответ на запрос не
+    ждет почтового сервера.
+    """
+    enqueue_email(
         'Код подтверждения',
         f'Ваш код подтверждения: {user.confirmation_code}',
-        settings.SENDER_EMAIL,
         [user.email]
     )
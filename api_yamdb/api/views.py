@@ -9,32 +9,55 @@
 from random import sample
 
 from django.db import IntegrityError
-from django.db.models import Avg
 from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework.filters import SearchFilter
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import SAFE_METHODS
 from rest_framework.throttling import UserRateThrottle
 from django_filters.rest_framework import DjangoFilterBackend
 
-from api.viewsets import CRDSlugSearchViewSet
-from api.filters import TitleFilter
+from api.authentication import RoleAccessToken, get_user_instance
+from api.cache import (
+    CacheCounters,
+    category_list_cache,
+    comment_conditional_counters,
+    genre_list_cache,
+    review_conditional_counters,
+    score_distribution_cache,
+    title_cache
+)
+from api.viewsets import (
+    ConditionalGetMixin,
+    CRDSlugSearchViewSet,
+    NestedViewSetMixin,
+    TextSearchViewSet
+)
+from api.filters import (
+    CommentSearchFilter,
+    FullTextSearchFilter,
+    NGramSearchFilter,
+    RankingOrderingFilter,
+    ReviewSearchFilter,
+    TitleFilter
+)
 from api.serializers import (
     CategorySerializer,
     GenreSerializer,
     ReadTitleSerializer,
+    ScoreDistributionSerializer,
     WriteTitleSerializer,
     CommentSerializer,
+    CommentSearchSerializer,
     ReviewSerializer,
+    ReviewSearchSerializer,
     SignUpSerializer,
     GetTokenSerializer,
     UserSerializer,
@@ -46,6 +69,13 @@ from api.permissions import (
     IsAdminPermission
 )
 from api.utils import send_confirmation_code
+from reviews.exporter import (
+    CONTENT_TYPES,
+    DATASETS,
+    FORMAT_CSV,
+    export_dataset
+)
+from reviews.ratings import ScoreHistogram
 from reviews.models import (
     Category,
     Genre,
@@ -54,6 +84,11 @@ from reviews.models import (
     Comment,
     User
 )
+from reviews.search import (
+    COMMENT_SEARCH_INDEX,
+    REVIEW_SEARCH_INDEX,
+    TITLE_SEARCH_INDEX
+)
 
 
 class CategoryViewSet(CRDSlugSearchViewSet):
@@ -65,6 +100,7 @@ class CategoryViewSet(CRDSlugSearchViewSet):
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    list_cache = category_list_cache
 
 
 class GenreViewSet(CRDSlugSearchViewSet):
@@ -76,6 +112,7 @@ class GenreViewSet(CRDSlugSearchViewSet):
 
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    list_cache = genre_list_cache
 
 
 class TitleViewSet(ModelViewSet):
@@ -83,17 +120,36 @@ class TitleViewSet(ModelViewSet):
     View для обработки запросов к модели Title.
 
     Позволяет выполнять операции CRUD с экземплярами модели Title.
-    Поддерживает фильтрацию, пагинацию и аннотации среднего рейтинга.
+    Поддерживает фильтрацию, полнотекстовый поиск по названию и описанию
+    (параметр search), сортировку по материализованным рейтингам
+    (параметр ordering) и пагинацию, в том числе по ключу (name, id).
+    Рейтинг читается из денормализованных полей модели без обращения
+    к таблице отзывов, категория и жанры загружаются фиксированным
+    числом запросов.
     """
 
-    queryset = Title.objects.all().annotate(
-        rating=Avg('reviews__score')
-    ).order_by(*Title._meta.ordering)
+    queryset = Title.objects.select_related('category').prefetch_related(
+        'genre'
+    )
     permission_classes = (AdminOrReadOnlyPermission,)
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (
+        DjangoFilterBackend, FullTextSearchFilter, RankingOrderingFilter
+    )
     filterset_class = TitleFilter
+    search_index = TITLE_SEARCH_INDEX
     http_method_names = ('get', 'post', 'patch', 'delete')
 
+    @property
+    def keyset_ordering(self):
+        """
+        Сортировка для пагинации по ключу.
+
+        При сортировке по рейтингу используется пагинация limit/offset.
+        """
+        if RankingOrderingFilter().get_ordering(self.request):
+            return None
+        return ('name', 'id')
+
     def get_serializer_class(self):
         """
         Получение класса сериализатора.
@@ -104,36 +160,98 @@ class TitleViewSet(ModelViewSet):
             return ReadTitleSerializer
         return WriteTitleSerializer
 
+    def get_queryset(self):
+        """
+        Получение набора запросов для обработки.
+
+        Если запрошены поля, вычисляемые по гистограмме оценок, строки
+        гистограмм загружаются одним дополнительным запросом.
+        """
+        queryset = super().get_queryset()
+        if ReadTitleSerializer.get_included_fields(self.request):
+            queryset = queryset.prefetch_related('scores')
+        return queryset
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Получение произведения.
 
-class CommentViewSet(ModelViewSet):
+        Возвращает сериализованные данные произведения из кэша, а при
+        промахе формирует их и сохраняет в кэше. Ответы с
+        необязательными полями не кэшируются.
+        """
+        try:
+            pk = int(kwargs[self.lookup_field])
+        except ValueError:
+            return super().retrieve(request, *args, **kwargs)
+        if ReadTitleSerializer.get_included_fields(request):
+            return super().retrieve(request, *args, **kwargs)
+        data, generation = title_cache.get(pk)
+        if data is not None:
+            return Response(data)
+        response = super().retrieve(request, *args, **kwargs)
+        title_cache.set(pk, response.data, generation)
+        return response
+
+    @action(
+        detail=True, url_path='score-distribution',
+        url_name='score-distribution'
+    )
+    def score_distribution(self, request, pk):
+        """
+        Распределение оценок произведения.
+
+        Читается из гистограммы оценок, которая обновляется при
+        изменении отзывов, без группировки таблицы отзывов, и хранится
+        в кэше до следующего изменения отзывов произведения.
+        """
+        try:
+            pk = int(pk)
+        except ValueError:
+            raise Http404
+        data, generation = score_distribution_cache.get(pk)
+        if data is not None:
+            return Response(data)
+        title = get_object_or_404(
+            Title.objects.only('pk').prefetch_related('scores'), pk=pk
+        )
+        data = ScoreDistributionSerializer(
+            ScoreHistogram.for_title(title)
+        ).data
+        score_distribution_cache.set(pk, data, generation)
+        return Response(data)
+
+
+class CommentViewSet(ConditionalGetMixin, NestedViewSetMixin, ModelViewSet):
     """
     View для обработки запросов к модели Comment.
 
     Позволяет выполнять операции CRUD с экземплярами модели Comment.
+    Отзыв выбирается вместе с проверкой его принадлежности произведению
+    из URL, авторы комментариев загружаются в том же запросе, что и
+    страница. Поддерживает пагинацию по ключу (-pub_date, -id) и условные
+    GET-запросы по времени изменения комментариев отзыва.
     """
 
-    queryset = Comment.objects.all()
+    queryset = Comment.objects.select_related('author')
+    parent_queryset = Review.objects.all()
+    parent_field = 'review'
+    parent_lookups = {'pk': 'review_id', 'title_id': 'title_id'}
     permission_classes = (AdminModeratorAuthorPermission,)
+    keyset_ordering = ('-pub_date', '-id')
+    counters = comment_conditional_counters
+    stamp_field = 'comments_updated_at'
     http_method_names = ('get', 'post', 'patch', 'delete')
     serializer_class = CommentSerializer
 
-    def __get_review(self):
+    def get_list_count(self):
         """
-        Получение отзыва по его идентификатору.
+        Получение количества комментариев для пагинации.
 
-        Возвращает экземпляр модели Review по его идентификатору
-        из параметров запроса.
+        Возвращает денормализованный счетчик комментариев отзыва
+        вместо подсчета запросом COUNT(*).
         """
-        return get_object_or_404(Review, pk=self.kwargs['review_id'])
-
-    def get_queryset(self):
-        """
-        Получение набора запросов для обработки.
-
-        Возвращает набор запросов для обработки запросов к модели Comment.
-        Фильтрует комментарии по отзыву, полученному из параметров запроса.
-        """
-        return self.__get_review().comments.all()
+        return self.get_parent().comments_count
 
     def perform_create(self, serializer):
         """
@@ -143,40 +261,41 @@ class CommentViewSet(ModelViewSet):
         и относящийся к отзыву полученному из параметров запроса.
         """
         serializer.save(
-            author=self.request.user,
-            review=self.__get_review()
+            author_id=self.request.user.pk,
+            review=self.get_parent()
         )
 
 
-class ReviewViewSet(ModelViewSet):
+class ReviewViewSet(ConditionalGetMixin, NestedViewSetMixin, ModelViewSet):
     """
     View для обработки запросов к модели Review.
 
     Позволяет выполнять операции CRUD с экземплярами модели Review.
+    Произведение загружается один раз за запрос, авторы отзывов - в том
+    же запросе, что и страница. Поддерживает пагинацию по ключу
+    (-pub_date, -id) и условные GET-запросы по времени изменения отзывов
+    произведения.
     """
 
-    queryset = Review.objects.all()
+    queryset = Review.objects.select_related('author')
+    parent_queryset = Title.objects.all()
+    parent_field = 'title'
+    parent_lookups = {'pk': 'title_id'}
     permission_classes = (AdminModeratorAuthorPermission,)
+    keyset_ordering = ('-pub_date', '-id')
+    counters = review_conditional_counters
+    stamp_field = 'reviews_updated_at'
     http_method_names = ('get', 'post', 'patch', 'delete')
     serializer_class = ReviewSerializer
 
-    def __get_title(self):
-        """
-        Получение произведения по его идентификатору.
-
-        Возвращает экземпляр модели Title по его идентификатору
-        из параметров запроса.
-        """
-        return get_object_or_404(Title, pk=self.kwargs['title_id'])
-
-    def get_queryset(self):
+    def get_list_count(self):
         """
-        Получение набора запросов для обработки.
+        Получение количества отзывов для пагинации.
 
-        Возвращает набор запросов для обработки запросов к модели Review.
-        Фильтрует отзывы по произведению, полученному из параметров запроса.
+        Возвращает денормализованный счетчик оценок произведения
+        вместо подсчета запросом COUNT(*).
         """
-        return self.__get_title().reviews.all()
+        return self.get_parent().rating_count
 
     def perform_create(self, serializer):
         """
@@ -186,18 +305,50 @@ class ReviewViewSet(ModelViewSet):
         относящийся к произведению полученному из параметров запроса.
         """
         serializer.save(
-            author=self.request.user,
-            title=self.__get_title()
+            author_id=self.request.user.pk,
+            title=self.get_parent()
         )
 
 
+class ReviewSearchViewSet(TextSearchViewSet):
+    """
+    View для полнотекстового поиска по текстам отзывов.
+
+    Доступен модераторам и администраторам. Поддерживает фильтры по
+    произведению, автору, диапазону оценок и дате публикации.
+    """
+
+    queryset = Review.objects.select_related('author').order_by(
+        '-pub_date', '-id'
+    )
+    serializer_class = ReviewSearchSerializer
+    filterset_class = ReviewSearchFilter
+    search_index = REVIEW_SEARCH_INDEX
+
+
+class CommentSearchViewSet(TextSearchViewSet):
+    """
+    View для полнотекстового поиска по текстам комментариев.
+
+    Доступен модераторам и администраторам. Поддерживает фильтры по
+    произведению, отзыву, автору, оценке отзыва и дате публикации.
+    """
+
+    queryset = Comment.objects.select_related('author', 'review').order_by(
+        '-pub_date', '-id'
+    )
+    serializer_class = CommentSearchSerializer
+    filterset_class = CommentSearchFilter
+    search_index = COMMENT_SEARCH_INDEX
+
+
 class UserViewSet(ModelViewSet):
     """Представление для операций с пользователями."""
 
     queryset = User.objects.all()
     serializer_class = AdminUserSerializer
     permission_classes = (IsAdminPermission,)
-    filter_backends = (SearchFilter,)
+    filter_backends = (NGramSearchFilter,)
     lookup_field = 'username'
     search_fields = ('username',)
     http_method_names = ['get', 'post', 'head', 'patch', 'delete']
@@ -208,14 +359,20 @@ class UserViewSet(ModelViewSet):
         permission_classes=(IsAuthenticated,)
     )
     def profile(self, request):
-        """Представление профиля текущего пользователя."""
+        """
+        Представление профиля текущего пользователя.
+
+        Пользователь, построенный по утверждениям токена, загружается из
+        базы данных.
+        """
+        user = get_user_instance(request.user)
         if not request.method == 'PATCH':
             return Response(
-                UserSerializer(request.user).data,
+                UserSerializer(user).data,
                 status=status.HTTP_200_OK
             )
         serializer = UserSerializer(
-            request.user, data=request.data, partial=True
+            user, data=request.data, partial=True
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
@@ -296,6 +453,57 @@ class GetTokenView(TokenObtainPairView):
                 'Неверный код подтверждения. Запросите код ещё раз.',
             )
         return Response(
-            {'token': str(AccessToken.for_user(user))},
+            {'token': str(RoleAccessToken.for_user(user))},
             status=status.HTTP_200_OK
         )
+
+
+class ExportView(APIView):
+    """Представление для потоковой выгрузки данных администратором."""
+
+    permission_classes = (IsAdminPermission,)
+
+    def get(self, request, dataset):
+        """
+        Выгружает набор данных в формате CSV или NDJSON.
+
+        Формат задается параметром file_format. Ответ формируется
+        потоково, поэтому объем выгрузки не ограничен памятью сервера.
+        """
+        file_format = request.query_params.get('file_format', FORMAT_CSV)
+        if dataset not in DATASETS:
+            raise ValidationError(
+                f'Неизвестный набор данных. Доступны: {", ".join(DATASETS)}.'
+            )
+        if file_format not in CONTENT_TYPES:
+            raise ValidationError(
+                'Неизвестный формат выгрузки. '
+                f'Доступны: {", ".join(CONTENT_TYPES)}.'
+            )
+        response = StreamingHttpResponse(
+            export_dataset(dataset, file_format),
+            content_type=CONTENT_TYPES[file_format]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{dataset}.{file_format}"'
+        )
+        return response
+
+
+class CacheStatsView(APIView):
+    """Представление статистики кэша ответов для администратора."""
+
+    permission_classes = (IsAdminPermission,)
+
+    def get(self, request):
+        """Возвращает количество попаданий и промахов каждого кэша."""
+        return Response({
+            name: response_cache.get_stats()
+            for name, response_cache in CacheCounters.registry.items()
+        })
+
+    def delete(self, request):
+        """Обнуляет счетчики попаданий и промахов."""
+        for response_cache in CacheCounters.registry.values():
+            response_cache.reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1,8 +1,140 @@
 """Модуль, содержащий представления для работы с конечными точками API."""
-from rest_framework import viewsets, mixins
-from rest_framework.filters import SearchFilter
+from functools import partial
 
-from .permissions import AdminOrReadOnlyPermission
+from django.db.models import F
+from django.shortcuts import get_object_or_404
+from django.utils.http import http_date, parse_http_date_safe, urlencode
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import status, viewsets, mixins
+from rest_framework.response import Response
+
+from .cache import HITS, MISSES, etag_matches, make_etag
+from .filters import FullTextSearchFilter, NGramSearchFilter
+from .permissions import AdminOrReadOnlyPermission, IsModeratorPermission
+
+
+class NestedViewSetMixin:
+    """
+    Вложенный ресурс, объекты которого принадлежат родителю из URL.
+
+    Родитель выбирается одним запросом по условиям parent_lookups
+    (поле родителя: параметр URL), которые включают и параметры внешних
+    уровней вложенности, поэтому несоответствие родителя URL дает ответ
+    404 без дополнительных запросов. Родитель загружается не более
+    одного раза за запрос. Операции с отдельным объектом не загружают
+    родителя: те же условия применяются к объекту через поле
+    parent_field.
+    """
+
+    parent_queryset = None
+    parent_field = None
+    parent_lookups = {}
+
+    def get_parent(self):
+        """Возвращает родителя из параметров URL, загружая его один раз."""
+        if not hasattr(self, '_parent'):
+            self._parent = get_object_or_404(self.parent_queryset, **{
+                lookup: self.kwargs[url_kwarg]
+                for lookup, url_kwarg in self.parent_lookups.items()
+            })
+        return self._parent
+
+    def get_queryset(self):
+        """
+        Возвращает объекты родителя из параметров URL.
+
+        Список выбирается по загруженному родителю, чтобы для
+        несуществующего родителя вернуть ответ 404, а отдельный объект -
+        по условиям на родителя в том же запросе.
+        """
+        queryset = super().get_queryset()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg not in self.kwargs:
+            return queryset.filter(**{self.parent_field: self.get_parent()})
+        return queryset.filter(**{
+            f'{self.parent_field}__{lookup}': self.kwargs[url_kwarg]
+            for lookup, url_kwarg in self.parent_lookups.items()
+        })
+
+
+class ConditionalGetMixin:
+    """
+    Поддержка условных GET-запросов для списка и отдельных объектов.
+
+    Используется вместе с NestedViewSetMixin. ETag и Last-Modified
+    вычисляются по времени изменения объектов родителя, которое хранится
+    в его поле stamp_field и обновляется в транзакции изменения объекта,
+    поэтому одинаково во всех процессах приложения. Условия запроса
+    проверяются после загрузки родителя списка или самого объекта: для
+    несуществующего ресурса ответ 404 дается при любых заголовках, а
+    If-None-Match: * совпадает только с существующим. Время изменения
+    объекта выбирается вместе с ним, поэтому ответ 304 требует одного
+    запроса к базе данных. Ответы 304 учитываются в счетчиках counters.
+    """
+
+    counters = None
+    stamp_field = None
+
+    def get_queryset(self):
+        """Добавляет к отдельному объекту время изменения родителя."""
+        queryset = super().get_queryset()
+        if (self.lookup_url_kwarg or self.lookup_field) not in self.kwargs:
+            return queryset
+        return queryset.annotate(
+            parent_stamp=F(f'{self.parent_field}__{self.stamp_field}')
+        )
+
+    @staticmethod
+    def get_validators(request, stamp):
+        """Возвращает ETag и время последнего изменения ответа."""
+        etag = make_etag(
+            request.accepted_renderer.format, request.get_full_path(), stamp
+        )
+        return etag, int(stamp.timestamp())
+
+    @staticmethod
+    def is_not_modified(request, etag, last_modified):
+        """
+        Проверяет условия запроса.
+
+        If-None-Match имеет приоритет над If-Modified-Since.
+        """
+        if 'HTTP_IF_NONE_MATCH' in request.META:
+            return etag_matches(request, etag)
+        modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+        )
+        return modified_since is not None and last_modified <= modified_since
+
+    def conditional_response(self, request, stamp, handler):
+        """Возвращает ответ 304 или ответ обработчика с валидаторами."""
+        etag, last_modified = self.get_validators(request, stamp)
+        if self.is_not_modified(request, etag, last_modified):
+            self.counters.count(HITS)
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            self.counters.count(MISSES)
+            response = handler()
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """Возвращает список объектов с учетом условий запроса."""
+        return self.conditional_response(
+            request,
+            getattr(self.get_parent(), self.stamp_field),
+            partial(super().list, request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Возвращает объект с учетом условий запроса."""
+        instance = self.get_object()
+        return self.conditional_response(
+            request,
+            instance.parent_stamp,
+            lambda: Response(self.get_serializer(instance).data)
+        )
 
 
 class CRDSlugSearchViewSet(
@@ -16,9 +148,46 @@ class CRDSlugSearchViewSet(
     Включает в себя функциональность списочного представления (ListModelMixin),
     представления создания объекта (CreateModelMixin)
     и представления удаления объекта (DestroyModelMixin).
+    Если задан атрибут list_cache, списки отдаются из версионного кэша
+    с заголовком ETag, а при совпадении If-None-Match - ответом 304.
     """
 
-    filter_backends = (SearchFilter,)
+    filter_backends = (NGramSearchFilter,)
     lookup_field = 'slug'
     search_fields = ('name',)
     permission_classes = (AdminOrReadOnlyPermission,)
+    list_cache = None
+
+    def list(self, request, *args, **kwargs):
+        """Возвращает список объектов, по возможности из кэша."""
+        if self.list_cache is None:
+            return super().list(request, *args, **kwargs)
+        key = (
+            request.accepted_renderer.format,
+            urlencode(sorted(request.query_params.lists()), doseq=True),
+        )
+        version = self.list_cache.get_version()
+        entry = self.list_cache.get(key, version)
+        if entry is None:
+            response = super().list(request, *args, **kwargs)
+            etag = make_etag(key[0], response.data)
+            self.list_cache.set(key, version, etag, response.data)
+        else:
+            etag, data = entry
+            response = Response(data)
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        return response
+
+
+class TextSearchViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Базовый класс представлений полнотекстового поиска для модераторов.
+
+    С параметром search список упорядочен по релевантности, без него -
+    от новых объектов к старым. Фильтры filterset_class сужают результаты.
+    """
+
+    filter_backends = (FullTextSearchFilter, DjangoFilterBackend)
+    permission_classes = (IsModeratorPermission,)
+    search_index = None
@@ -23,7 +23,36 @@ MAX_LENGTH_EMAIL_ADDRESS = 254
 # TITLE
 MIN_VALUE_SCORE = 1
 MAX_VALUE_SCORE = 10
+SCORE_PERCENTILES = (25, 50, 75, 90)
 
 # CATEGORY/GENRE
 MAX_LENGTH_NAME = 256
 MAX_LENGTH_SLUG = 50
+
+# SEARCH
+NGRAM_LENGTH = 3
+
+# RANKING
+RANKING_GLOBAL = 'global'
+RANKING_CATEGORY = 'category'
+RANKING_GENRE = 'genre'
+RANKING_SCOPE_CHOICES = [
+    (RANKING_GLOBAL, 'Все произведения'),
+    (RANKING_CATEGORY, 'Категория'),
+    (RANKING_GENRE, 'Жанр'),
+]
+MAX_LENGTH_RANKING_SCOPE = 16
+
+# MAIL
+MAIL_PENDING = 'pending'
+MAIL_SENDING = 'sending'
+MAIL_SENT = 'sent'
+MAIL_FAILED = 'failed'
+MAIL_STATUS_CHOICES = [
+    (MAIL_PENDING, 'Ожидает отправки'),
+    (MAIL_SENDING, 'Отправляется'),
+    (MAIL_SENT, 'Отправлено'),
+    (MAIL_FAILED, 'Не отправлено'),
+]
+MAX_LENGTH_MAIL_STATUS = 16
+MAX_LENGTH_MAIL_SUBJECT = 256
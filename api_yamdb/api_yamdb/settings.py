@@ -71,6 +71,12 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -99,9 +105,11 @@ USE_TZ = True
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication'
+        'api.authentication.StatelessJWTAuthentication'
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'DEFAULT_PAGINATION_CLASS': (
+        'api.pagination.LimitOffsetOrKeysetPagination'
+    ),
     'PAGE_SIZE': 5,
     'DEFAULT_THROTTLE_RATES': {
         'user': '5/day',
@@ -113,11 +121,30 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Аутентификация по роли из утверждений токена без загрузки пользователя
+# из БД и время кэширования пользователей для токенов без утверждений.
+JWT_STATELESS_AUTHENTICATION = False
+AUTH_USER_CACHE_TIMEOUT = 60
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
 SENDER_EMAIL = 'api_yamdb@yamail.com'
 
+# Очередь исходящей почты: размер пачки, задержка перед повторной
+# попыткой (удваивается с каждой попыткой до максимальной), число
+# попыток, интервал опроса очереди командой send-mail --loop и время,
+# после которого письмо, взятое на отправку прерванным обработчиком,
+# отправляется снова, в секундах. При MAIL_QUEUE_EAGER письма
+# отправляются сразу после фиксации транзакции без команды send-mail.
+MAIL_QUEUE_BATCH_SIZE = 100
+MAIL_QUEUE_RETRY_DELAY = 60
+MAIL_QUEUE_MAX_RETRY_DELAY = 3600
+MAIL_QUEUE_MAX_ATTEMPTS = 8
+MAIL_QUEUE_POLL_INTERVAL = 5
+MAIL_QUEUE_CLAIM_TIMEOUT = 600
+MAIL_QUEUE_EAGER = False
+
 STATIC_URL = '/static/'
 
 STATICFILES_DIRS = ((BASE_DIR / 'static/'),)
@@ -128,3 +155,12 @@ USER_PROFILE_URL = 'me'
 
 VALID_CHARS_FOR_CONFIRMATION_CODE = digits
 MAX_LENGTH_CONFIRMATION_CODE = 8
+
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 300
+
+# Взвешенный рейтинг: число оценок, при котором средняя оценка
+# произведения весит столько же, сколько средняя по всем произведениям,
+# и время кэширования средней по всем произведениям.
+RATING_MIN_VOTES = 10
+RATING_GLOBAL_MEAN_TIMEOUT = 300
@@ -5,7 +5,15 @@
 """
 from django.contrib import admin
 
-from .models import Category, Comment, Genre, Title, Review, User
+from .models import (
+    Category,
+    Comment,
+    Genre,
+    OutgoingEmail,
+    Title,
+    Review,
+    User
+)
 
 
 @admin.register(Category)
@@ -55,3 +63,13 @@ class UserAdmin(admin.ModelAdmin):
 
     list_display = ('username', 'role', 'email')
     search_fields = ('username', 'role')
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    """Административный класс для модели OutgoingEmail."""
+
+    list_display = ('recipient', 'subject', 'status', 'attempts',
+                    'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('recipient',)
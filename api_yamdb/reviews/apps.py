@@ -17,3 +17,7 @@ class ReviewsConfig(AppConfig):
 
     name = 'reviews'
     verbose_name = 'Отзывы'
+
+    def ready(self):
+        """Подключает обработчики сигналов моделей."""
+        from . import signals  # noqa: F401
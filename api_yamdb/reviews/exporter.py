@@ -0,0 +1,111 @@
+"""
+Модуль потоковой выгрузки каталога, отзывов и комментариев.
+
+Данные читаются из базы через iterator(chunk_size=...) (на PostgreSQL -
+серверным курсором) и сразу превращаются в строки CSV или NDJSON, поэтому
+потребление памяти не зависит от размера таблиц. Связи произведений с
+жанрами выгружаются отдельным набором данных, чтобы каждая строка
+выгрузки соответствовала одной строке таблицы.
+"""
+import csv
+from dataclasses import dataclass
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Category, Comment, Genre, Review, Title
+
+DEFAULT_CHUNK_SIZE = 2000
+FORMAT_CSV = 'csv'
+FORMAT_NDJSON = 'ndjson'
+CONTENT_TYPES = {
+    FORMAT_CSV: 'text/csv; charset=utf-8',
+    FORMAT_NDJSON: 'application/x-ndjson; charset=utf-8',
+}
+
+
+@dataclass
+class Dataset:
+    """Описание выгружаемого набора данных."""
+
+    queryset: object
+    fields: tuple
+    transform: object = None
+    extra_columns: tuple = ()
+
+    @property
+    def columns(self):
+        """Колонки выгрузки."""
+        return self.fields + self.extra_columns
+
+
+def with_rating(row):
+    """Добавляет к строке произведения средний рейтинг."""
+    row['rating'] = (
+        row['rating_sum'] / row['rating_count']
+        if row['rating_count'] else None
+    )
+    return row
+
+
+DATASETS = {
+    'categories': Dataset(Category.objects.all(), ('id', 'name', 'slug')),
+    'genres': Dataset(Genre.objects.all(), ('id', 'name', 'slug')),
+    'titles': Dataset(
+        Title.objects.all(),
+        ('id', 'name', 'year', 'description', 'category__slug',
+         'rating_sum', 'rating_count'),
+        with_rating,
+        ('rating',),
+    ),
+    'genre_titles': Dataset(
+        Title.genre.through.objects.all(), ('id', 'title_id', 'genre_id')
+    ),
+    'reviews': Dataset(
+        Review.objects.all(),
+        ('id', 'title_id', 'author__username', 'score', 'text', 'pub_date'),
+    ),
+    'comments': Dataset(
+        Comment.objects.all(),
+        ('id', 'review_id', 'author__username', 'text', 'pub_date'),
+    ),
+}
+
+
+class Echo:
+    """Псевдофайл, возвращающий записанную строку вместо ее хранения."""
+
+    def write(self, value):
+        """Возвращает записанное значение."""
+        return value
+
+
+def iter_dataset(dataset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Возвращает строки набора данных в виде словарей."""
+    dataset = DATASETS[dataset]
+    rows = dataset.queryset.order_by('pk').values(*dataset.fields).iterator(
+        chunk_size=chunk_size
+    )
+    for row in rows:
+        yield dataset.transform(row) if dataset.transform else row
+
+
+def export_dataset(dataset, file_format=FORMAT_CSV,
+                   chunk_size=DEFAULT_CHUNK_SIZE):
+    """Возвращает генератор строк выгрузки набора данных."""
+    if dataset not in DATASETS:
+        raise ValueError(f'Неизвестный набор данных: {dataset}')
+    if file_format not in CONTENT_TYPES:
+        raise ValueError(f'Неизвестный формат выгрузки: {file_format}')
+    rows = iter_dataset(dataset, chunk_size)
+    if file_format == FORMAT_NDJSON:
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        return (encoder.encode(row) + '\n' for row in rows)
+    return iter_csv(dataset, rows)
+
+
+def iter_csv(dataset, rows):
+    """Возвращает строки CSV, начиная с заголовка."""
+    writer = csv.DictWriter(Echo(), fieldnames=DATASETS[dataset].columns)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
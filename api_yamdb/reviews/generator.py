@@ -0,0 +1,275 @@
+"""
+Модуль генерации синтетических данных для нагрузочного тестирования.
+
+Генератор детерминирован: при одинаковых параметрах и зерне получается
+одинаковый набор данных. Объекты создаются пакетами через bulk_create из
+ленивых генераторов, поэтому потребление памяти не зависит от объема.
+Количество отзывов на произведение подчиняется закону Ципфа: немногие
+популярные произведения собирают большую часть отзывов.
+"""
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from math import gcd
+
+from django.contrib.auth.hashers import make_password
+from django.db import models, transaction
+
+from api_yamdb.constants import (
+    ADMIN,
+    MAX_VALUE_SCORE,
+    MIN_VALUE_SCORE,
+    MODERATOR,
+    USER,
+)
+from .models import Category, Comment, Genre, Review, Title, User
+from .rankings import rebuild_rankings
+from .ratings import (
+    rebuild_comments_counts,
+    rebuild_ratings,
+    rebuild_score_histograms
+)
+from .search import rebuild_search_indexes
+from .utils import batched, reset_sequences
+
+WORDS = (
+    'фильм книга музыка сюжет герой автор сцена финал начало смысл '
+    'атмосфера персонаж диалог режиссер актер роль история жанр стиль '
+    'глава страница мелодия ритм голос образ идея мир время жизнь '
+    'прекрасно скучно неожиданно сильно слабо глубоко ярко тонко честно '
+    'рекомендую пересматривал перечитывал советую понравилось удивило '
+    'разочаровало впечатлило запомнилось растрогало'
+).split()
+ROLES = (USER,) * 97 + (MODERATOR,) * 2 + (ADMIN,)
+START_DATE = datetime(2000, 1, 1, tzinfo=timezone.utc)
+DATE_RANGE_SECONDS = 25 * 365 * 24 * 60 * 60
+MAX_GENRES_PER_TITLE = 3
+
+
+@contextmanager
+def explicit_pub_date(*models_list):
+    """Позволяет задавать pub_date вручную, отключая auto_now_add."""
+    fields = [model._meta.get_field('pub_date') for model in models_list]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def next_id(model):
+    """Возвращает первый свободный первичный ключ модели."""
+    return (model.objects.aggregate(value=models.Max('pk'))['value'] or 0) + 1
+
+
+class DatasetGenerator:
+    """Генератор синтетического набора данных заданного размера."""
+
+    def __init__(self, users, categories, genres, titles, reviews,
+                 comments, seed=0, zipf_exponent=1.1, batch_size=5000):
+        """Сохраняет параметры генерации."""
+        if users < 1 or titles < 1 or categories < 1 or genres < 1:
+            raise ValueError(
+                'Нужны хотя бы один пользователь, категория, жанр '
+                'и произведение.'
+            )
+        self.users = users
+        self.categories = categories
+        self.genres = genres
+        self.titles = titles
+        self.reviews = reviews
+        self.comments = comments
+        self.seed = seed
+        self.zipf_exponent = zipf_exponent
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.password = make_password(None)
+        self.created = {}
+
+    def text(self, min_words, max_words):
+        """
+        Возвращает случайный текст.
+
+        Длина текста распределена логнормально: большинство текстов
+        короткие, но встречаются и очень длинные.
+        """
+        length = int(self.random.lognormvariate(3.5, 0.9))
+        length = max(min_words, min(max_words, length))
+        return ' '.join(self.random.choices(WORDS, k=length)).capitalize()
+
+    def pub_date(self):
+        """Возвращает случайную дату публикации."""
+        return START_DATE + timedelta(
+            seconds=self.random.randrange(DATE_RANGE_SECONDS)
+        )
+
+    def save(self, model, objects):
+        """Сохраняет объекты пакетами и возвращает их количество."""
+        count = 0
+        for batch in batched(objects, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+            count += len(batch)
+        self.created[model._meta.label] = count
+        return count
+
+    def generate_users(self):
+        """Генерирует пользователей."""
+        for i in range(self.first_user_id, self.first_user_id + self.users):
+            yield User(
+                id=i,
+                username=f'user{i}',
+                email=f'user{i}@yamdb.fake',
+                role=self.random.choice(ROLES),
+                bio=self.text(0, 30),
+                password=self.password,
+            )
+
+    def generate_slug_models(self, model, first_id, count, prefix):
+        """Генерирует категории или жанры."""
+        for i in range(first_id, first_id + count):
+            yield model(
+                id=i, name=f'{prefix} {i}', slug=f'{prefix.lower()}-{i}'
+            )
+
+    def generate_titles(self):
+        """Генерирует произведения."""
+        for i in range(self.first_title_id,
+                       self.first_title_id + self.titles):
+            yield Title(
+                id=i,
+                name=self.text(1, 6),
+                year=self.random.randint(1900, 2024),
+                category_id=self.first_category_id + self.random.randrange(
+                    self.categories
+                ),
+                description=self.text(0, 80),
+            )
+
+    def generate_title_genres(self):
+        """Генерирует связи произведений с жанрами."""
+        for title_id in range(self.first_title_id,
+                              self.first_title_id + self.titles):
+            genres_count = self.random.randint(
+                1, min(MAX_GENRES_PER_TITLE, self.genres)
+            )
+            for genre_offset in self.random.sample(
+                range(self.genres), genres_count
+            ):
+                yield Title.genre.through(
+                    title_id=title_id,
+                    genre_id=self.first_genre_id + genre_offset
+                )
+
+    def reviews_per_title(self):
+        """
+        Возвращает количество отзывов для каждого произведения по порядку.
+
+        Ожидаемое число отзывов произведения ранга k пропорционально
+        1 / k ** s и ограничено числом пользователей, так как один
+        пользователь оставляет не больше одного отзыва на произведение.
+        """
+        weights_sum = sum(
+            rank ** -self.zipf_exponent for rank in range(1, self.titles + 1)
+        )
+        for rank in range(1, self.titles + 1):
+            expected = self.reviews * rank ** -self.zipf_exponent / weights_sum
+            count = int(expected)
+            if self.random.random() < expected - count:
+                count += 1
+            yield min(count, self.users)
+
+    def coprime_stride(self):
+        """Возвращает шаг обхода пользователей без повторений."""
+        stride = self.random.randrange(1, max(2, self.users))
+        while gcd(stride, self.users) != 1:
+            stride += 1
+        return stride
+
+    def generate_reviews(self):
+        """
+        Генерирует отзывы.
+
+        Авторы отзывов на одно произведение выбираются обходом списка
+        пользователей с шагом, взаимно простым с их количеством, что
+        гарантирует уникальность пары автор-произведение без хранения
+        множества уже использованных авторов.
+        """
+        review_id = self.first_review_id
+        for title_offset, count in enumerate(self.reviews_per_title()):
+            start = self.random.randrange(self.users)
+            stride = self.coprime_stride()
+            for j in range(count):
+                yield Review(
+                    id=review_id,
+                    title_id=self.first_title_id + title_offset,
+                    author_id=(
+                        self.first_user_id + (start + j * stride) % self.users
+                    ),
+                    score=self.random.randint(MIN_VALUE_SCORE,
+                                              MAX_VALUE_SCORE),
+                    text=self.text(5, 1000),
+                    pub_date=self.pub_date(),
+                )
+                review_id += 1
+
+    def generate_comments(self, reviews_count):
+        """Генерирует комментарии, распределяя их по отзывам."""
+        if not reviews_count:
+            return
+        per_review = self.comments / reviews_count
+        for review_id in range(self.first_review_id,
+                               self.first_review_id + reviews_count):
+            count = int(per_review)
+            if self.random.random() < per_review - count:
+                count += 1
+            for _ in range(count):
+                yield Comment(
+                    review_id=review_id,
+                    author_id=(
+                        self.first_user_id
+                        + self.random.randrange(self.users)
+                    ),
+                    text=self.text(1, 200),
+                    pub_date=self.pub_date(),
+                )
+
+    def generate(self, log=None):
+        """Генерирует весь набор данных и возвращает число объектов."""
+        log = log or (lambda message: None)
+        self.first_user_id = next_id(User)
+        self.first_category_id = next_id(Category)
+        self.first_genre_id = next_id(Genre)
+        self.first_title_id = next_id(Title)
+        self.first_review_id = next_id(Review)
+
+        log('Пользователи...')
+        self.save(User, self.generate_users())
+        log('Категории и жанры...')
+        self.save(Category, self.generate_slug_models(
+            Category, self.first_category_id, self.categories, 'Category'
+        ))
+        self.save(Genre, self.generate_slug_models(
+            Genre, self.first_genre_id, self.genres, 'Genre'
+        ))
+        log('Произведения...')
+        self.save(Title, self.generate_titles())
+        self.save(Title.genre.through, self.generate_title_genres())
+        with explicit_pub_date(Review, Comment):
+            log('Отзывы...')
+            reviews_count = self.save(Review, self.generate_reviews())
+            log('Комментарии...')
+            self.save(Comment, self.generate_comments(reviews_count))
+        log('Пересчет рейтинга...')
+        rebuild_ratings(Title.objects.filter(pk__gte=self.first_title_id))
+        rebuild_score_histograms()
+        rebuild_rankings()
+        rebuild_comments_counts(
+            Review.objects.filter(pk__gte=self.first_review_id)
+        )
+        log('Перестроение поискового индекса...')
+        rebuild_search_indexes()
+        reset_sequences(User, Category, Genre, Title, Review)
+        return self.created
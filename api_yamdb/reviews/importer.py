@@ -0,0 +1,572 @@
+"""
+Модуль массового импорта данных из CSV файлов.
+
+Импорт выполняется через соединение Django, поэтому работает с любой
+настроенной в DATABASES базой данных. Строки вставляются пакетами через
+executemany, а вторичные индексы таблицы на время загрузки удаляются и
+затем создаются заново, если это поддерживает база данных.
+
+Порядок загрузки файлов определяется внешними ключами моделей. Если база
+данных допускает одновременную запись, независимые файлы и части больших
+файлов загружаются параллельно, каждая часть в своей транзакции. Иначе
+каждый файл загружается целиком в одной транзакции.
+
+В режиме возобновления файлы читаются потоком и фиксируются пакетами
+вместе с контрольной точкой (ImportCheckpoint), поэтому прерванный импорт
+продолжается с последнего зафиксированного пакета. Строки с уже
+существующими первичными ключами можно пропускать или обновлять.
+"""
+import csv
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connection, connections, transaction
+
+from .models import (
+    Category,
+    Comment,
+    Genre,
+    ImportCheckpoint,
+    Review,
+    Title,
+    User,
+)
+from .utils import batched, reset_sequences
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_CHUNK_ROWS = 100000
+# Базы данных, в которые одновременно может писать только одно соединение.
+SINGLE_WRITER_VENDORS = ('sqlite',)
+DEPENDENCY_ERROR = 'не загружены таблицы, на которые ссылается файл'
+ON_CONFLICT_ERROR = 'error'
+ON_CONFLICT_SKIP = 'skip'
+ON_CONFLICT_UPDATE = 'update'
+ON_CONFLICT_CHOICES = (ON_CONFLICT_ERROR, ON_CONFLICT_SKIP, ON_CONFLICT_UPDATE)
+# Базы данных, поддерживающие INSERT ... ON CONFLICT (...) DO UPDATE.
+UPSERT_VENDORS = ('sqlite', 'postgresql')
+CSV_FILES = (
+    ('users.csv', User),
+    ('category.csv', Category),
+    ('genre.csv', Genre),
+    ('titles.csv', Title),
+    ('genre_title.csv', Title.genre.through),
+    ('review.csv', Review),
+    ('comments.csv', Comment),
+)
+INDEX_DEFINITIONS_SQL = {
+    'sqlite': (
+        "SELECT name, sql FROM sqlite_master "
+        "WHERE type = 'index' AND tbl_name = %s AND sql IS NOT NULL"
+    ),
+    'postgresql': (
+        'SELECT indexname, indexdef FROM pg_indexes '
+        'WHERE schemaname = current_schema() AND tablename = %s'
+    ),
+}
+
+
+def iter_records(file, offset=0, end=None):
+    """
+    Читает записи CSV из файла, открытого в двоичном режиме.
+
+    Возвращает пары (запись, смещение конца записи в байтах). Модуль csv
+    запрашивает строки по одной и не читает дальше конца записи, поэтому
+    смещение после каждой записи точно указывает на начало следующей.
+    """
+    def lines():
+        nonlocal offset
+        for line in file:
+            offset += len(line)
+            yield line.decode('utf-8')
+            if end is not None and offset >= end:
+                return
+
+    for record in csv.reader(lines()):
+        yield record, offset
+        if end is not None and offset >= end:
+            return
+
+
+def get_dependencies(models_list):
+    """
+    Строит граф зависимостей таблиц по внешним ключам.
+
+    Возвращает словарь: модель -> множество моделей из того же списка,
+    на которые она ссылается.
+    """
+    models_list = set(models_list)
+    return {
+        model: {
+            field.related_model for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model in models_list
+            and field.related_model is not model
+        }
+        for model in models_list
+    }
+
+
+def get_import_order(models_list):
+    """Возвращает модели в порядке, при котором зависимости идут первыми."""
+    models_list = list(models_list)
+    dependencies = get_dependencies(models_list)
+    order = []
+    while len(order) < len(models_list):
+        ready = [
+            model for model in models_list
+            if model not in order and dependencies[model] <= set(order)
+        ]
+        if not ready:
+            raise ValueError('Циклическая зависимость между таблицами.')
+        order.extend(ready)
+    return order
+
+
+@dataclass
+class ImportResult:
+    """Результат импорта одного файла."""
+
+    file: str
+    rows: int
+    seconds: float
+    error: str = None
+    chunks: int = 1
+    skipped: bool = False
+
+    @property
+    def rows_per_second(self):
+        """Скорость импорта в строках в секунду."""
+        return self.rows / self.seconds if self.seconds else float(self.rows)
+
+
+class CsvImporter:
+    """Импортер CSV файлов в таблицы моделей."""
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, rebuild_indexes=True,
+                 workers=1, chunk_rows=DEFAULT_CHUNK_ROWS,
+                 on_conflict=ON_CONFLICT_ERROR, resume=False):
+        """
+        Сохраняет параметры импорта.
+
+        on_conflict определяет поведение при совпадении первичного ключа:
+        ошибка, пропуск строки или обновление существующей записи.
+        При resume файлы загружаются последовательно, каждый пакет строк
+        фиксируется вместе с контрольной точкой, а повторный запуск
+        продолжает загрузку с места остановки.
+        """
+        if on_conflict not in ON_CONFLICT_CHOICES:
+            raise ValueError(f'Неизвестный режим конфликтов: {on_conflict}')
+        self.batch_size = batch_size
+        self.rebuild_indexes = rebuild_indexes
+        self.workers = workers
+        self.chunk_rows = chunk_rows
+        self.on_conflict = on_conflict
+        self.resume = resume
+
+    def get_columns(self, model, header):
+        """
+        Сопоставляет колонки CSV файла с полями модели.
+
+        Возвращает список пар (поле, индекс колонки в файле или None).
+        Поля, отсутствующие в файле, заполняются значением по умолчанию.
+        """
+        fields = {
+            field.column: field for field in model._meta.concrete_fields
+        }
+        unknown = set(header) - set(fields)
+        if unknown:
+            raise ValueError(
+                f'Неизвестные колонки для таблицы {model._meta.db_table}: '
+                f'{", ".join(sorted(unknown))}'
+            )
+        columns = [(fields[name], header.index(name)) for name in header]
+        columns.extend(
+            (field, None) for name, field in fields.items()
+            if name not in header and field.has_default()
+        )
+        return columns
+
+    def convert(self, field, value):
+        """Приводит строковое значение из CSV к значению для базы данных."""
+        if value is None:
+            value = field.get_default()
+        elif value == '' and field.null:
+            value = None
+        else:
+            try:
+                value = field.to_python(value)
+            except ValidationError:
+                if not field.has_default():
+                    raise
+                value = field.get_default()
+        return field.get_db_prep_save(value, connection)
+
+    def convert_rows(self, rows, columns):
+        """Преобразует строки CSV файла в параметры запроса."""
+        for row in rows:
+            yield [
+                self.convert(
+                    field, None if position is None else row[position]
+                )
+                for field, position in columns
+            ]
+
+    def get_insert_sql(self, model, columns):
+        """Возвращает SQL запрос вставки одной строки."""
+        quote = connection.ops.quote_name
+        names = ', '.join(quote(field.column) for field, _ in columns)
+        placeholders = ', '.join(['%s'] * len(columns))
+        ignore = self.on_conflict == ON_CONFLICT_SKIP
+        sql = (
+            f'{connection.ops.insert_statement(ignore_conflicts=ignore)} '
+            f'{quote(model._meta.db_table)} ({names}) VALUES ({placeholders})'
+        )
+        if ignore:
+            suffix = connection.ops.ignore_conflicts_suffix_sql(
+                ignore_conflicts=True
+            )
+            return f'{sql} {suffix}' if suffix else sql
+        if self.on_conflict == ON_CONFLICT_UPDATE:
+            return f'{sql} {self.get_upsert_suffix(model, columns)}'
+        return sql
+
+    def get_upsert_suffix(self, model, columns):
+        """
+        Возвращает часть запроса, обновляющую существующие строки.
+
+        Обновляются только колонки из заголовка файла: поля, заполненные
+        значениями по умолчанию (например, денормализованные счетчики),
+        сохраняют значения существующих строк.
+        """
+        if connection.vendor not in UPSERT_VENDORS:
+            raise ValueError(
+                'Режим обновления не поддерживается базой данных '
+                f'{connection.vendor}.'
+            )
+        quote = connection.ops.quote_name
+        pk_column = model._meta.pk.column
+        if pk_column not in (field.column for field, _ in columns):
+            raise ValueError(
+                f'Для обновления в файле нужна колонка {pk_column}.'
+            )
+        updates = ', '.join(
+            f'{quote(field.column)} = EXCLUDED.{quote(field.column)}'
+            for field, position in columns
+            if position is not None and field.column != pk_column
+        )
+        if not updates:
+            return f'ON CONFLICT ({quote(pk_column)}) DO NOTHING'
+        return f'ON CONFLICT ({quote(pk_column)}) DO UPDATE SET {updates}'
+
+    def drop_indexes(self, cursor, table):
+        """
+        Удаляет вторичные индексы таблицы.
+
+        Возвращает SQL для их восстановления. Индексы первичных ключей и
+        ограничений уникальности сохраняются, так как они проверяют данные.
+        """
+        sql = INDEX_DEFINITIONS_SQL.get(connection.vendor)
+        if not self.rebuild_indexes or sql is None:
+            return []
+        constraints = connection.introspection.get_constraints(cursor, table)
+        cursor.execute(sql, [table])
+        definitions = []
+        for name, definition in cursor.fetchall():
+            constraint = constraints.get(name)
+            if (constraint is None or constraint['unique']
+                    or constraint['primary_key']):
+                continue
+            cursor.execute(
+                f'DROP INDEX {connection.ops.quote_name(name)}'
+            )
+            definitions.append(definition)
+        return definitions
+
+    def read_header(self, csv_file):
+        """Возвращает заголовок CSV файла и смещение первой строки данных."""
+        with open(csv_file, 'rb') as file:
+            for header, offset in iter_records(file):
+                return header, offset
+        raise ValueError(f'Файл {csv_file} пуст.')
+
+    def split_file(self, csv_file, start):
+        """
+        Делит файл на части по chunk_rows строк.
+
+        Возвращает список пар смещений (начало, конец) в байтах. Границы
+        частей всегда совпадают с границами записей CSV, в том числе
+        многострочных.
+        """
+        chunks = []
+        with open(csv_file, 'rb') as file:
+            file.seek(start)
+            chunk_start = start
+            for number, (_, offset) in enumerate(iter_records(file, start), 1):
+                if number % self.chunk_rows == 0:
+                    chunks.append((chunk_start, offset))
+                    chunk_start = offset
+            if file.tell() > chunk_start:
+                chunks.append((chunk_start, file.tell()))
+        return chunks
+
+    def read_batches(self, csv_file, columns, start, end=None):
+        """
+        Читает строки файла из диапазона байтов [start, end) пакетами.
+
+        Возвращает пары (параметры запроса, смещение конца пакета).
+        """
+        with open(csv_file, 'rb') as file:
+            file.seek(start)
+            for batch in batched(
+                iter_records(file, start, end), self.batch_size
+            ):
+                rows = (row for row, _ in batch)
+                yield list(self.convert_rows(rows, columns)), batch[-1][1]
+
+    def load_rows(self, csv_file, model, start, end=None):
+        """
+        Вставляет строки файла из диапазона байтов [start, end).
+
+        Управление транзакциями остается за вызывающим кодом.
+        """
+        header, _ = self.read_header(csv_file)
+        columns = self.get_columns(model, header)
+        sql = self.get_insert_sql(model, columns)
+        rows_count = 0
+        with connection.cursor() as cursor:
+            for params, _ in self.read_batches(csv_file, columns, start, end):
+                cursor.executemany(sql, params)
+                rows_count += len(params)
+        return rows_count
+
+    def import_file(self, csv_file, model):
+        """Импортирует один CSV файл в таблицу модели в одной транзакции."""
+        started = time.monotonic()
+        _, start = self.read_header(csv_file)
+        with transaction.atomic(), connection.cursor() as cursor:
+            index_definitions = self.drop_indexes(
+                cursor, model._meta.db_table
+            )
+            rows_count = self.load_rows(csv_file, model, start)
+            for definition in index_definitions:
+                cursor.execute(definition)
+        reset_sequences(model)
+        return ImportResult(
+            csv_file, rows_count, time.monotonic() - started
+        )
+
+    def resume_file(self, csv_file, model):
+        """
+        Импортирует файл пакетами с сохранением контрольной точки.
+
+        Каждый пакет фиксируется в отдельной транзакции вместе со смещением
+        конца пакета и id последней строки. Удаленные индексы запоминаются
+        в контрольной точке и восстанавливаются даже после сбоя, при
+        следующем запуске.
+        """
+        started = time.monotonic()
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+            file=os.path.abspath(csv_file)
+        )
+        if checkpoint.finished:
+            return ImportResult(csv_file, 0, 0.0, skipped=True)
+        header, start = self.read_header(csv_file)
+        columns = self.get_columns(model, header)
+        sql = self.get_insert_sql(model, columns)
+        pk_positions = [
+            number for number, (field, _) in enumerate(columns)
+            if field.primary_key
+        ]
+        rows_count = 0
+        with connection.cursor() as cursor:
+            with transaction.atomic():
+                checkpoint.indexes += self.drop_indexes(
+                    cursor, model._meta.db_table
+                )
+                checkpoint.save(update_fields=('indexes', 'updated'))
+            for params, offset in self.read_batches(
+                csv_file, columns, max(start, checkpoint.offset)
+            ):
+                with transaction.atomic():
+                    cursor.executemany(sql, params)
+                    checkpoint.offset = offset
+                    checkpoint.rows += len(params)
+                    if pk_positions:
+                        checkpoint.last_id = str(params[-1][pk_positions[0]])
+                    checkpoint.save(update_fields=(
+                        'offset', 'rows', 'last_id', 'updated'
+                    ))
+                rows_count += len(params)
+            with transaction.atomic():
+                for definition in checkpoint.indexes:
+                    cursor.execute(definition)
+                checkpoint.indexes = []
+                checkpoint.finished = True
+                checkpoint.save(update_fields=(
+                    'indexes', 'finished', 'updated'
+                ))
+        reset_sequences(model)
+        return ImportResult(
+            csv_file, rows_count, time.monotonic() - started
+        )
+
+    def reset_checkpoints(self, files):
+        """
+        Удаляет контрольные точки файлов, чтобы загрузить их заново.
+
+        Индексы, удаленные прерванной загрузкой, предварительно
+        восстанавливаются.
+        """
+        checkpoints = ImportCheckpoint.objects.filter(
+            file__in=[os.path.abspath(csv_file) for csv_file, _ in files]
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            for checkpoint in checkpoints:
+                for definition in checkpoint.indexes:
+                    cursor.execute(definition)
+            checkpoints.delete()
+
+    @property
+    def concurrent(self):
+        """Можно ли выполнять запись в базу данных из нескольких потоков."""
+        return (
+            self.workers > 1
+            and not self.resume
+            and connection.vendor not in SINGLE_WRITER_VENDORS
+        )
+
+    def import_chunk(self, csv_file, model, start, end):
+        """Импортирует часть файла в отдельной транзакции рабочего потока."""
+        try:
+            with transaction.atomic():
+                return self.load_rows(csv_file, model, start, end)
+        finally:
+            connections.close_all()
+
+    def import_files(self, files, log=None):
+        """
+        Импортирует файлы с учетом зависимостей между таблицами.
+
+        Файл начинает загружаться, как только загружены все файлы таблиц,
+        на которые ссылаются его внешние ключи. Независимые файлы и части
+        больших файлов загружаются параллельно в пуле из workers потоков,
+        если база данных допускает одновременную запись. Возвращает
+        результаты в порядке завершения загрузки.
+        """
+        log = log or (lambda message: None)
+        if not self.concurrent:
+            return self.import_sequentially(files, log)
+        # Проверяет граф на циклы, иначе цикл ожидания ниже не завершится.
+        get_import_order(model for _, model in files)
+        dependencies = get_dependencies(model for _, model in files)
+        waiting = dict(files)
+        unfinished = set(waiting.values())
+        failed = set()
+        results = []
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while waiting or running:
+                for csv_file, model in list(waiting.items()):
+                    if dependencies[model] & failed:
+                        del waiting[csv_file]
+                        failed.add(model)
+                        unfinished.discard(model)
+                        results.append(ImportResult(
+                            csv_file, 0, 0.0, DEPENDENCY_ERROR
+                        ))
+                    elif not dependencies[model] & unfinished:
+                        del waiting[csv_file]
+                        log(f'start download {os.path.basename(csv_file)}')
+                        running[csv_file] = self.start_file(
+                            executor, csv_file, model
+                        )
+                for state, result in self.wait_files(running):
+                    if result.error:
+                        failed.add(state['model'])
+                    unfinished.discard(state['model'])
+                    results.append(result)
+        return results
+
+    def wait_files(self, running):
+        """
+        Дожидается завершения хотя бы одной части загружаемых файлов.
+
+        Возвращает пары (состояние, результат) для полностью загруженных
+        файлов и убирает их из running.
+        """
+        if not running:
+            return []
+        wait(
+            [future for state in running.values()
+             for future in state['futures']],
+            return_when=FIRST_COMPLETED
+        )
+        finished = []
+        for csv_file, state in list(running.items()):
+            if all(future.done() for future in state['futures']):
+                del running[csv_file]
+                finished.append((state, self.finish_file(csv_file, state)))
+        return finished
+
+    def start_file(self, executor, csv_file, model):
+        """Удаляет индексы таблицы и отправляет части файла в пул."""
+        _, start = self.read_header(csv_file)
+        with connection.cursor() as cursor:
+            index_definitions = self.drop_indexes(
+                cursor, model._meta.db_table
+            )
+        return {
+            'model': model,
+            'started': time.monotonic(),
+            'indexes': index_definitions,
+            'futures': [
+                executor.submit(
+                    self.import_chunk, csv_file, model, chunk_start, end
+                )
+                for chunk_start, end in self.split_file(csv_file, start)
+            ],
+        }
+
+    def finish_file(self, csv_file, state):
+        """Восстанавливает индексы таблицы после загрузки всех частей."""
+        with connection.cursor() as cursor:
+            for definition in state['indexes']:
+                cursor.execute(definition)
+        reset_sequences(state['model'])
+        errors = [
+            str(future.exception()) for future in state['futures']
+            if future.exception()
+        ]
+        return ImportResult(
+            csv_file,
+            sum(future.result() for future in state['futures']
+                if not future.exception()),
+            time.monotonic() - state['started'],
+            '; '.join(errors) or None,
+            len(state['futures']),
+        )
+
+    def import_sequentially(self, files, log):
+        """Импортирует файлы по одному в порядке зависимостей."""
+        order = get_import_order(model for _, model in files)
+        files = sorted(files, key=lambda item: order.index(item[1]))
+        failed = set()
+        dependencies = get_dependencies(model for _, model in files)
+        results = []
+        for csv_file, model in files:
+            if dependencies[model] & failed:
+                failed.add(model)
+                results.append(ImportResult(
+                    csv_file, 0, 0.0, DEPENDENCY_ERROR
+                ))
+                continue
+            log(f'start download {os.path.basename(csv_file)}')
+            load = self.resume_file if self.resume else self.import_file
+            try:
+                results.append(load(csv_file, model))
+            except (DatabaseError, ValueError) as error:
+                failed.add(model)
+                results.append(ImportResult(csv_file, 0, 0.0, str(error)))
+        return results
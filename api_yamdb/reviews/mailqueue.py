@@ -0,0 +1,196 @@
+"""
+Модуль очереди исходящей почты.
+
+Письма сохраняются в таблицу OutgoingEmail в транзакции запроса, поэтому
+время ответа не зависит от почтового сервера. Команда send-mail
+отправляет письма пачками через одно соединение с почтовым сервером.
+Перед отправкой письма помечаются отправляемыми в отдельной короткой
+транзакции, поэтому блокировки не удерживаются, пока идет обмен с
+почтовым сервером. Письмо, которое не удалось отправить, откладывается с
+экспоненциально растущей задержкой и после MAIL_QUEUE_MAX_ATTEMPTS
+попыток помечается неотправленным. При MAIL_QUEUE_EAGER письма
+отправляются сразу после фиксации транзакции, в которой поставлены в
+очередь.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from api_yamdb.constants import (
+    MAIL_FAILED,
+    MAIL_PENDING,
+    MAIL_SENDING,
+    MAIL_SENT
+)
+from .models import OutgoingEmail
+
+RETRIED = 'retried'
+
+
+def enqueue_email(subject, body, recipients, from_email=None):
+    """Ставит письмо в очередь, по одной записи на каждого получателя."""
+    emails = [
+        OutgoingEmail.objects.create(
+            subject=subject,
+            body=body,
+            from_email=from_email or settings.SENDER_EMAIL,
+            recipient=recipient
+        )
+        for recipient in recipients
+    ]
+    if settings.MAIL_QUEUE_EAGER:
+        pks = [email.pk for email in emails]
+        transaction.on_commit(lambda: deliver_emails(
+            claim_emails(OutgoingEmail.objects.filter(pk__in=pks))
+        ))
+    return emails
+
+
+def get_retry_delay(attempts):
+    """Возвращает задержку перед следующей попыткой отправки."""
+    delay = settings.MAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(
+        seconds=min(delay, settings.MAIL_QUEUE_MAX_RETRY_DELAY)
+    )
+
+
+def record_failure(email, error, now):
+    """Откладывает письмо или помечает его неотправленным."""
+    email.last_error = f'{type(error).__name__}: {error}'
+    if email.attempts >= settings.MAIL_QUEUE_MAX_ATTEMPTS:
+        email.status = MAIL_FAILED
+        return MAIL_FAILED
+    email.status = MAIL_PENDING
+    email.next_attempt_at = now + get_retry_delay(email.attempts)
+    return RETRIED
+
+
+def send_messages(emails, now, stats, processed):
+    """
+    Отправляет письма через одно соединение с почтовым сервером.
+
+    Результат отправки записывается в письмо, и письмо добавляется в
+    processed. Ошибка открытия соединения откладывает все письма, а
+    ошибка отправки одного письма - только его.
+    """
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            email.attempts += 1
+            stats[record_failure(email, error, now)] += 1
+            processed.append(email)
+        return
+    try:
+        for email in emails:
+            email.attempts += 1
+            try:
+                connection.send_messages([EmailMessage(
+                    email.subject, email.body, email.from_email,
+                    [email.recipient]
+                )])
+            except Exception as error:
+                stats[record_failure(email, error, now)] += 1
+            else:
+                email.status = MAIL_SENT
+                email.sent_at = now
+                stats[MAIL_SENT] += 1
+            processed.append(email)
+    finally:
+        connection.close()
+
+
+def deliver_emails(emails):
+    """
+    Отправляет письма и сохраняет результат отправки.
+
+    Ошибка отправки одного письма не прерывает отправку остальных.
+    Результат уже обработанных писем сохраняется, даже если отправка
+    прервана, а необработанные письма остаются отправляемыми до
+    истечения MAIL_QUEUE_CLAIM_TIMEOUT. Возвращает количество
+    отправленных, отложенных и неотправленных писем.
+    """
+    emails = list(emails)
+    stats = Counter()
+    if not emails:
+        return stats
+    processed = []
+    try:
+        send_messages(emails, timezone.now(), stats, processed)
+    finally:
+        OutgoingEmail.objects.bulk_update(processed, (
+            'status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'
+        ))
+    return stats
+
+
+def claim_emails(queryset, limit=None):
+    """
+    Помечает письма, срок отправки которых наступил, отправляемыми.
+
+    Письма выбираются с блокировкой, пропуская заблокированные другим
+    обработчиком, и помечаются в транзакции, которая фиксируется до
+    начала отправки. Срок отправки помеченных писем переносится на
+    MAIL_QUEUE_CLAIM_TIMEOUT: до него письма не выбираются другими
+    обработчиками, а после снова считаются ожидающими отправки, если
+    обработчик прервался, не записав результат.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(queryset.select_for_update(skip_locked=True).filter(
+            status__in=(MAIL_PENDING, MAIL_SENDING), next_attempt_at__lte=now
+        ).order_by('next_attempt_at', 'pk')[:limit])
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(
+            status=MAIL_SENDING,
+            next_attempt_at=now + timedelta(
+                seconds=settings.MAIL_QUEUE_CLAIM_TIMEOUT
+            )
+        )
+    return emails
+
+
+def send_batch(batch_size=None):
+    """
+    Отправляет пачку писем, срок отправки которых наступил.
+
+    Письма сначала помечаются отправляемыми, а отправляются и получают
+    результат отправки уже вне транзакции, поэтому несколько
+    обработчиков не отправляют одно письмо дважды и не ждут друг друга.
+    """
+    return deliver_emails(claim_emails(
+        OutgoingEmail.objects.all(),
+        batch_size or settings.MAIL_QUEUE_BATCH_SIZE
+    ))
+
+
+def get_queue_stats():
+    """
+    Возвращает метрики очереди исходящей почты.
+
+    Метрики - количество писем по статусам и возраст самого старого
+    еще не отправленного письма в секундах.
+    """
+    counts = dict(
+        OutgoingEmail.objects.values_list('status').annotate(Count('pk'))
+        .order_by()
+    )
+    oldest = OutgoingEmail.objects.filter(
+        status__in=(MAIL_PENDING, MAIL_SENDING)
+    ).aggregate(oldest=Min('created_at'))['oldest']
+    stats = {
+        status: counts.get(status, 0)
+        for status in (MAIL_PENDING, MAIL_SENDING, MAIL_SENT, MAIL_FAILED)
+    }
+    stats['oldest_pending_seconds'] = (
+        None if oldest is None
+        else round((timezone.now() - oldest).total_seconds(), 1)
+    )
+    return stats
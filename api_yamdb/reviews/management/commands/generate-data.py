@@ -0,0 +1,63 @@
+"""
+Модуль management команды для генерации синтетических данных.
+
+Создает детерминированный набор данных произвольного объема для
+воспроизведения нагрузки на API.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.generator import DatasetGenerator
+
+
+class Command(BaseCommand):
+    """Команда для генерации синтетического набора данных."""
+
+    help = 'Генерирует пользователей, произведения, отзывы и комментарии.'
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы командной строки."""
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument('--reviews', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора случайных чисел.'
+        )
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Показатель распределения Ципфа для отзывов.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Количество объектов в одном INSERT.'
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Генерирует данные и выводит статистику."""
+        try:
+            generator = DatasetGenerator(
+                users=options['users'],
+                categories=options['categories'],
+                genres=options['genres'],
+                titles=options['titles'],
+                reviews=options['reviews'],
+                comments=options['comments'],
+                seed=options['seed'],
+                zipf_exponent=options['zipf'],
+                batch_size=options['batch_size'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        started = time.monotonic()
+        created = generator.generate(log=self.stdout.write)
+        elapsed = time.monotonic() - started
+        for label, count in created.items():
+            self.stdout.write(f'{label}: {count}')
+        self.stdout.write(
+            self.style.SUCCESS(f'Готово за {elapsed:.1f} с.')
+        )
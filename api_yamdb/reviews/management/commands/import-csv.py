@@ -1,56 +1,114 @@
 """
 Модуль management команды для импорта данных.
 
-Импортирует из CSV файлов в базу данных SQLite.
+Импортирует данные из CSV файлов в базу данных, настроенную в DATABASES.
 """
-import csv
-import sqlite3
-from django.core.management.base import BaseCommand
-from django.conf import settings
+import os
 
+from django.conf import settings
+from django.core.management.base import BaseCommand
 
-path = str(settings.BASE_DIR) + '/data/'
-files = ('category.csv', 'genre.csv', 'titles.csv',
-         'genre_title.csv', 'review.csv', 'comments.csv', 'users.csv')
-tables = ('reviews_category', 'reviews_genre', 'reviews_title',
-          'reviews_title_genre', 'reviews_review', 'reviews_comment',
-          'reviews_user')
-
-
-def import_csv_to_sqlite(csv_file, table_name):
-    """Импортирует данные из CSV файла в базу данных SQLite."""
-    conn = sqlite3.connect(str(settings.BASE_DIR) + '/db.sqlite3')
-    cursor = conn.cursor()
-    cursor.execute(
-        f"SELECT name FROM sqlite_master WHERE type='table'"
-        f"AND name='{table_name}';"
-    )
-    if not cursor.fetchone():
-        print(f'Table {table_name} does not exist. Skipping {csv_file}.')
-        conn.close()
-        return
-    with open(csv_file, 'r', encoding='utf-8') as file:
-        csv_reader = csv.reader(file)
-        header = next(csv_reader)
-        columns = ', '.join(header)
-        for row in csv_reader:
-            size = ', '.join(['?'] * len(row))
-            cursor.execute(
-                f"INSERT INTO {table_name} ({columns}) VALUES ({size})", row
-            )
-    conn.commit()
-    conn.close()
+from reviews.importer import (
+    CSV_FILES,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CHUNK_ROWS,
+    ON_CONFLICT_CHOICES,
+    ON_CONFLICT_ERROR,
+    CsvImporter,
+)
+from reviews.rankings import rebuild_rankings
+from reviews.ratings import (
+    rebuild_comments_counts,
+    rebuild_ratings,
+    rebuild_score_histograms
+)
+from reviews.search import rebuild_search_indexes
 
 
 class Command(BaseCommand):
-    """Команда для импорта данных из CSV файлов в базу данных SQLite."""
-
-    def handle(self, *args, **kwargs) -> None:
-        """Обрабатывает импорт данных из CSV-файлов в базу данных SQLite."""
-        for file, table in zip(files, tables):
-            try:
-                print('start download', file)
-                import_csv_to_sqlite(path + file, table)
-                print('finish download', file)
-            except Exception as e:
-                print(e)
+    """Команда для импорта данных из CSV файлов в базу данных."""
+
+    help = 'Импортирует данные из CSV файлов в базу данных.'
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы командной строки."""
+        parser.add_argument(
+            '--path', default=os.path.join(settings.BASE_DIR, 'data'),
+            help='Каталог с CSV файлами.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Количество строк в одном пакете вставки.'
+        )
+        parser.add_argument(
+            '--keep-indexes', action='store_true',
+            help='Не удалять вторичные индексы на время загрузки.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Количество потоков для параллельной загрузки.'
+        )
+        parser.add_argument(
+            '--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS,
+            help='Количество строк в части файла при параллельной загрузке.'
+        )
+        parser.add_argument(
+            '--on-conflict', choices=ON_CONFLICT_CHOICES,
+            default=ON_CONFLICT_ERROR,
+            help='Что делать со строками, id которых уже есть в базе: '
+                 'error - ошибка, skip - пропустить, update - обновить.'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Фиксировать пакеты с контрольными точками и продолжать '
+                 'прерванный импорт с места остановки.'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Сбросить контрольные точки и загрузить файлы заново.'
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Обрабатывает импорт данных из CSV файлов в базу данных."""
+        importer = CsvImporter(
+            batch_size=options['batch_size'],
+            rebuild_indexes=not options['keep_indexes'],
+            workers=options['workers'],
+            chunk_rows=options['chunk_rows'],
+            on_conflict=options['on_conflict'],
+            resume=options['resume'],
+        )
+        if options['workers'] > 1 and not importer.concurrent:
+            self.stdout.write(
+                'База данных не поддерживает одновременную запись, '
+                'файлы будут загружены последовательно.'
+            )
+        files = []
+        for file, model in CSV_FILES:
+            csv_file = os.path.join(options['path'], file)
+            if not os.path.exists(csv_file):
+                self.stdout.write(f'Файл {file} не найден, пропускаем.')
+                continue
+            files.append((csv_file, model))
+        if options['restart']:
+            importer.reset_checkpoints(files)
+        for result in importer.import_files(files, log=self.stdout.write):
+            file = os.path.basename(result.file)
+            if result.error:
+                self.stderr.write(f'Файл {file} не загружен: {result.error}')
+                continue
+            if result.skipped:
+                self.stdout.write(f'Файл {file} уже загружен, пропускаем.')
+                continue
+            self.stdout.write(
+                f'finish download {file}: {result.rows} строк за '
+                f'{result.seconds:.2f} с ({result.rows_per_second:.0f} '
+                'строк/с)'
+            )
+        self.stdout.write('rebuild ratings')
+        rebuild_ratings()
+        rebuild_score_histograms()
+        rebuild_rankings()
+        rebuild_comments_counts()
+        self.stdout.write('rebuild search indexes')
+        rebuild_search_indexes()
@@ -0,0 +1,85 @@
+"""
+Модуль management команды для пересчета рейтинга произведений.
+
+Пересчитывает денормализованные сумму и количество оценок произведений
+по таблице отзывов, гистограммы оценок, материализованные рейтинги и
+количество комментариев к отзывам или проверяет их согласованность.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reviews.rankings import find_inconsistent_rankings, rebuild_rankings
+from reviews.ratings import (
+    find_inconsistent_comments_counts,
+    find_inconsistent_ratings,
+    find_inconsistent_score_histograms,
+    rebuild_comments_counts,
+    rebuild_ratings,
+    rebuild_score_histograms
+)
+
+
+class Command(BaseCommand):
+    """Команда для пересчета и проверки рейтинга произведений."""
+
+    help = 'Пересчитывает рейтинг произведений по таблице отзывов.'
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы командной строки."""
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить согласованность рейтинга, не изменяя БД.'
+        )
+
+    def report_inconsistent(self):
+        """Выводит несогласованные счетчики и возвращает их количество."""
+        inconsistent = find_inconsistent_ratings()
+        for title in inconsistent:
+            self.stdout.write(
+                f'{title.pk}: сумма {title.rating_sum} '
+                f'(ожидается {title.actual_rating_sum}), '
+                f'количество {title.rating_count} '
+                f'(ожидается {title.actual_rating_count})'
+            )
+        reviews = find_inconsistent_comments_counts()
+        for review in reviews:
+            self.stdout.write(
+                f'Отзыв {review.pk}: комментариев {review.comments_count} '
+                f'(ожидается {review.actual_comments_count})'
+            )
+        histograms = find_inconsistent_score_histograms()
+        for title in histograms:
+            self.stdout.write(
+                f'{title.pk}: гистограмма оценок - сумма '
+                f'{title.histogram_sum}, количество {title.histogram_count}'
+            )
+        rankings = find_inconsistent_rankings().count()
+        if rankings:
+            self.stdout.write(
+                f'Строк рейтингов с устаревшими данными: {rankings}'
+            )
+        return len(inconsistent) + len(histograms) + rankings, len(reviews)
+
+    def handle(self, *args, **options) -> None:
+        """Пересчитывает рейтинг или проверяет его согласованность."""
+        if options['check']:
+            titles, reviews = self.report_inconsistent()
+            if titles or reviews:
+                raise CommandError(
+                    f'Рейтинг не согласован у {titles} произведений, '
+                    f'счетчик комментариев - у {reviews} отзывов.'
+                )
+            self.stdout.write(self.style.SUCCESS('Рейтинг согласован.'))
+            return
+        with transaction.atomic():
+            updated = rebuild_ratings()
+            rebuild_score_histograms()
+            rebuild_rankings()
+            reviews = rebuild_comments_counts()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Пересчитан рейтинг {updated} произведений '
+                f'и счетчик комментариев {reviews} отзывов.'
+            )
+        )
@@ -0,0 +1,29 @@
+"""
+Модуль management команды для перестроения поисковых индексов.
+
+Нужна после изменения данных в обход сигналов моделей, например
+прямыми SQL-запросами.
+"""
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from reviews.search import rebuild_search_indexes
+
+
+class Command(BaseCommand):
+    """Команда для перестроения поисковых индексов."""
+
+    help = 'Перестраивает поисковые индексы по таблицам моделей.'
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы командной строки."""
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Псевдоним базы данных из настройки DATABASES.'
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Перестраивает индексы в одной транзакции."""
+        with transaction.atomic(using=options['database']):
+            rebuild_search_indexes(options['database'])
+        self.stdout.write(self.style.SUCCESS('Индексы перестроены.'))
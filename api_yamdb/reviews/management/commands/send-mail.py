@@ -0,0 +1,87 @@
+"""
+Модуль management команды для отправки писем из очереди исходящей почты.
+
+Без параметров отправляет все письма, срок отправки которых наступил, и
+завершается, поэтому подходит для запуска по расписанию. С параметром
+--loop работает постоянно и опрашивает очередь с интервалом
+MAIL_QUEUE_POLL_INTERVAL.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api_yamdb.constants import MAIL_FAILED, MAIL_SENT
+from reviews.mailqueue import RETRIED, get_queue_stats, send_batch
+
+
+class Command(BaseCommand):
+    """Команда для отправки писем из очереди исходящей почты."""
+
+    help = 'Отправляет письма из очереди исходящей почты.'
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы командной строки."""
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.MAIL_QUEUE_BATCH_SIZE,
+            help='Количество писем, отправляемых через одно соединение.'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, опрашивая очередь.'
+        )
+        parser.add_argument(
+            '--interval', type=float,
+            default=settings.MAIL_QUEUE_POLL_INTERVAL,
+            help='Интервал опроса очереди в секундах в режиме --loop.'
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Только вывести метрики очереди.'
+        )
+
+    def write_stats(self):
+        """Выводит метрики очереди."""
+        stats = get_queue_stats()
+        self.stdout.write(' '.join(
+            f'{name}={value}' for name, value in stats.items()
+        ))
+
+    def send_due(self, batch_size):
+        """Отправляет пачки писем, пока в очереди есть письма к отправке."""
+        total = {MAIL_SENT: 0, RETRIED: 0, MAIL_FAILED: 0}
+        while True:
+            started = time.perf_counter()
+            stats = send_batch(batch_size)
+            if not stats:
+                return total
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'Отправлено {stats[MAIL_SENT]}, отложено {stats[RETRIED]}, '
+                f'не отправлено {stats[MAIL_FAILED]} за {elapsed:.2f} с'
+            )
+            for name in total:
+                total[name] += stats[name]
+            if sum(stats.values()) < batch_size:
+                return total
+
+    def handle(self, *args, **options) -> None:
+        """Отправляет письма и выводит метрики."""
+        if options['stats']:
+            self.write_stats()
+            return
+        if not options['loop']:
+            total = self.send_due(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Отправлено писем: {total[MAIL_SENT]}, '
+                f'отложено: {total[RETRIED]}, '
+                f'не отправлено: {total[MAIL_FAILED]}.'
+            ))
+            self.write_stats()
+            return
+        try:
+            while True:
+                self.send_due(options['batch_size'])
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.write_stats()
@@ -0,0 +1,30 @@
+# Generated by Django 3.2 on 2026-10-17 04:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_title_rating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.CharField(max_length=256, unique=True, verbose_name='Файл')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='Смещение в байтах')),
+                ('last_id', models.CharField(blank=True, max_length=256, verbose_name='Последний загруженный id')),
+                ('rows', models.PositiveBigIntegerField(default=0, verbose_name='Загружено строк')),
+                ('indexes', models.JSONField(default=list, verbose_name='Удаленные на время загрузки индексы')),
+                ('finished', models.BooleanField(default=False, verbose_name='Загрузка завершена')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'контрольная точка импорта',
+                'verbose_name_plural': 'контрольные точки импорта',
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2 on 2026-10-17 04:31
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comments_counts(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Comment = apps.get_model('reviews', 'Comment')
+    Review.objects.update(
+        comments_count=Coalesce(
+            Subquery(
+                Comment.objects.filter(review=OuterRef('pk'))
+                .order_by()
+                .values('review')
+                .annotate(value=Count('id'))
+                .values('value'),
+                output_field=IntegerField()
+            ),
+            0
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев'),
+        ),
+        migrations.RunPython(fill_comments_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 3.2 on 2026-10-17 04:34
+
+from django.db import migrations, models
+
+# Фильтр name=...icontains на PostgreSQL выполняется как
+# UPPER(name::text) LIKE UPPER(%s), такой запрос использует
+# триграммный индекс по этому выражению. На других СУБД индекс не создается.
+TRIGRAM_INDEX_SQL = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS title_name_trgm_idx ON reviews_title '
+    'USING gin (UPPER(name::text) gin_trgm_ops)',
+)
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in TRIGRAM_INDEX_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS title_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_review_comments_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', 'name'], name='title_year_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'name'], name='title_category_name_idx'),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
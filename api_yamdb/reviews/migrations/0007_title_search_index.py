@@ -0,0 +1,48 @@
+from django.db import migrations
+
+CREATE_SQL = {
+    'sqlite': [
+        'CREATE VIRTUAL TABLE IF NOT EXISTS "reviews_title_fts" '
+        'USING fts5("name", "description", '
+        "tokenize = 'unicode61 remove_diacritics 2')",
+        'DELETE FROM "reviews_title_fts"',
+        'INSERT INTO "reviews_title_fts" (rowid, "name", "description") '
+        'SELECT "id", COALESCE("name", \'\'), COALESCE("description", \'\') '
+        'FROM "reviews_title"',
+    ],
+    'postgresql': [
+        'CREATE TABLE IF NOT EXISTS "reviews_title_fts" '
+        '(id bigint PRIMARY KEY, document tsvector NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS "reviews_title_fts_document" '
+        'ON "reviews_title_fts" USING gin (document)',
+        'DELETE FROM "reviews_title_fts"',
+        'INSERT INTO "reviews_title_fts" (id, document) '
+        'SELECT "id", '
+        "setweight(to_tsvector('simple', COALESCE(\"name\", '')), 'A') || "
+        "setweight(to_tsvector('simple', COALESCE(\"description\", '')), "
+        "'B') "
+        'FROM "reviews_title"',
+    ],
+}
+DROP_SQL = 'DROP TABLE IF EXISTS "reviews_title_fts"'
+
+
+def create_search_index(apps, schema_editor):
+    for sql in CREATE_SQL.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql, params=None)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE_SQL:
+        schema_editor.execute(DROP_SQL, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_title_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 3.2 on 2026-10-17 04:45
+
+from itertools import islice
+
+from django.db import migrations, models
+
+BATCH_SIZE = 5000
+NGRAM_LENGTH = 3
+NGRAM_FIELDS = (('User', 'username'), ('Category', 'name'), ('Genre', 'name'))
+
+
+def split(text):
+    padded = ' ' * (NGRAM_LENGTH - 1) + text + ' '
+    return {
+        padded[start:start + NGRAM_LENGTH]
+        for start in range(len(padded) - NGRAM_LENGTH + 1)
+    }
+
+
+def get_grams(value):
+    value = value.lower()
+    grams = split(value)
+    for word in value.split():
+        grams |= split(word)
+    return grams
+
+
+def fill_ngram_indexes(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    SearchNGram = apps.get_model('reviews', 'SearchNGram')
+    for model_name, field in NGRAM_FIELDS:
+        model = apps.get_model('reviews', model_name)
+        source = f'{model._meta.label_lower}.{field}'
+        pairs = model.objects.using(alias).values_list(
+            'pk', field
+        ).iterator(chunk_size=BATCH_SIZE)
+        rows = (
+            SearchNGram(source=source, object_id=pk, gram=gram)
+            for pk, value in pairs for gram in get_grams(value or '')
+        )
+        while True:
+            batch = list(islice(rows, BATCH_SIZE))
+            if not batch:
+                break
+            SearchNGram.objects.using(alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchNGram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=256, verbose_name='Модель и поле')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='id объекта')),
+                ('gram', models.CharField(max_length=3, verbose_name='Триграмма')),
+            ],
+            options={
+                'verbose_name': 'триграмма поиска',
+                'verbose_name_plural': 'триграммы поиска',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='searchngram',
+            index=models.Index(fields=['source', 'gram', 'object_id'], name='ngram_source_gram_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='searchngram',
+            constraint=models.UniqueConstraint(fields=('source', 'object_id', 'gram'), name='unique_source_object_gram'),
+        ),
+        migrations.RunPython(fill_ngram_indexes, migrations.RunPython.noop),
+    ]
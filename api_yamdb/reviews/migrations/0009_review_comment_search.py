@@ -0,0 +1,66 @@
+# Generated by Django 3.2 on 2026-10-17 04:53
+
+from django.db import migrations, models
+
+SEARCH_TABLES = (
+    ('reviews_review_fts', 'reviews_review'),
+    ('reviews_comment_fts', 'reviews_comment'),
+)
+
+
+def get_create_sql(vendor, table, source):
+    if vendor == 'sqlite':
+        return [
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS "{table}" '
+            'USING fts5("text", '
+            "tokenize = 'unicode61 remove_diacritics 2')",
+            f'DELETE FROM "{table}"',
+            f'INSERT INTO "{table}" (rowid, "text") '
+            f'SELECT "id", COALESCE("text", \'\') FROM "{source}"',
+        ]
+    if vendor == 'postgresql':
+        return [
+            f'CREATE TABLE IF NOT EXISTS "{table}" '
+            '(id bigint PRIMARY KEY, document tsvector NOT NULL)',
+            f'CREATE INDEX IF NOT EXISTS "{table}_document" '
+            f'ON "{table}" USING gin (document)',
+            f'DELETE FROM "{table}"',
+            f'INSERT INTO "{table}" (id, document) '
+            'SELECT "id", '
+            "setweight(to_tsvector('simple', COALESCE(\"text\", '')), 'A') "
+            f'FROM "{source}"',
+        ]
+    return []
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, source in SEARCH_TABLES:
+        for sql in get_create_sql(vendor, table, source):
+            schema_editor.execute(sql, params=None)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in ('sqlite', 'postgresql'):
+        return
+    for table, _ in SEARCH_TABLES:
+        schema_editor.execute(f'DROP TABLE IF EXISTS "{table}"', params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_searchngram'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['-pub_date', '-id'], name='comment_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['-pub_date', '-id'], name='review_pub_date_idx'),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
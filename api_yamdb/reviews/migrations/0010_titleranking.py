@@ -0,0 +1,100 @@
+# Generated by Django 3.2 on 2026-10-17 05:04
+
+from itertools import islice
+
+from django.db import migrations, models
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
+import django.db.models.deletion
+
+BATCH_SIZE = 5000
+
+
+def title_rating(prefix=''):
+    return Case(
+        When(**{f'{prefix}rating_count': 0}, then=Value(0.0)),
+        default=(
+            Cast(f'{prefix}rating_sum', FloatField())
+            / F(f'{prefix}rating_count')
+        ),
+        output_field=FloatField(),
+    )
+
+
+def ranking_rows(TitleRanking, Title, alias):
+    titles = Title.objects.using(alias).annotate(
+        value=title_rating()
+    ).values_list(
+        'pk', 'category_id', 'value', 'rating_count'
+    ).order_by().iterator(chunk_size=BATCH_SIZE)
+    for pk, category_id, rating, count in titles:
+        yield TitleRanking(
+            title_id=pk, scope='global', scope_id=0,
+            rating=rating, reviews_count=count
+        )
+        if category_id is not None:
+            yield TitleRanking(
+                title_id=pk, scope='category', scope_id=category_id,
+                rating=rating, reviews_count=count
+            )
+    genres = Title.genre.through.objects.using(alias).annotate(
+        value=title_rating('title__')
+    ).values_list(
+        'title_id', 'genre_id', 'value', 'title__rating_count'
+    ).order_by().iterator(chunk_size=BATCH_SIZE)
+    for title_id, genre_id, rating, count in genres:
+        yield TitleRanking(
+            title_id=title_id, scope='genre', scope_id=genre_id,
+            rating=rating, reviews_count=count
+        )
+
+
+def fill_rankings(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    TitleRanking = apps.get_model('reviews', 'TitleRanking')
+    rows = ranking_rows(
+        TitleRanking, apps.get_model('reviews', 'Title'), alias
+    )
+    while True:
+        batch = list(islice(rows, BATCH_SIZE))
+        if not batch:
+            break
+        TitleRanking.objects.using(alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_review_comment_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('global', 'Все произведения'), ('category', 'Категория'), ('genre', 'Жанр')], max_length=16, verbose_name='Область рейтинга')),
+                ('scope_id', models.PositiveBigIntegerField(default=0, verbose_name='id категории или жанра')),
+                ('rating', models.FloatField(default=0, verbose_name='Средняя оценка (0 без отзывов)')),
+                ('reviews_count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'позиция в рейтинге',
+                'verbose_name_plural': 'позиции в рейтинге',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['scope', 'scope_id', 'rating', 'title'], name='ranking_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['scope', 'scope_id', 'reviews_count', 'title'], name='ranking_reviews_count_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='titleranking',
+            constraint=models.UniqueConstraint(fields=('title', 'scope', 'scope_id'), name='unique_title_ranking_scope'),
+        ),
+        migrations.RunPython(fill_rankings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 3.2 on 2026-10-17 05:08
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_score_histograms(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Review = apps.get_model('reviews', 'Review')
+    TitleScore = apps.get_model('reviews', 'TitleScore')
+    TitleScore.objects.using(alias).bulk_create(
+        (
+            TitleScore(**values)
+            for values in Review.objects.using(alias).order_by().values(
+                'title_id', 'score'
+            ).annotate(count=Count('id'))
+        ),
+        batch_size=5000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_titleranking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveSmallIntegerField(validators=[django.core.validators.MaxValueValidator(10), django.core.validators.MinValueValidator(1)], verbose_name='Оценка')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Количество оценок')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'количество оценок',
+                'verbose_name_plural': 'гистограммы оценок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='titlescore',
+            constraint=models.UniqueConstraint(fields=('title', 'score'), name='unique_title_score'),
+        ),
+        migrations.RunPython(
+            fill_score_histograms, migrations.RunPython.noop
+        ),
+    ]
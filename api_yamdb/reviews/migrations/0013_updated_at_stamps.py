@@ -0,0 +1,24 @@
+# Generated by Django 3.2 on 2026-10-17 05:41
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='comments_updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Время изменения комментариев'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='reviews_updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Время изменения отзывов'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-17 05:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0013_updated_at_stamps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Версия утверждений токенов'),
+        ),
+    ]
@@ -2,18 +2,26 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 from api_yamdb.constants import (
     MAX_LENGTH_EMAIL_ADDRESS,
     MAX_LENGTH_FIRST_NAME,
     MAX_LENGTH_FOR_STR,
     MAX_LENGTH_LAST_NAME,
+    MAX_LENGTH_MAIL_STATUS,
+    MAX_LENGTH_MAIL_SUBJECT,
     MAX_LENGTH_NAME,
+    MAX_LENGTH_RANKING_SCOPE,
     MAX_LENGTH_SLUG,
     MAX_LENGTH_USERNAME,
     MAX_VALUE_SCORE,
+    MAIL_PENDING,
+    MAIL_STATUS_CHOICES,
+    NGRAM_LENGTH,
     MIN_VALUE_SCORE,
+    RANKING_SCOPE_CHOICES,
     USER,
     MODERATOR,
     ADMIN,
@@ -60,6 +68,11 @@ class User(AbstractUser):
     confirmation_code = models.CharField(
         max_length=settings.MAX_LENGTH_CONFIRMATION_CODE, null=True
     )
+    token_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия утверждений токенов'
+    )
 
     class Meta:
         default_related_name = 'users'
@@ -123,7 +136,48 @@ class Genre(TypeNameBaseModel):
         verbose_name_plural = 'жанры'
 
 
-class Title(models.Model):
+class DenormalizedFieldsModel(models.Model):
+    """
+    Базовая модель с полями, которые изменяются только запросами UPDATE.
+
+    Поля denormalized_fields изменяют обработчики сигналов атомарными
+    запросами, поэтому при сохранении существующего объекта они не
+    записываются: иначе значения, прочитанные вместе с объектом, затерли
+    бы изменения, сделанные после его чтения.
+    """
+
+    denormalized_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def get_update_fields(self, using):
+        """
+        Возвращает поля для сохранения существующего объекта.
+
+        Для нового объекта или сохранения в другую базу данных
+        возвращает None, то есть сохраняются все поля.
+        """
+        if self._state.adding or using not in (None, self._state.db):
+            return None
+        excluded = self.get_deferred_fields().union(self.denormalized_fields)
+        return [
+            field.attname for field in self._meta.concrete_fields
+            if not field.primary_key and field.attname not in excluded
+        ]
+
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        """Сохраняет объект без полей denormalized_fields."""
+        if update_fields is None and not force_insert:
+            update_fields = self.get_update_fields(using)
+        super().save(
+            force_insert=force_insert, force_update=force_update,
+            using=using, update_fields=update_fields
+        )
+
+
+class Title(DenormalizedFieldsModel):
     """Модель для произведений."""
 
     name = models.CharField(
@@ -148,17 +202,88 @@ class Title(models.Model):
         null=True,
         verbose_name='Описание'
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок'
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок'
+    )
+    reviews_updated_at = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+        verbose_name='Время изменения отзывов'
+    )
+
+    denormalized_fields = ('rating_sum', 'rating_count', 'reviews_updated_at')
 
     class Meta:
         verbose_name = 'произведение'
         verbose_name_plural = 'произведения'
         ordering = ('name',)
         default_related_name = 'titles'
+        indexes = [
+            models.Index(fields=('name', 'id'), name='title_name_id_idx'),
+            models.Index(
+                fields=('year', 'name'), name='title_year_name_idx'
+            ),
+            models.Index(
+                fields=('category', 'name'), name='title_category_name_idx'
+            ),
+        ]
 
     def __str__(self):
         """Возвращает строковое представление объекта произведения."""
         return self.name[:MAX_LENGTH_FOR_STR]
 
+    @property
+    def rating(self):
+        """Средняя оценка произведения или None, если отзывов нет."""
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+
+class TitleScore(models.Model):
+    """
+    Количество оценок произведения с определенным значением.
+
+    Строки образуют гистограмму оценок произведения, по которой
+    вычисляются средняя, взвешенная оценка и перцентили.
+    """
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='scores',
+        verbose_name='Произведение',
+    )
+    score = models.PositiveSmallIntegerField(
+        verbose_name='Оценка',
+        validators=[MaxValueValidator(MAX_VALUE_SCORE),
+                    MinValueValidator(MIN_VALUE_SCORE)]
+    )
+    count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество оценок'
+    )
+
+    class Meta:
+        verbose_name = 'количество оценок'
+        verbose_name_plural = 'гистограммы оценок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'score'], name='unique_title_score'
+            )
+        ]
+
+    def __str__(self):
+        """Возвращает строковое представление строки гистограммы."""
+        return f'{self.title_id}: {self.score} x {self.count}'
+
 
 class PublicationBaseModel(models.Model):
     """Базовая модель для комментариев и отзывов на произведения."""
@@ -192,13 +317,22 @@ class Comment(PublicationBaseModel):
     class Meta(PublicationBaseModel.Meta):
         verbose_name = 'комментарий'
         verbose_name_plural = 'комментарии'
+        indexes = [
+            models.Index(
+                fields=('review', '-pub_date', '-id'),
+                name='comment_review_pub_date_idx'
+            ),
+            models.Index(
+                fields=('-pub_date', '-id'), name='comment_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         """Возвращает строковое представление объекта комментария."""
         return f'Комментарий {self.author} на {self.review}'
 
 
-class Review(PublicationBaseModel):
+class Review(DenormalizedFieldsModel, PublicationBaseModel):
     """Модель для отзывов на произведения."""
 
     score = models.IntegerField(
@@ -211,16 +345,252 @@ class Review(PublicationBaseModel):
         on_delete=models.CASCADE,
         verbose_name='Произведение',
     )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
+    comments_updated_at = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+        verbose_name='Время изменения комментариев'
+    )
+
+    denormalized_fields = ('comments_count', 'comments_updated_at')
 
     class Meta(PublicationBaseModel.Meta):
         verbose_name = 'отзыв'
         verbose_name_plural = 'отзывы'
+        indexes = [
+            models.Index(
+                fields=('title', '-pub_date', '-id'),
+                name='review_title_pub_date_idx'
+            ),
+            models.Index(
+                fields=('-pub_date', '-id'), name='review_pub_date_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['author', 'title'], name='unique_author_title'
             )
         ]
 
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет отзыв.
+
+        Сохранение выполняется в транзакции, чтобы обработчики сигналов
+        обновляли рейтинг произведения атомарно вместе с самим отзывом.
+        """
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
     def __str__(self):
         """Возвращает строковое представление объекта отзыва."""
         return f'Отзыв {self.author} на "{self.title}"'
+
+
+class ImportCheckpoint(models.Model):
+    """Контрольная точка импорта CSV файла для возобновления загрузки."""
+
+    file = models.CharField(
+        max_length=MAX_LENGTH_NAME,
+        unique=True,
+        verbose_name='Файл'
+    )
+    offset = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Смещение в байтах'
+    )
+    last_id = models.CharField(
+        max_length=MAX_LENGTH_NAME,
+        blank=True,
+        verbose_name='Последний загруженный id'
+    )
+    rows = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Загружено строк'
+    )
+    indexes = models.JSONField(
+        default=list,
+        verbose_name='Удаленные на время загрузки индексы'
+    )
+    finished = models.BooleanField(
+        default=False,
+        verbose_name='Загрузка завершена'
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Обновлено'
+    )
+
+    class Meta:
+        verbose_name = 'контрольная точка импорта'
+        verbose_name_plural = 'контрольные точки импорта'
+
+    def __str__(self):
+        """Возвращает строковое представление контрольной точки."""
+        return f'{self.file}: {self.offset}'
+
+
+class SearchNGram(models.Model):
+    """Триграмма значения поля объекта для поиска по подстроке."""
+
+    source = models.CharField(
+        max_length=MAX_LENGTH_NAME,
+        verbose_name='Модель и поле'
+    )
+    object_id = models.PositiveBigIntegerField(verbose_name='id объекта')
+    gram = models.CharField(
+        max_length=NGRAM_LENGTH,
+        verbose_name='Триграмма'
+    )
+
+    class Meta:
+        verbose_name = 'триграмма поиска'
+        verbose_name_plural = 'триграммы поиска'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source', 'object_id', 'gram'],
+                name='unique_source_object_gram'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=('source', 'gram', 'object_id'),
+                name='ngram_source_gram_idx'
+            ),
+        ]
+
+    def __str__(self):
+        """Возвращает строковое представление триграммы."""
+        return f'{self.source}:{self.object_id}:{self.gram}'
+
+
+class TitleRanking(models.Model):
+    """
+    Позиция произведения в рейтинге.
+
+    Для каждого произведения хранится строка общего рейтинга, строка
+    рейтинга его категории и по строке на каждый жанр. Индексы по
+    (scope, scope_id, значение, title) позволяют выбирать страницу
+    рейтинга без сортировки таблицы произведений.
+    """
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='rankings',
+        verbose_name='Произведение',
+    )
+    scope = models.CharField(
+        max_length=MAX_LENGTH_RANKING_SCOPE,
+        choices=RANKING_SCOPE_CHOICES,
+        verbose_name='Область рейтинга'
+    )
+    scope_id = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='id категории или жанра'
+    )
+    rating = models.FloatField(
+        default=0,
+        verbose_name='Средняя оценка (0 без отзывов)'
+    )
+    reviews_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество отзывов'
+    )
+
+    class Meta:
+        verbose_name = 'позиция в рейтинге'
+        verbose_name_plural = 'позиции в рейтинге'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'scope', 'scope_id'],
+                name='unique_title_ranking_scope'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=('scope', 'scope_id', 'rating', 'title'),
+                name='ranking_rating_idx'
+            ),
+            models.Index(
+                fields=('scope', 'scope_id', 'reviews_count', 'title'),
+                name='ranking_reviews_count_idx'
+            ),
+        ]
+
+    def __str__(self):
+        """Возвращает строковое представление позиции в рейтинге."""
+        return f'{self.title_id} в {self.scope}:{self.scope_id}'
+
+
+class OutgoingEmail(models.Model):
+    """
+    Письмо в очереди исходящей почты.
+
+    Письма отправляются командой send-mail пачками, а при ошибке
+    отправки откладываются до next_attempt_at с растущей задержкой. У
+    отправляемого письма next_attempt_at - время, после которого оно
+    отправляется снова, если обработчик прервался.
+    Индекс по (status, next_attempt_at) позволяет выбирать письма, срок
+    отправки которых наступил, без просмотра отправленных.
+    """
+
+    subject = models.CharField(
+        max_length=MAX_LENGTH_MAIL_SUBJECT,
+        verbose_name='Тема'
+    )
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.EmailField(
+        max_length=MAX_LENGTH_EMAIL_ADDRESS,
+        verbose_name='Отправитель'
+    )
+    recipient = models.EmailField(
+        max_length=MAX_LENGTH_EMAIL_ADDRESS,
+        verbose_name='Получатель'
+    )
+    status = models.CharField(
+        max_length=MAX_LENGTH_MAIL_STATUS,
+        choices=MAIL_STATUS_CHOICES,
+        default=MAIL_PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Количество попыток отправки'
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Время следующей попытки'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка отправки'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания'
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата отправки'
+    )
+
+    class Meta:
+        verbose_name = 'исходящее письмо'
+        verbose_name_plural = 'исходящие письма'
+        ordering = ('-created_at',)
+        indexes = [
+            models.Index(
+                fields=('status', 'next_attempt_at'),
+                name='outgoing_email_due_idx'
+            ),
+        ]
+
+    def __str__(self):
+        """Возвращает строковое представление письма."""
+        return f'{self.subject} для {self.recipient}'[:MAX_LENGTH_FOR_STR]
@@ -0,0 +1,160 @@
+"""
+Модуль для поддержки материализованных рейтингов произведений.
+
+Каждое произведение представлено строками TitleRanking в общем рейтинге,
+в рейтинге своей категории и в рейтингах своих жанров. Средняя оценка и
+количество отзывов копируются в эти строки из денормализованного
+рейтинга произведения при каждом его изменении, а состав рейтингов
+категорий и жанров меняется вместе с категорией и жанрами произведения.
+"""
+from django.db.models import (
+    Case,
+    F,
+    FloatField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When
+)
+from django.db.models.functions import Cast
+
+from api_yamdb.constants import RANKING_CATEGORY, RANKING_GENRE, RANKING_GLOBAL
+from .models import Title, TitleRanking
+from .utils import batched
+
+BATCH_SIZE = 5000
+
+
+def title_rating(prefix=''):
+    """Выражение средней оценки произведения (0 без отзывов)."""
+    return Case(
+        When(**{f'{prefix}rating_count': 0}, then=Value(0.0)),
+        default=(
+            Cast(f'{prefix}rating_sum', FloatField())
+            / F(f'{prefix}rating_count')
+        ),
+        output_field=FloatField(),
+    )
+
+
+def refresh_rankings(*title_ids):
+    """Копирует рейтинг произведений во все их строки рейтингов."""
+    titles = Title.objects.filter(pk=OuterRef('title_id'))
+    TitleRanking.objects.filter(title_id__in=title_ids).update(
+        rating=Subquery(
+            titles.annotate(value=title_rating()).values('value')[:1]
+        ),
+        reviews_count=Subquery(titles.values('rating_count')[:1]),
+    )
+
+
+def add_rankings(scopes):
+    """
+    Добавляет строки рейтингов для троек (title_id, scope, scope_id).
+
+    Уже существующие строки не изменяются.
+    """
+    scopes = list(scopes)
+    if not scopes:
+        return
+    ratings = {
+        pk: (rating, count)
+        for pk, rating, count in Title.objects.filter(
+            pk__in={title_id for title_id, _, _ in scopes}
+        ).annotate(value=title_rating()).values_list(
+            'pk', 'value', 'rating_count'
+        )
+    }
+    TitleRanking.objects.bulk_create([
+        TitleRanking(
+            title_id=title_id, scope=scope, scope_id=scope_id,
+            rating=ratings[title_id][0], reviews_count=ratings[title_id][1]
+        )
+        for title_id, scope, scope_id in scopes if title_id in ratings
+    ], ignore_conflicts=True)
+
+
+def sync_title_rankings(title):
+    """Добавляет произведение в общий рейтинг и рейтинг его категории."""
+    stale = TitleRanking.objects.filter(title=title, scope=RANKING_CATEGORY)
+    if title.category_id is not None:
+        stale = stale.exclude(scope_id=title.category_id)
+    stale.delete()
+    scopes = [(title.pk, RANKING_GLOBAL, 0)]
+    if title.category_id is not None:
+        scopes.append((title.pk, RANKING_CATEGORY, title.category_id))
+    add_rankings(scopes)
+
+
+def add_genre_rankings(pairs):
+    """Добавляет произведения в рейтинги жанров по парам (title, genre)."""
+    add_rankings(
+        (title_id, RANKING_GENRE, genre_id) for title_id, genre_id in pairs
+    )
+
+
+def remove_genre_rankings(title_ids=None, genre_ids=None):
+    """Удаляет произведения из рейтингов жанров; None - без ограничения."""
+    stale = TitleRanking.objects.filter(scope=RANKING_GENRE)
+    if title_ids is not None:
+        stale = stale.filter(title_id__in=title_ids)
+    if genre_ids is not None:
+        stale = stale.filter(scope_id__in=genre_ids)
+    stale.delete()
+
+
+def remove_scope_rankings(scope, scope_id):
+    """Удаляет рейтинг категории или жанра."""
+    TitleRanking.objects.filter(scope=scope, scope_id=scope_id).delete()
+
+
+def _ranking_rows():
+    """Возвращает строки всех рейтингов, вычисленные по произведениям."""
+    titles = Title.objects.annotate(value=title_rating()).values_list(
+        'pk', 'category_id', 'value', 'rating_count'
+    ).order_by().iterator(chunk_size=BATCH_SIZE)
+    for pk, category_id, rating, count in titles:
+        yield TitleRanking(
+            title_id=pk, scope=RANKING_GLOBAL, scope_id=0,
+            rating=rating, reviews_count=count
+        )
+        if category_id is not None:
+            yield TitleRanking(
+                title_id=pk, scope=RANKING_CATEGORY, scope_id=category_id,
+                rating=rating, reviews_count=count
+            )
+    genres = Title.genre.through.objects.annotate(
+        value=title_rating('title__')
+    ).values_list(
+        'title_id', 'genre_id', 'value', 'title__rating_count'
+    ).order_by().iterator(chunk_size=BATCH_SIZE)
+    for title_id, genre_id, rating, count in genres:
+        yield TitleRanking(
+            title_id=title_id, scope=RANKING_GENRE, scope_id=genre_id,
+            rating=rating, reviews_count=count
+        )
+
+
+def rebuild_rankings():
+    """
+    Заполняет все рейтинги заново по таблице произведений.
+
+    Возвращает количество созданных строк рейтингов.
+    """
+    TitleRanking.objects.all().delete()
+    count = 0
+    for batch in batched(_ranking_rows(), BATCH_SIZE):
+        TitleRanking.objects.bulk_create(batch)
+        count += len(batch)
+    return count
+
+
+def find_inconsistent_rankings():
+    """Возвращает строки рейтингов, расходящиеся с рейтингом произведения."""
+    return TitleRanking.objects.annotate(
+        actual_rating=title_rating('title__')
+    ).filter(
+        ~Q(rating=F('actual_rating'))
+        | ~Q(reviews_count=F('title__rating_count'))
+    )
@@ -0,0 +1,278 @@
+"""
+Модуль для поддержки денормализованного рейтинга произведений.
+
+Сумма и количество оценок хранятся в модели Title и изменяются
+инкрементально при создании, изменении и удалении отзывов, поэтому
+чтение рейтинга не требует агрегации по таблице отзывов. Вместе с
+рейтингом обновляются строки материализованных рейтингов и гистограмма
+оценок произведения (TitleScore), по которой средняя, взвешенная оценка
+и перцентили вычисляются за постоянное время. Аналогично в модели Review
+хранится количество комментариев к отзыву.
+"""
+from math import ceil
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from api_yamdb.constants import (
+    MAX_VALUE_SCORE,
+    MIN_VALUE_SCORE,
+    SCORE_PERCENTILES
+)
+from .models import Comment, Review, Title, TitleScore
+from .rankings import refresh_rankings
+from .utils import batched
+
+GLOBAL_MEAN_CACHE_KEY = 'rating-global-mean'
+
+
+def change_rating(title_id, score_delta, count_delta):
+    """Атомарно изменяет сумму и количество оценок произведения."""
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=F('rating_sum') + score_delta,
+        rating_count=F('rating_count') + count_delta,
+    )
+    refresh_rankings(title_id)
+
+
+def change_score_count(title_id, score, delta):
+    """Атомарно изменяет количество оценок score в гистограмме."""
+    scores = TitleScore.objects.filter(title_id=title_id, score=score)
+    if not scores.update(count=F('count') + delta) and delta > 0:
+        TitleScore.objects.bulk_create(
+            [TitleScore(title_id=title_id, score=score)],
+            ignore_conflicts=True
+        )
+        scores.update(count=F('count') + delta)
+
+
+def add_score(title_id, score):
+    """Учитывает в рейтинге произведения новую оценку."""
+    change_rating(title_id, score, 1)
+    change_score_count(title_id, score, 1)
+
+
+def remove_score(title_id, score):
+    """Исключает оценку из рейтинга произведения."""
+    change_rating(title_id, -score, -1)
+    change_score_count(title_id, score, -1)
+
+
+def replace_score(title_id, previous_score, score):
+    """Заменяет в рейтинге произведения одну оценку другой."""
+    if previous_score == score:
+        return
+    change_rating(title_id, score - previous_score, 0)
+    change_score_count(title_id, previous_score, -1)
+    change_score_count(title_id, score, 1)
+
+
+class ScoreHistogram:
+    """Гистограмма оценок произведения и производные от нее величины."""
+
+    def __init__(self, counts):
+        """Сохраняет количество оценок для каждого значения."""
+        self.counts = [
+            counts.get(score, 0)
+            for score in range(MIN_VALUE_SCORE, MAX_VALUE_SCORE + 1)
+        ]
+        self.total = sum(self.counts)
+
+    @classmethod
+    def for_title(cls, title):
+        """Возвращает гистограмму произведения по строкам TitleScore."""
+        return cls({row.score: row.count for row in title.scores.all()})
+
+    def items(self):
+        """Возвращает пары (оценка, количество) по возрастанию оценки."""
+        return zip(range(MIN_VALUE_SCORE, MAX_VALUE_SCORE + 1), self.counts)
+
+    @property
+    def mean(self):
+        """Средняя оценка или None без оценок."""
+        if not self.total:
+            return None
+        return sum(score * count for score, count in self.items()) / (
+            self.total
+        )
+
+    def percentile(self, percent):
+        """Возвращает перцентиль оценок методом ближайшего ранга."""
+        if not self.total:
+            return None
+        rank = max(1, ceil(percent / 100 * self.total))
+        seen = 0
+        for score, count in self.items():
+            seen += count
+            if seen >= rank:
+                return score
+        return MAX_VALUE_SCORE
+
+    def percentiles(self):
+        """Возвращает перцентили SCORE_PERCENTILES."""
+        return {
+            f'p{percent}': self.percentile(percent)
+            for percent in SCORE_PERCENTILES
+        }
+
+    def weighted(self, global_mean, min_votes):
+        """
+        Возвращает взвешенную оценку по формуле IMDb.
+
+        WR = v / (v + m) * R + m / (v + m) * C, где R и v - средняя оценка
+        и число оценок произведения, C - средняя по всем произведениям,
+        m - число оценок, при котором R и C весят одинаково.
+        """
+        if not self.total:
+            return None
+        return (
+            self.total * self.mean + min_votes * global_mean
+        ) / (self.total + min_votes)
+
+
+def get_global_mean():
+    """
+    Возвращает среднюю оценку по всем произведениям.
+
+    Значение меняется медленно, поэтому кэшируется на
+    RATING_GLOBAL_MEAN_TIMEOUT секунд. Без оценок возвращается середина
+    шкалы.
+    """
+    cache = caches[settings.RESPONSE_CACHE_ALIAS]
+    mean = cache.get(GLOBAL_MEAN_CACHE_KEY)
+    if mean is None:
+        totals = Title.objects.aggregate(
+            total=Sum('rating_sum'), count=Sum('rating_count')
+        )
+        mean = (
+            totals['total'] / totals['count'] if totals['count']
+            else (MIN_VALUE_SCORE + MAX_VALUE_SCORE) / 2
+        )
+        cache.set(
+            GLOBAL_MEAN_CACHE_KEY, mean, settings.RATING_GLOBAL_MEAN_TIMEOUT
+        )
+    return mean
+
+
+def change_comments_count(review_id, delta):
+    """Атомарно изменяет количество комментариев к отзыву."""
+    Review.objects.filter(pk=review_id).update(
+        comments_count=F('comments_count') + delta
+    )
+
+
+def _review_aggregate(aggregate):
+    """Подзапрос, вычисляющий агрегат оценок отзывов произведения."""
+    return Coalesce(
+        Subquery(
+            Review.objects.filter(title=OuterRef('pk'))
+            .order_by()
+            .values('title')
+            .annotate(value=aggregate)
+            .values('value'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def annotate_actual_rating(queryset):
+    """Добавляет к произведениям фактические сумму и количество оценок."""
+    return queryset.annotate(
+        actual_rating_sum=_review_aggregate(Sum('score')),
+        actual_rating_count=_review_aggregate(Count('id')),
+    )
+
+
+def rebuild_ratings(queryset=None):
+    """
+    Пересчитывает рейтинг произведений по таблице отзывов.
+
+    Возвращает количество обновленных произведений.
+    """
+    if queryset is None:
+        queryset = Title.objects.all()
+    return queryset.update(
+        rating_sum=_review_aggregate(Sum('score')),
+        rating_count=_review_aggregate(Count('id')),
+    )
+
+
+def find_inconsistent_ratings(queryset=None):
+    """Возвращает произведения, у которых рейтинг расходится с отзывами."""
+    if queryset is None:
+        queryset = Title.objects.all()
+    return annotate_actual_rating(queryset).exclude(
+        rating_sum=F('actual_rating_sum'),
+        rating_count=F('actual_rating_count'),
+    )
+
+
+def _comments_count():
+    """Подзапрос, вычисляющий количество комментариев к отзыву."""
+    return Coalesce(
+        Subquery(
+            Comment.objects.filter(review=OuterRef('pk'))
+            .order_by()
+            .values('review')
+            .annotate(value=Count('id'))
+            .values('value'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def rebuild_comments_counts(queryset=None):
+    """
+    Пересчитывает количество комментариев к отзывам.
+
+    Возвращает количество обновленных отзывов.
+    """
+    if queryset is None:
+        queryset = Review.objects.all()
+    return queryset.update(comments_count=_comments_count())
+
+
+def find_inconsistent_comments_counts(queryset=None):
+    """Возвращает отзывы, у которых счетчик комментариев неверен."""
+    if queryset is None:
+        queryset = Review.objects.all()
+    return queryset.annotate(
+        actual_comments_count=_comments_count()
+    ).exclude(comments_count=F('actual_comments_count'))
+
+
+def rebuild_score_histograms():
+    """
+    Заполняет гистограммы оценок заново по таблице отзывов.
+
+    Возвращает количество созданных строк гистограмм.
+    """
+    TitleScore.objects.all().delete()
+    rows = (
+        TitleScore(**values) for values in Review.objects.order_by().values(
+            'title_id', 'score'
+        ).annotate(count=Count('id')).iterator()
+    )
+    created = 0
+    for batch in batched(rows, 5000):
+        TitleScore.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+def find_inconsistent_score_histograms(queryset=None):
+    """Возвращает произведения с гистограммой, расходящейся с рейтингом."""
+    if queryset is None:
+        queryset = Title.objects.all()
+    return queryset.annotate(
+        histogram_sum=Coalesce(
+            Sum(F('scores__score') * F('scores__count')), 0
+        ),
+        histogram_count=Coalesce(Sum('scores__count'), 0),
+    ).exclude(
+        rating_sum=F('histogram_sum'), rating_count=F('histogram_count')
+    )
@@ -0,0 +1,376 @@
+"""
+Модуль полнотекстового поиска.
+
+Полнотекстовый поиск ведется по названиям и описаниям произведений и по
+текстам отзывов и комментариев. Для каждой модели с поиском создается
+отдельная таблица индекса: на SQLite
+виртуальная таблица FTS5 (ранжирование по bm25), на PostgreSQL таблица
+с колонкой tsvector и GIN индексом (ранжирование ts_rank). Строки индекса
+обновляются обработчиками сигналов при сохранении и удалении объектов,
+а после массовой загрузки индекс перестраивается целиком. На остальных
+СУБД поиск выполняется фильтром icontains по тем же полям.
+
+Для поиска по подстроке в коротких полях (имена пользователей, названия
+категорий и жанров) триграммы значений хранятся в таблице SearchNGram.
+Кандидаты выбираются по индексу триграмм и проверяются регулярным
+выражением, поэтому полный просмотр таблицы объектов не нужен.
+"""
+import re
+from functools import reduce
+from operator import and_, or_
+
+from django.db import connections, transaction
+from django.db.models import Q
+
+from api_yamdb.constants import NGRAM_LENGTH
+from .models import (
+    Category,
+    Comment,
+    Genre,
+    Review,
+    SearchNGram,
+    Title,
+    User
+)
+from .utils import batched
+
+MAX_SEARCH_TERMS = 10
+POSTGRESQL_CONFIG = 'simple'
+POSTGRESQL_WEIGHTS = 'ABCD'
+
+
+class FullTextIndex:
+    """Полнотекстовый индекс текстовых полей модели."""
+
+    vendors = ('sqlite', 'postgresql')
+
+    def __init__(self, model, fields, weights):
+        """Сохраняет модель, индексируемые поля и их веса при ранжировании."""
+        self.model = model
+        self.fields = tuple(fields)
+        self.weights = tuple(weights)
+        self.table = f'{model._meta.db_table}_fts'
+
+    @staticmethod
+    def get_terms(text):
+        """Разбивает поисковый запрос на слова."""
+        return re.findall(r'\w+', text)[:MAX_SEARCH_TERMS]
+
+    def is_supported(self, connection):
+        """Проверяет, поддерживает ли СУБД полнотекстовый индекс."""
+        return connection.vendor in self.vendors
+
+    def get_create_sql(self, connection):
+        """Возвращает SQL создания таблицы индекса."""
+        qn = connection.ops.quote_name
+        if connection.vendor == 'sqlite':
+            columns = ', '.join(map(qn, self.fields))
+            return [
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {qn(self.table)} '
+                f'USING fts5({columns}, '
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            ]
+        return [
+            f'CREATE TABLE IF NOT EXISTS {qn(self.table)} '
+            '(id bigint PRIMARY KEY, document tsvector NOT NULL)',
+            f'CREATE INDEX IF NOT EXISTS {qn(self.table + "_document")} '
+            f'ON {qn(self.table)} USING gin (document)',
+        ]
+
+    def get_document_sql(self, columns):
+        """Возвращает выражение tsvector PostgreSQL для колонок."""
+        return ' || '.join(
+            f"setweight(to_tsvector('{POSTGRESQL_CONFIG}', "
+            f"COALESCE({column}, '')), '{weight}')"
+            for column, weight in zip(columns, POSTGRESQL_WEIGHTS)
+        )
+
+    def get_insert_sql(self, connection, select=False):
+        """
+        Возвращает SQL добавления строк индекса.
+
+        Без select строка добавляется по параметрам (id и значения полей),
+        иначе строки выбираются из таблицы модели.
+        """
+        qn = connection.ops.quote_name
+        if select:
+            key = qn(self.model._meta.pk.column)
+            columns = [
+                qn(self.model._meta.get_field(field).column)
+                for field in self.fields
+            ]
+        else:
+            key, columns = '%s', ['%s'] * len(self.fields)
+        if connection.vendor == 'sqlite':
+            target = ['rowid', *map(qn, self.fields)]
+            values = [key, *(f"COALESCE({column}, '')" for column in columns)]
+        else:
+            target = ['id', 'document']
+            values = [key, self.get_document_sql(columns)]
+        sql = f'INSERT INTO {qn(self.table)} ({", ".join(target)}) '
+        if select:
+            return (
+                f'{sql}SELECT {", ".join(values)} '
+                f'FROM {qn(self.model._meta.db_table)}'
+            )
+        return f'{sql}VALUES ({", ".join(values)})'
+
+    def get_key_column(self, connection):
+        """Возвращает колонку таблицы индекса с первичным ключом объекта."""
+        return 'rowid' if connection.vendor == 'sqlite' else 'id'
+
+    def create(self, using='default'):
+        """Создает таблицу индекса и заполняет ее."""
+        connection = connections[using]
+        if not self.is_supported(connection):
+            return
+        with connection.cursor() as cursor:
+            for sql in self.get_create_sql(connection):
+                cursor.execute(sql)
+        self.rebuild(using)
+
+    def drop(self, using='default'):
+        """Удаляет таблицу индекса."""
+        connection = connections[using]
+        if not self.is_supported(connection):
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DROP TABLE IF EXISTS {connection.ops.quote_name(self.table)}'
+            )
+
+    def rebuild(self, using='default'):
+        """Заполняет индекс заново по таблице модели."""
+        connection = connections[using]
+        if not self.is_supported(connection):
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {connection.ops.quote_name(self.table)}'
+            )
+            cursor.execute(self.get_insert_sql(connection, select=True))
+
+    def remove(self, pks, using='default'):
+        """Удаляет строки индекса объектов."""
+        connection = connections[using]
+        if not pks or not self.is_supported(connection):
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {connection.ops.quote_name(self.table)} '
+                f'WHERE {self.get_key_column(connection)} IN '
+                f'({", ".join(["%s"] * len(pks))})',
+                list(pks)
+            )
+
+    def update(self, instances, using='default'):
+        """Обновляет строки индекса объектов."""
+        connection = connections[using]
+        if not self.is_supported(connection):
+            return
+        self.remove([instance.pk for instance in instances], using)
+        sql = self.get_insert_sql(connection)
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, [
+                [instance.pk] + [
+                    getattr(instance, field) or '' for field in self.fields
+                ]
+                for instance in instances
+            ])
+
+    def get_query(self, connection, terms):
+        """Возвращает запрос к индексу, требующий все слова по началу."""
+        if connection.vendor == 'sqlite':
+            return ' '.join(f'"{term}"*' for term in terms)
+        return ' & '.join(f'{term}:*' for term in terms)
+
+    def get_match_sql(self, connection):
+        """Возвращает условие совпадения строки индекса с запросом."""
+        table = connection.ops.quote_name(self.table)
+        if connection.vendor == 'sqlite':
+            return f'{table} MATCH %s'
+        return f"{table}.document @@ to_tsquery('{POSTGRESQL_CONFIG}', %s)"
+
+    def get_rank_sql(self, connection, query):
+        """
+        Возвращает выражение релевантности строки индекса и его параметры.
+
+        Выражение вычисляется в том же запросе, что и совпадение, поэтому
+        каждая найденная строка ранжируется один раз.
+        """
+        table = connection.ops.quote_name(self.table)
+        if connection.vendor == 'sqlite':
+            weights = ', '.join(map(str, self.weights))
+            # bm25 тем меньше, чем выше релевантность.
+            return f'-bm25({table}, {weights})', []
+        # Веса ts_rank перечисляются в порядке меток D, C, B, A.
+        weights = ', '.join(
+            ['0'] * (len(POSTGRESQL_WEIGHTS) - len(self.weights))
+            + [str(weight) for weight in reversed(self.weights)]
+        )
+        return (
+            f"ts_rank('{{{weights}}}', {table}.document, "
+            f"to_tsquery('{POSTGRESQL_CONFIG}', %s))"
+        ), [query]
+
+    def search(self, queryset, text):
+        """
+        Возвращает объекты, содержащие все слова запроса.
+
+        Слова ищутся по началу, результаты упорядочены по убыванию
+        релевантности в поле search_rank. Таблица индекса соединяется с
+        таблицей модели по первичному ключу.
+        """
+        terms = self.get_terms(text)
+        if not terms:
+            return queryset
+        connection = connections[queryset.db]
+        if not self.is_supported(connection):
+            return queryset.filter(reduce(and_, (
+                reduce(or_, (
+                    Q(**{f'{field}__icontains': term})
+                    for field in self.fields
+                ))
+                for term in terms
+            )))
+        qn = connection.ops.quote_name
+        query = self.get_query(connection, terms)
+        rank_sql, rank_params = self.get_rank_sql(connection, query)
+        return queryset.extra(
+            select={'search_rank': rank_sql},
+            select_params=rank_params,
+            tables=[self.table],
+            where=[
+                f'{qn(self.table)}.{self.get_key_column(connection)} = '
+                f'{qn(self.model._meta.db_table)}.'
+                f'{qn(self.model._meta.pk.column)}',
+                self.get_match_sql(connection),
+            ],
+            params=[query],
+        ).order_by('-search_rank', 'pk')
+
+
+class NGramIndex:
+    """
+    Триграммный индекс поля модели.
+
+    Для значения индексируются триграммы всей строки и каждого слова,
+    дополненных в начале двумя пробелами и в конце одним. Слово запроса
+    из трех и более символов ищется как подстрока, более короткое - как
+    начало значения или одного из его слов.
+    """
+
+    batch_size = 5000
+
+    def __init__(self, model, field):
+        """Сохраняет модель и индексируемое поле."""
+        self.model = model
+        self.field = field
+        self.source = f'{model._meta.label_lower}.{field}'
+
+    @staticmethod
+    def split(text):
+        """Возвращает триграммы строки, дополненной пробелами."""
+        padded = ' ' * (NGRAM_LENGTH - 1) + text + ' '
+        return {
+            padded[start:start + NGRAM_LENGTH]
+            for start in range(len(padded) - NGRAM_LENGTH + 1)
+        }
+
+    def get_grams(self, value):
+        """Возвращает триграммы значения поля."""
+        value = value.lower()
+        grams = self.split(value)
+        for word in value.split():
+            grams |= self.split(word)
+        return grams
+
+    @staticmethod
+    def get_term_grams(term):
+        """Возвращает триграммы, которые обязан содержать результат."""
+        term = term.lower()
+        if len(term) < NGRAM_LENGTH:
+            return {term.rjust(NGRAM_LENGTH)}
+        return {
+            term[start:start + NGRAM_LENGTH]
+            for start in range(len(term) - NGRAM_LENGTH + 1)
+        }
+
+    def make_rows(self, pairs):
+        """Возвращает строки индекса для пар (pk, значение поля)."""
+        for pk, value in pairs:
+            for gram in self.get_grams(value or ''):
+                yield SearchNGram(
+                    source=self.source, object_id=pk, gram=gram
+                )
+
+    def remove(self, pks, using='default'):
+        """Удаляет триграммы объектов."""
+        SearchNGram.objects.using(using).filter(
+            source=self.source, object_id__in=pks
+        ).delete()
+
+    def update(self, instances, using='default'):
+        """Обновляет триграммы объектов."""
+        with transaction.atomic(using=using):
+            self.remove([instance.pk for instance in instances], using)
+            SearchNGram.objects.using(using).bulk_create(self.make_rows(
+                (instance.pk, getattr(instance, self.field))
+                for instance in instances
+            ), batch_size=self.batch_size)
+
+    def rebuild(self, using='default'):
+        """Заполняет индекс заново по таблице модели."""
+        SearchNGram.objects.using(using).filter(source=self.source).delete()
+        pairs = self.model.objects.using(using).values_list(
+            'pk', self.field
+        ).iterator(chunk_size=self.batch_size)
+        for batch in batched(self.make_rows(pairs), self.batch_size):
+            SearchNGram.objects.using(using).bulk_create(batch)
+
+    def get_condition(self, term):
+        """
+        Возвращает условие отбора объектов, содержащих слово.
+
+        Каждая триграмма слова отбирает кандидатов отдельным подзапросом
+        по индексу (source, gram, object_id), и СУБД пересекает эти
+        множества, начиная с самого редкого.
+        """
+        condition = reduce(and_, (
+            Q(pk__in=SearchNGram.objects.filter(
+                source=self.source, gram=gram
+            ).values('object_id'))
+            for gram in sorted(self.get_term_grams(term))
+        ))
+        if len(term) > NGRAM_LENGTH:
+            # Все триграммы могут встретиться в разных местах значения.
+            condition &= Q(**{f'{self.field}__iregex': re.escape(term)})
+        return condition
+
+
+TITLE_SEARCH_INDEX = FullTextIndex(
+    Title, ('name', 'description'), weights=(10.0, 1.0)
+)
+REVIEW_SEARCH_INDEX = FullTextIndex(Review, ('text',), weights=(1.0,))
+COMMENT_SEARCH_INDEX = FullTextIndex(Comment, ('text',), weights=(1.0,))
+FULL_TEXT_INDEXES = {
+    index.model: index
+    for index in (
+        TITLE_SEARCH_INDEX, REVIEW_SEARCH_INDEX, COMMENT_SEARCH_INDEX
+    )
+}
+NGRAM_INDEXES = {
+    (index.model, index.field): index
+    for index in (
+        NGramIndex(User, 'username'),
+        NGramIndex(Category, 'name'),
+        NGramIndex(Genre, 'name'),
+    )
+}
+SEARCH_INDEXES = (*FULL_TEXT_INDEXES.values(), *NGRAM_INDEXES.values())
+
+
+def rebuild_search_indexes(using='default'):
+    """Перестраивает все поисковые индексы."""
+    for index in SEARCH_INDEXES:
+        index.rebuild(using)
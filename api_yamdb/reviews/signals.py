@@ -0,0 +1,245 @@
+"""
+Обработчики сигналов моделей приложения отзывов.
+
+Поддерживают денормализованный рейтинг произведений и количество
+комментариев к отзывам в актуальном состоянии при любых изменениях отзывов
+и комментариев, включая каскадное удаление, состав материализованных
+рейтингов, а также поисковые индексы произведений, отзывов, комментариев,
+пользователей, категорий и жанров.
+
+При удалении произведения или отзыва вместе с ним удаляются его отзывы и
+комментарии. Их рейтинг, счетчики и время изменения не обновляются, а
+строки полнотекстового индекса удаляются пачками после удаления
+родителя, поэтому число запросов не растет с каждой дочерней строкой.
+"""
+from collections import defaultdict
+from threading import local
+
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save
+)
+from django.dispatch import receiver
+
+from api_yamdb.constants import RANKING_CATEGORY, RANKING_GENRE
+from .models import Category, Comment, Genre, Review, Title, User
+from .rankings import (
+    add_genre_rankings,
+    remove_genre_rankings,
+    remove_scope_rankings,
+    sync_title_rankings
+)
+from .ratings import (
+    add_score,
+    change_comments_count,
+    remove_score,
+    replace_score
+)
+from .search import FULL_TEXT_INDEXES, NGRAM_INDEXES
+from .utils import batched
+
+SEARCH_REMOVE_BATCH_SIZE = 500
+
+
+class DeletionState(local):
+    """
+    Удаляемые в текущем потоке произведения и отзывы.
+
+    Хранит также первичные ключи удаленных вместе с ними отзывов и
+    комментариев, строки индекса которых еще не удалены. Состояние
+    сбрасывается при начале следующего удаления, поэтому отметки
+    прерванного ошибкой удаления не влияют на последующие.
+    """
+
+    def __init__(self):
+        """Создает пустое состояние."""
+        self.reset()
+
+    def reset(self):
+        """Забывает удаляемые объекты и отложенные строки индекса."""
+        self.parents = defaultdict(set)
+        self.search_pks = defaultdict(list)
+        self.deleting = False
+
+
+deletion_state = DeletionState()
+
+
+def is_deleted(model, pk):
+    """Проверяет, удаляется ли произведение или отзыв в текущем потоке."""
+    return pk in deletion_state.parents[model]
+
+
+def is_cascade_delete(sender, instance):
+    """Проверяет, удаляется ли отзыв или комментарий вместе с родителем."""
+    if sender is Review:
+        return is_deleted(Title, instance.title_id)
+    return is_deleted(Review, instance.review_id)
+
+
+@receiver(pre_delete, sender=Title)
+@receiver(pre_delete, sender=Review)
+def remember_deleted_parent(sender, instance, **kwargs):
+    """Отмечает произведение или отзыв удаляемым."""
+    if deletion_state.deleting:
+        deletion_state.reset()
+    deletion_state.parents[sender].add(instance.pk)
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Comment)
+def forget_deleted_parent(sender, instance, **kwargs):
+    """Снимает отметку удаления с удаленного произведения или отзыва."""
+    deletion_state.deleting = True
+    deletion_state.parents[sender].discard(instance.pk)
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_score(sender, instance, raw=False, **kwargs):
+    """Запоминает оценку и произведение отзыва до его изменения."""
+    instance._previous_score = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_score = (
+        Review.objects.select_for_update()
+        .filter(pk=instance.pk)
+        .values_list('title_id', 'score')
+        .first()
+    )
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, raw=False, **kwargs):
+    """Обновляет рейтинг произведения после сохранения отзыва."""
+    if raw:
+        return
+    previous = getattr(instance, '_previous_score', None)
+    if previous is None:
+        add_score(instance.title_id, instance.score)
+        return
+    previous_title_id, previous_score = previous
+    if previous_title_id == instance.title_id:
+        replace_score(instance.title_id, previous_score, instance.score)
+        return
+    remove_score(previous_title_id, previous_score)
+    add_score(instance.title_id, instance.score)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    """Исключает оценку удаленного отзыва из рейтинга произведения."""
+    if not is_cascade_delete(sender, instance):
+        remove_score(instance.title_id, instance.score)
+
+
+@receiver(post_save, sender=Comment)
+def update_comments_count_on_save(sender, instance, created, raw=False,
+                                  **kwargs):
+    """Учитывает новый комментарий в счетчике комментариев отзыва."""
+    if created and not raw:
+        change_comments_count(instance.review_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def update_comments_count_on_delete(sender, instance, **kwargs):
+    """Исключает удаленный комментарий из счетчика комментариев отзыва."""
+    if not is_cascade_delete(sender, instance):
+        change_comments_count(instance.review_id, -1)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+def update_search_index(sender, instance, using, update_fields=None,
+                        **kwargs):
+    """Обновляет строку полнотекстового индекса объекта."""
+    index = FULL_TEXT_INDEXES[sender]
+    if update_fields is None or set(index.fields) & set(update_fields):
+        index.update([instance], using)
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Comment)
+def remove_search_index(sender, instance, using, **kwargs):
+    """
+    Удаляет строку полнотекстового индекса объекта.
+
+    Строки отзывов и комментариев, удаляемых вместе с родителем,
+    откладываются и удаляются пачками после удаления родителя.
+    """
+    if sender is not Title and is_cascade_delete(sender, instance):
+        deletion_state.search_pks[sender].append(instance.pk)
+        return
+    FULL_TEXT_INDEXES[sender].remove([instance.pk], using)
+    if sender is Comment:
+        return
+    for model in (Review, Comment):
+        pks = deletion_state.search_pks.pop(model, [])
+        for batch in batched(pks, SEARCH_REMOVE_BATCH_SIZE):
+            FULL_TEXT_INDEXES[model].remove(batch, using)
+
+
+def get_ngram_indexes(model):
+    """Возвращает триграммные индексы полей модели."""
+    return [index for index in NGRAM_INDEXES.values() if index.model is model]
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+def update_ngram_index(sender, instance, using, update_fields=None,
+                       **kwargs):
+    """Обновляет триграммы измененных полей объекта."""
+    for index in get_ngram_indexes(sender):
+        if update_fields is None or index.field in update_fields:
+            index.update([instance], using)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+def remove_ngram_index(sender, instance, using, **kwargs):
+    """Удаляет триграммы удаленного объекта."""
+    for index in get_ngram_indexes(sender):
+        index.remove([instance.pk], using)
+
+
+@receiver(post_save, sender=Title)
+def update_title_rankings(sender, instance, **kwargs):
+    """Добавляет произведение в общий рейтинг и рейтинг категории."""
+    sync_title_rankings(instance)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def update_genre_rankings(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    """Изменяет состав рейтингов жанров вместе с жанрами произведения."""
+    if action == 'post_add':
+        add_genre_rankings(
+            (pk, instance.pk) if reverse else (instance.pk, pk)
+            for pk in pk_set
+        )
+    elif action in ('post_remove', 'post_clear'):
+        # При очистке удаляются все связи объекта с другой стороны.
+        others = pk_set if action == 'post_remove' else None
+        if reverse:
+            remove_genre_rankings(title_ids=others, genre_ids=[instance.pk])
+        else:
+            remove_genre_rankings(title_ids=[instance.pk], genre_ids=others)
+
+
+@receiver(post_delete, sender=Category)
+def remove_category_ranking(sender, instance, **kwargs):
+    """Удаляет рейтинг удаленной категории."""
+    remove_scope_rankings(RANKING_CATEGORY, instance.pk)
+
+
+@receiver(post_delete, sender=Genre)
+def remove_genre_ranking(sender, instance, **kwargs):
+    """Удаляет рейтинг удаленного жанра."""
+    remove_scope_rankings(RANKING_GENRE, instance.pk)
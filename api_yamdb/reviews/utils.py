@@ -0,0 +1,23 @@
+"""Вспомогательные функции для массовой загрузки данных."""
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import connection
+
+
+def batched(iterable, size):
+    """Разбивает итерируемый объект на списки длиной не больше size."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def reset_sequences(*models_list):
+    """Сдвигает счетчики первичных ключей после вставки явных id."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models_list)
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
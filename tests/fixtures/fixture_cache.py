@@ -0,0 +1,11 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Очистка базы между тестами не вызывает сигналов, поэтому
+    # закэшированные ответы сбрасываются явно.
+    cache.clear()
+    yield
+    cache.clear()
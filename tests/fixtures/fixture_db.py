@@ -0,0 +1,16 @@
+import pytest
+from django.conf import settings
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix,
+                                 tmp_path_factory):
+    # База SQLite в памяти не допускает записи из нескольких потоков,
+    # поэтому тестовая база хранится во временном файле.
+    for database in settings.DATABASES.values():
+        if database['ENGINE'] != 'django.db.backends.sqlite3':
+            continue
+        database.setdefault('TEST', {})['NAME'] = str(
+            tmp_path_factory.mktemp('db') / 'test.sqlite3'
+        )
+        database.setdefault('OPTIONS', {}).setdefault('timeout', 30)
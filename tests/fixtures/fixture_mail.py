@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture
+def deliver_mail_eagerly(settings):
+    # Письма отправляются сразу после фиксации транзакции, чтобы тесты
+    # проверяли mail.outbox без запуска команды send-mail.
+    settings.MAIL_QUEUE_EAGER = True
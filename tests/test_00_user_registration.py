@@ -11,6 +11,7 @@ from tests.utils import (
 
 
 @pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('deliver_mail_eagerly')
 class Test00UserRegistration:
     URL_SIGNUP = '/api/v1/auth/signup/'
     URL_TOKEN = '/api/v1/auth/token/'
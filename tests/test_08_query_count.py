@@ -0,0 +1,126 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.urls import router_v1
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+# Максимальное число SQL-запросов на один GET-запрос (с учетом запроса
+# аутентификации) для списков и отдельных объектов каждого эндпоинта.
+QUERY_BUDGETS = {
+    'categories': {'list': 3},
+    'genres': {'list': 3},
+    'titles': {'list': 4, 'detail': 3},
+    'reviews': {'list': 3, 'detail': 2},
+    'comments': {'list': 3, 'detail': 2},
+    'users': {'list': 3, 'detail': 2},
+    'search-reviews': {'list': 3},
+    'search-comments': {'list': 3},
+}
+OBJECTS_COUNT = 6
+
+
+def seed_objects(count):
+    categories = [
+        Category.objects.create(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(count)
+    ]
+    genres = [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(count)
+    ]
+    titles = []
+    for i in range(count):
+        title = Title.objects.create(
+            name=f'Произведение {i}', year=2000, category=categories[i]
+        )
+        title.genre.set(genres[:2])
+        titles.append(title)
+    authors = [
+        User.objects.create(username=f'author-{i}', email=f'a{i}@yamdb.fake')
+        for i in range(count)
+    ]
+    reviews = [
+        Review.objects.create(
+            title=titles[0], author=author, text='Отзыв', score=5
+        )
+        for author in authors
+    ]
+    for author in authors:
+        Comment.objects.create(
+            review=reviews[0], author=author, text='Комментарий'
+        )
+    return {
+        'categories': categories[0].slug,
+        'genres': genres[0].slug,
+        'titles': titles[0].pk,
+        'reviews': reviews[0].pk,
+        'comments': reviews[0].comments.first().pk,
+        'users': authors[0].username,
+        'title_id': titles[0].pk,
+        'review_id': reviews[0].pk,
+    }
+
+
+def build_list_url(prefix, objects):
+    path = re.sub(
+        r'\(\?P<(\w+)>[^)]+\)',
+        lambda match: str(objects[match.group(1)]),
+        prefix
+    )
+    return f'/api/v1/{path}/'
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос администратора к `{url}` возвращает '
+        'ответ со статусом 200.'
+    )
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08QueryCount:
+
+    def test_01_budgets_cover_router(self):
+        basenames = {basename for _, _, basename in router_v1.registry}
+        assert basenames == set(QUERY_BUDGETS), (
+            'Для каждого эндпоинта из `router_v1` должен быть задан бюджет '
+            'SQL-запросов в `QUERY_BUDGETS`.'
+        )
+
+    def test_02_list_queries_do_not_depend_on_page_size(self, admin_client):
+        objects = seed_objects(OBJECTS_COUNT)
+        for prefix, _, basename in router_v1.registry:
+            url = build_list_url(prefix, objects)
+            single = count_queries(admin_client, f'{url}?limit=1')
+            full = count_queries(admin_client, f'{url}?limit={OBJECTS_COUNT}')
+            assert single == full, (
+                f'Число SQL-запросов к `{url}` растет вместе с размером '
+                f'страницы: {single} для одного объекта и {full} для '
+                f'{OBJECTS_COUNT}. Проверьте `select_related` и '
+                '`prefetch_related`.'
+            )
+            budget = QUERY_BUDGETS[basename]['list']
+            assert full <= budget, (
+                f'GET-запрос к `{url}` выполняет {full} SQL-запросов, '
+                f'бюджет - {budget}.'
+            )
+
+    def test_03_detail_queries_within_budget(self, admin_client):
+        objects = seed_objects(OBJECTS_COUNT)
+        for prefix, viewset, basename in router_v1.registry:
+            if not hasattr(viewset, 'retrieve'):
+                continue
+            url = f'{build_list_url(prefix, objects)}{objects[basename]}/'
+            queries = count_queries(admin_client, url)
+            budget = QUERY_BUDGETS[basename]['detail']
+            assert queries <= budget, (
+                f'GET-запрос к `{url}` выполняет {queries} SQL-запросов, '
+                f'бюджет - {budget}.'
+            )
@@ -0,0 +1,78 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from api.benchmark import compare_reports, run_benchmark
+from api.urls import router_v1
+from reviews.generator import DatasetGenerator
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09Benchmark:
+
+    def test_01_report_covers_every_route(self):
+        DatasetGenerator(
+            users=4, categories=1, genres=2, titles=3, reviews=6, comments=6
+        ).generate()
+        report = run_benchmark(repeat=2)
+        endpoints = report['endpoints']
+        for _, _, basename in router_v1.registry:
+            assert f'{basename}-list' in endpoints, (
+                f'Отчет о производительности не содержит `{basename}-list`.'
+            )
+        assert {'auth-signup', 'auth-token'} <= set(endpoints), (
+            'Отчет о производительности должен содержать эндпоинты '
+            'аутентификации.'
+        )
+        for name, metrics in endpoints.items():
+            assert metrics['status'] == HTTPStatus.OK, (
+                f'Эндпоинт `{name}` вернул статус {metrics["status"]}.'
+            )
+            assert metrics['p50_ms'] <= metrics['p95_ms']
+        assert report['dataset']['titles'] == 3
+
+    def test_02_compare_reports_detects_regressions(self):
+        previous = {'endpoints': {
+            'titles-list': {'queries': 4, 'p95_ms': 10.0},
+        }}
+        current = {'endpoints': {
+            'titles-list': {'queries': 5, 'p95_ms': 11.0},
+        }}
+        regressions = compare_reports(previous, current, tolerance=0.2)
+        assert len(regressions) == 1
+        current['endpoints']['titles-list']['p95_ms'] = 13.0
+        assert len(compare_reports(previous, current, tolerance=0.2)) == 2
+
+    def test_03_skips_endpoints_without_data(self):
+        DatasetGenerator(
+            users=2, categories=1, genres=1, titles=2, reviews=0, comments=0
+        ).generate()
+        report = run_benchmark(repeat=1)
+        assert {
+            'reviews-detail', 'reviews-update', 'comments-list',
+            'comments-detail', 'comments-update'
+        } <= set(report['skipped']), (
+            'Проверьте, что эндпоинты, для которых нет объектов в базе '
+            'данных, пропускаются и перечисляются в отчете.'
+        )
+        assert 'reviews-list' in report['endpoints']
+        assert not set(report['skipped']) & set(report['endpoints'])
+        for name, metrics in report['endpoints'].items():
+            assert metrics['status'] == HTTPStatus.OK, (
+                f'Эндпоинт `{name}` вернул статус {metrics["status"]}.'
+            )
+
+    def test_04_empty_database(self):
+        report = run_benchmark(repeat=1)
+        assert 'titles-list' in report['endpoints']
+        assert 'titles-detail' in report['skipped']
+        for name, metrics in report['endpoints'].items():
+            assert metrics['status'] == HTTPStatus.OK, (
+                f'Эндпоинт `{name}` вернул статус {metrics["status"]}.'
+            )
+
+    def test_05_repeat_must_be_positive(self):
+        with pytest.raises(CommandError):
+            call_command('benchmark-api', repeat=0, stdout=StringIO())
@@ -0,0 +1,58 @@
+import csv
+import json
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10Export:
+
+    EXPORT_URL_TEMPLATE = '/api/v1/export/{dataset}/'
+
+    def test_01_export_admin_only(self, client, user_client, admin_client):
+        url = self.EXPORT_URL_TEMPLATE.format(dataset='titles')
+        assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED, (
+            f'Проверьте, что GET-запрос неавторизованного пользователя к '
+            f'`{url}` возвращает ответ со статусом 401.'
+        )
+        assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что GET-запрос пользователя с ролью `user` к '
+            f'`{url}` возвращает ответ со статусом 403.'
+        )
+        response = admin_client.get(
+            self.EXPORT_URL_TEMPLATE.format(dataset='unknown')
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_export_csv_and_ndjson(self, admin_client, admin, user,
+                                      user_client):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        response = admin_client.get(
+            self.EXPORT_URL_TEMPLATE.format(dataset='titles')
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming, (
+            'Выгрузка должна возвращаться потоковым ответом.'
+        )
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(content.splitlines()))
+        assert len(rows) == len(titles)
+        rated = next(row for row in rows if int(row['id']) == titles[0]['id'])
+        assert float(rated['rating']) == 5
+        assert rated['rating_count'] == str(len(reviews))
+
+        response = admin_client.get(
+            self.EXPORT_URL_TEMPLATE.format(dataset='reviews'),
+            {'file_format': 'ndjson'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        exported = [json.loads(line) for line in lines]
+        assert {row['id'] for row in exported} == {
+            review['id'] for review in reviews
+        }
@@ -0,0 +1,135 @@
+import json
+from base64 import urlsafe_b64encode
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+from reviews.models import Category, Comment, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11KeysetPagination:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    TITLES_URL = '/api/v1/titles/'
+
+    def create_reviews(self, django_user_model, count):
+        title = Title.objects.create(
+            name='Произведение', year=2000,
+            category=Category.objects.create(name='Фильм', slug='film')
+        )
+        for number in range(count):
+            Review.objects.create(
+                title=title, score=number % 10 + 1, text=f'Отзыв {number}',
+                author=django_user_model.objects.create(
+                    username=f'author{number}',
+                    email=f'author{number}@yamdb.fake'
+                )
+            )
+        # Половина отзывов с одинаковой датой проверяет порядок по id.
+        Review.objects.filter(id__in=Review.objects.order_by('id').values(
+            'id'
+        )[:count // 2]).update(pub_date=timezone.now())
+        return title
+
+    def walk(self, client, url, key):
+        pages = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+                'статусом 200.'
+            )
+            data = response.json()
+            assert 'count' not in data, (
+                'Ответ пагинации по ключу не должен содержать `count`, '
+                'чтобы не выполнять COUNT(*).'
+            )
+            pages.append([obj[key] for obj in data['results']])
+            url = data['next']
+        return pages
+
+    def test_01_reviews_pages_follow_ordering(self, client,
+                                              django_user_model):
+        title = self.create_reviews(django_user_model, 11)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        pages = self.walk(client, f'{url}?cursor=&limit=3', 'id')
+        expected = list(
+            Review.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )
+        )
+        assert [len(page) for page in pages] == [3, 3, 3, 2], (
+            'Проверьте, что пагинация по ключу возвращает страницы размера '
+            '`limit`.'
+        )
+        assert sum(pages, []) == expected, (
+            'Проверьте, что пагинация по ключу возвращает все отзывы без '
+            'пропусков и повторов в порядке (-pub_date, -id).'
+        )
+
+    def test_02_previous_link(self, client, django_user_model):
+        title = self.create_reviews(django_user_model, 7)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        first = client.get(f'{url}?cursor=&limit=3').json()
+        assert first['previous'] is None
+        second = client.get(first['next']).json()
+        back = client.get(second['previous']).json()
+        assert back['results'] == first['results'], (
+            'Проверьте, что ссылка `previous` ведет на предыдущую страницу.'
+        )
+
+    def test_03_titles_and_default_mode(self, client, django_user_model):
+        self.create_reviews(django_user_model, 1)
+        Title.objects.create(name='Альфа', year=2001)
+        Title.objects.create(name='Альфа', year=2002)
+        pages = self.walk(client, f'{self.TITLES_URL}?cursor=&limit=2', 'id')
+        assert sum(pages, []) == list(
+            Title.objects.order_by('name', 'id').values_list('id', flat=True)
+        )
+        data = client.get(self.TITLES_URL).json()
+        assert data['count'] == 3, (
+            'Без параметра `cursor` должна использоваться пагинация '
+            'limit/offset.'
+        )
+
+    def test_04_invalid_cursor(self, client, django_user_model):
+        title = self.create_reviews(django_user_model, 1)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        response = client.get(url, {'cursor': 'broken'})
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что неверный курсор возвращает ответ со статусом 404.'
+        )
+        cursor = urlsafe_b64encode(
+            json.dumps({'v': ['2000-01-01T00:00:00+00:00'], 'r': False})
+            .encode()
+        ).decode()
+        response = client.get(url, {'cursor': cursor})
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что курсор с неверным числом значений возвращает '
+            'ответ со статусом 404.'
+        )
+
+    def test_05_comments_follow_next_links(self, client, django_user_model):
+        title = self.create_reviews(django_user_model, 1)
+        review = title.reviews.get()
+        for number in range(5):
+            Comment.objects.create(
+                review=review, author=review.author,
+                text=f'Комментарий {number}'
+            )
+        url = (
+            f'{self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)}'
+            f'{review.id}/comments/?cursor=&limit=2'
+        )
+        pages = self.walk(client, url, 'id')
+        assert [len(page) for page in pages] == [2, 2, 1], (
+            'Проверьте, что ссылки `next` пагинации по ключу ведут на '
+            'следующие страницы.'
+        )
+        assert sum(pages, []) == list(
+            Comment.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )
+        )
@@ -0,0 +1,146 @@
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review
+from reviews.ratings import find_inconsistent_comments_counts
+from tests.utils import (
+    create_comments,
+    create_reviews,
+    create_single_comment,
+    create_titles
+)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12CountModes:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    @staticmethod
+    def count_queries(client, url, data=None):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, data)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+            'статусом 200.'
+        )
+        counts = [
+            query['sql'] for query in context.captured_queries
+            if 'COUNT(' in query['sql'].upper()
+        ]
+        return response.json(), counts
+
+    def test_01_reviews_count_from_counter(self, client, admin_client, admin,
+                                           user, user_client):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        data, counts = self.count_queries(client, url)
+        assert data['count'] == len(reviews)
+        assert not counts, (
+            'Количество отзывов должно браться из счетчика произведения, '
+            'а не вычисляться запросом COUNT(*).'
+        )
+
+    def test_02_estimate_and_none(self, client, admin_client):
+        create_titles(admin_client)
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        data, counts = self.count_queries(
+            client, self.TITLES_URL, {'count': 'estimate', 'limit': 1}
+        )
+        assert data['count'] == 2 and len(counts) == 1
+        data, counts = self.count_queries(
+            client, self.TITLES_URL, {'count': 'estimate', 'limit': 1}
+        )
+        assert data['count'] == 2 and not counts, (
+            'Проверьте, что приблизительное количество кэшируется.'
+        )
+        data, counts = self.count_queries(
+            client, self.TITLES_URL, {'count': 'none', 'limit': 1}
+        )
+        assert data['count'] is None and not counts, (
+            'При `count=none` количество не должно вычисляться.'
+        )
+        assert data['next'] and len(data['results']) == 1
+        data = client.get(data['next']).json()
+        assert data['next'] is None and len(data['results']) == 1, (
+            'Проверьте, что при `count=none` ссылка `next` отсутствует на '
+            'последней странице.'
+        )
+        response = client.get(self.TITLES_URL, {'count': 'wrong'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_comments_counter(self, admin_client, admin, user,
+                                 user_client):
+        _, reviews, _ = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        review = Review.objects.get(pk=reviews[0]['id'])
+        assert review.comments_count == review.comments.count() == 2, (
+            'Проверьте, что счетчик комментариев увеличивается при создании '
+            'комментария.'
+        )
+        Comment.objects.filter(review=review).first().delete()
+        review.refresh_from_db()
+        assert review.comments_count == 1, (
+            'Проверьте, что счетчик комментариев уменьшается при удалении '
+            'комментария.'
+        )
+        Review.objects.filter(pk=review.pk).update(comments_count=10)
+        call_command('rebuild-ratings')
+        review.refresh_from_db()
+        assert review.comments_count == 1
+
+    def test_04_stale_review_save_keeps_counter(self, admin_client, admin,
+                                                user, user_client):
+        _, reviews, _ = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        review = Review.objects.get(pk=reviews[0]['id'])
+        create_single_comment(
+            user_client, review.title_id, review.pk, 'Комментарий'
+        )
+        review.text = 'Новый текст'
+        review.save()
+        assert not find_inconsistent_comments_counts().exists(), (
+            'Проверьте, что сохранение ранее загруженного отзыва не '
+            'затирает его счетчик комментариев, измененный после загрузки.'
+        )
+        review.refresh_from_db()
+        assert review.text == 'Новый текст'
+        assert review.comments_count == review.comments.count() == 3
+
+    def test_05_estimate_uses_response_cache(self, client, admin_client,
+                                             settings):
+        create_titles(admin_client)
+        settings.CACHES = {
+            **settings.CACHES,
+            'responses': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'test-12-responses',
+            },
+        }
+        settings.RESPONSE_CACHE_ALIAS = 'responses'
+        caches['responses'].clear()
+        caches['default'].clear()
+        self.count_queries(
+            client, self.TITLES_URL, {'count': 'estimate', 'limit': 1}
+        )
+        assert any(
+            key.startswith(':1:pagination-count:')
+            for key in caches['responses']._cache
+        ), (
+            'Проверьте, что приблизительное количество хранится в кэше '
+            'RESPONSE_CACHE_ALIAS.'
+        )
+        assert not any(
+            'pagination-count:' in key for key in caches['default']._cache
+        )
@@ -0,0 +1,119 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.generator import DatasetGenerator
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    Review,
+    Title,
+    TitleRanking
+)
+
+# Таблицы, размер которых растет вместе с данными: полный просмотр любой
+# из них в запросах эндпоинта недопустим.
+LARGE_TABLES = {
+    Title._meta.db_table,
+    Title.genre.through._meta.db_table,
+    Review._meta.db_table,
+    Comment._meta.db_table,
+    TitleRanking._meta.db_table,
+}
+FULL_SCAN = {
+    'sqlite': re.compile(r'^SCAN (\w+)$'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+SORT = {
+    'sqlite': 'USE TEMP B-TREE FOR ORDER BY',
+    'postgresql': 'Sort Key:',
+}
+
+
+def explain(sql):
+    """Возвращает строки плана выполнения запроса."""
+    prefix = 'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else (
+        'EXPLAIN'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'{prefix} {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13Explain:
+
+    @pytest.fixture
+    def dataset(self):
+        DatasetGenerator(
+            users=20, categories=3, genres=5, titles=30, reviews=200,
+            comments=200, seed=1
+        ).generate()
+        review = Review.objects.order_by('id').first()
+        return {
+            'title_id': review.title_id,
+            'review_id': review.id,
+            'year': review.title.year,
+            'category': Category.objects.order_by('id').first().slug,
+            'genre': Genre.objects.order_by('id').first().slug,
+        }
+
+    @pytest.mark.parametrize('url, sorted_by_index', (
+        ('/api/v1/titles/', True),
+        ('/api/v1/titles/?year={year}', True),
+        ('/api/v1/titles/?category={category}', True),
+        ('/api/v1/titles/?genre={genre}', False),
+        ('/api/v1/titles/?cursor=', True),
+        ('/api/v1/titles/?ordering=-rating', True),
+        ('/api/v1/titles/?ordering=rating&category={category}', True),
+        ('/api/v1/titles/?ordering=-reviews_count&genre={genre}', True),
+        ('/api/v1/titles/{title_id}/', True),
+        ('/api/v1/titles/{title_id}/reviews/', True),
+        ('/api/v1/titles/{title_id}/reviews/?cursor=', True),
+        ('/api/v1/titles/{title_id}/reviews/{review_id}/', True),
+        ('/api/v1/titles/{title_id}/reviews/{review_id}/comments/', True),
+        ('/api/v1/titles/{title_id}/reviews/{review_id}/comments/?cursor=',
+         True),
+    ))
+    def test_01_no_full_table_scans(self, client, dataset, url,
+                                    sorted_by_index):
+        if connection.vendor not in FULL_SCAN:
+            pytest.skip('Разбор плана запроса не поддерживается для СУБД.')
+        if connection.vendor == 'postgresql':
+            # На маленькой тестовой базе планировщик всегда выбирает
+            # последовательный просмотр, если он разрешен.
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+        url = url.format(**dataset)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+        ]
+        for sql in queries:
+            plan = explain(sql)
+            scanned = {
+                match.group(1) for match in map(
+                    FULL_SCAN[connection.vendor].search, plan
+                ) if match
+            } & LARGE_TABLES
+            assert not scanned, (
+                f'Запрос эндпоинта `{url}` просматривает таблицы '
+                f'{", ".join(sorted(scanned))} целиком: {sql}'
+            )
+        # Основной запрос - выборка страницы, последний запрос с LIMIT.
+        main_query = [sql for sql in queries if 'LIMIT' in sql][-1]
+        if sorted_by_index:
+            assert not any(
+                SORT[connection.vendor] in line
+                for line in explain(main_query)
+            ), (
+                f'Основной запрос эндпоинта `{url}` должен получать строки '
+                f'в порядке индекса, без сортировки: {main_query}'
+            )
@@ -0,0 +1,105 @@
+from http import HTTPStatus
+
+import pytest
+
+from api.cache import title_cache
+from reviews.models import Category, Genre, Title
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14TitleCache:
+
+    TITLE_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    STATS_URL = '/api/v1/cache/stats/'
+
+    def get_title(self, client, title_id):
+        response = client.get(self.TITLE_URL_TEMPLATE.format(
+            title_id=title_id
+        ))
+        assert response.status_code == HTTPStatus.OK
+        return response.json()
+
+    def test_01_cache_hit_without_queries(self, client, admin_client,
+                                          django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        first = self.get_title(client, title_id)
+        with django_assert_num_queries(0):
+            second = self.get_title(client, title_id)
+        assert first == second, (
+            'Проверьте, что из кэша возвращаются те же данные произведения.'
+        )
+        response = admin_client.get(self.STATS_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['title'] == {'hits': 1, 'misses': 1}
+        assert client.get(self.STATS_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+        assert admin_client.delete(self.STATS_URL).status_code == (
+            HTTPStatus.NO_CONTENT
+        )
+        assert admin_client.get(self.STATS_URL).json()['title'] == {
+            'hits': 0, 'misses': 0
+        }
+
+    def test_02_invalidation(self, client, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        assert self.get_title(client, title_id)['rating'] is None
+
+        create_single_review(user_client, title_id, 'Отзыв', 7)
+        assert self.get_title(client, title_id)['rating'] == 7, (
+            'Проверьте, что кэш произведения сбрасывается при создании '
+            'отзыва.'
+        )
+
+        title = Title.objects.get(pk=title_id)
+        genre = title.genre.first()
+        genre.name = 'Новое название жанра'
+        genre.save()
+        assert genre.name in [
+            item['name'] for item in self.get_title(client, title_id)['genre']
+        ], 'Проверьте, что кэш сбрасывается при изменении жанра.'
+
+        for genre in title.genre.all():
+            genre.titles.clear()
+        assert self.get_title(client, title_id)['genre'] == [], (
+            'Проверьте, что кэш сбрасывается при изменении жанров '
+            'произведения.'
+        )
+        title.genre.add(Genre.objects.first())
+        assert len(self.get_title(client, title_id)['genre']) == 1
+
+        Category.objects.filter(pk=title.category_id).get().delete()
+        assert self.get_title(client, title_id)['category'] is None, (
+            'Проверьте, что кэш сбрасывается при удалении категории.'
+        )
+
+        response = admin_client.patch(
+            self.TITLE_URL_TEMPLATE.format(title_id=title_id),
+            data={'name': 'Новое название'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_title(client, title_id)['name'] == 'Новое название'
+
+    def test_03_stale_data_not_cached_after_change(self, client,
+                                                   admin_client,
+                                                   monkeypatch):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        cache_set = title_cache.set
+
+        def set_after_change(pk, data, generation):
+            title = Title.objects.get(pk=pk)
+            title.name = 'Новое название'
+            title.save()
+            cache_set(pk, data, generation)
+
+        monkeypatch.setattr(title_cache, 'set', set_after_change)
+        assert self.get_title(client, title_id)['name'] != 'Новое название'
+        monkeypatch.setattr(title_cache, 'set', cache_set)
+        assert self.get_title(client, title_id)['name'] == 'Новое название', (
+            'Проверьте, что данные, прочитанные запросом до изменения '
+            'произведения и сохраненные в кэше после него, не возвращаются.'
+        )
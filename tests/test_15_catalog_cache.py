@@ -0,0 +1,80 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Genre
+from tests.utils import create_categories, create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15CatalogCache:
+
+    @pytest.mark.parametrize('url, create', (
+        ('/api/v1/categories/', create_categories),
+        ('/api/v1/genres/', create_genre),
+    ))
+    def test_01_etag_and_not_modified(self, client, admin_client,
+                                      django_assert_num_queries, url,
+                                      create):
+        create(admin_client)
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        etag = response['ETag']
+        assert etag.startswith('"'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит сильный '
+            'ETag.'
+        )
+        with django_assert_num_queries(0):
+            cached = client.get(url)
+            not_modified = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert cached.json() == response.json()
+        assert cached['ETag'] == etag
+        assert not_modified.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с заголовком '
+            '`If-None-Match`, совпадающим с ETag, возвращает ответ со '
+            'статусом 304.'
+        )
+        assert not not_modified.content
+        assert not_modified['ETag'] == etag
+
+        searched = client.get(url, {'search': 'а'})
+        assert searched.json() != response.json()
+        assert searched['ETag'] != etag, (
+            'Проверьте, что списки с разными параметрами запроса кэшируются '
+            'отдельно.'
+        )
+
+        response = admin_client.post(
+            url, data={'name': 'Новый', 'slug': 'new'}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после создания объекта список перестает '
+            'отдаваться из кэша.'
+        )
+        assert 'new' in [item['slug'] for item in response.json()['results']]
+        etag = response['ETag']
+
+        assert admin_client.delete(f'{url}new/').status_code == (
+            HTTPStatus.NO_CONTENT
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после удаления объекта список перестает '
+            'отдаваться из кэша.'
+        )
+        assert 'new' not in [
+            item['slug'] for item in response.json()['results']
+        ]
+
+    def test_02_changes_outside_api(self, client, admin_client):
+        create_genre(admin_client)
+        url = '/api/v1/genres/'
+        etag = client.get(url)['ETag']
+        Genre.objects.filter(slug='horror').get().delete()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert 'horror' not in [
+            item['slug'] for item in response.json()['results']
+        ]
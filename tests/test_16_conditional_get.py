@@ -0,0 +1,163 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.utils.http import http_date
+
+from reviews.models import Comment, Review, Title, User
+from tests.utils import (
+    create_comments,
+    create_single_comment,
+    create_single_review
+)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16ConditionalGet:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    REVIEW_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    @pytest.fixture
+    def urls(self, admin_client, admin, user, user_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        ids = {'title_id': titles[0]['id'], 'review_id': reviews[0]['id']}
+        return {
+            'reviews': self.REVIEWS_URL_TEMPLATE.format(**ids),
+            'review': self.REVIEW_URL_TEMPLATE.format(**ids),
+            'comments': self.COMMENTS_URL_TEMPLATE.format(**ids),
+        }
+
+    @pytest.mark.parametrize('name', ('reviews', 'review', 'comments'))
+    def test_01_not_modified_with_single_query(self, client, urls, name,
+                                               django_assert_num_queries):
+        url = urls[name]
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert 'ETag' in response and 'Last-Modified' in response, (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки `ETag` и `Last-Modified`.'
+        )
+        with django_assert_num_queries(2):
+            by_etag = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            by_date = client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+        assert by_etag.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с совпадающим '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+        assert by_date.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с `If-Modified-Since` не '
+            'раньше `Last-Modified` возвращает ответ со статусом 304.'
+        )
+        assert not by_etag.content
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(0))
+        assert response.status_code == HTTPStatus.OK
+
+    def test_02_changes_update_etag(self, client, admin_client, user_client,
+                                    urls):
+        etags = {name: client.get(url)['ETag'] for name, url in urls.items()}
+        response = user_client.post(urls['comments'], data={'text': 'Новый'})
+        assert response.status_code == HTTPStatus.CREATED
+        response = client.get(
+            urls['comments'], HTTP_IF_NONE_MATCH=etags['comments']
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после создания комментария ETag списка '
+            'комментариев меняется.'
+        )
+        assert client.get(
+            urls['reviews'], HTTP_IF_NONE_MATCH=etags['reviews']
+        ).status_code == HTTPStatus.NOT_MODIFIED, (
+            'Комментарий не меняет список отзывов, ETag должен сохраниться.'
+        )
+
+        response = admin_client.patch(urls['review'], data={'text': 'Новый'})
+        assert response.status_code == HTTPStatus.OK
+        for name in ('reviews', 'review'):
+            response = client.get(urls[name], HTTP_IF_NONE_MATCH=etags[name])
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что после изменения отзыва ETag отзывов '
+                'произведения меняется.'
+            )
+
+        etag = client.get(urls['comments'])['ETag']
+        Comment.objects.first().delete()
+        assert client.get(
+            urls['comments'], HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.OK
+
+        etag = client.get(urls['comments'])['ETag']
+        user = User.objects.get(username='TestUser')
+        user.username = 'RenamedUser'
+        user.save()
+        assert client.get(
+            urls['comments'], HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение автора меняет ETag, так как ответ '
+            'содержит имя автора.'
+        )
+
+    @pytest.mark.parametrize('header', ('*', '"etag"'))
+    @pytest.mark.parametrize('url', (
+        '/api/v1/titles/99999/reviews/',
+        '/api/v1/titles/99999/reviews/1/',
+        '/api/v1/titles/99999/reviews/1/comments/',
+    ))
+    def test_03_missing_parent_not_found(self, client, urls, url, header):
+        response = client.get(url, HTTP_IF_NONE_MATCH=header)
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            f'Проверьте, что GET-запрос к `{url}` с заголовком '
+            '`If-None-Match` для несуществующего ресурса возвращает ответ '
+            'со статусом 404.'
+        )
+
+    @pytest.mark.parametrize('name', ('reviews', 'review', 'comments'))
+    def test_04_any_etag_matches_existing(self, client, urls, name):
+        response = client.get(urls[name], HTTP_IF_NONE_MATCH='*')
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{urls[name]}` с '
+            '`If-None-Match: *` для существующего ресурса возвращает ответ '
+            'со статусом 304.'
+        )
+
+    @pytest.mark.parametrize('name', ('reviews', 'review', 'comments'))
+    def test_05_etag_does_not_depend_on_cache(self, client, urls, name):
+        etag = client.get(urls[name])['ETag']
+        cache.clear()
+        response = client.get(urls[name], HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что ETag отзывов и комментариев вычисляется по '
+            'данным базы данных и одинаков во всех процессах приложения '
+            'независимо от содержимого кэша.'
+        )
+
+    def test_06_stale_parent_save_keeps_stamp(self, client, urls,
+                                              moderator_client, user_client):
+        review = Review.objects.get(pk=urls['comments'].split('/')[-3])
+        title = Title.objects.get(pk=review.title_id)
+        etags = {
+            name: client.get(urls[name])['ETag']
+            for name in ('reviews', 'comments')
+        }
+        create_single_review(moderator_client, title.pk, 'Отзыв', 7)
+        create_single_comment(
+            user_client, title.pk, review.pk, 'Комментарий'
+        )
+        review.text = 'Новый текст'
+        review.save()
+        title.name = 'Новое название'
+        title.save()
+        for name, etag in etags.items():
+            response = client.get(urls[name], HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что сохранение ранее загруженного произведения '
+                'или отзыва не возвращает время изменения его отзывов или '
+                'комментариев к прежнему значению.'
+            )
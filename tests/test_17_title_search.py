@@ -0,0 +1,76 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from reviews.models import Title
+from reviews.search import TITLE_SEARCH_INDEX
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17TitleSearch:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def search(self, client, text, **params):
+        response = client.get(self.TITLES_URL, {'search': text, **params})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` с параметром '
+            '`search` возвращает ответ со статусом 200.'
+        )
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search_and_ranking(self, client):
+        Title.objects.create(
+            name='Марсианские хроники', year=1950,
+            description='Рассказы о колонизации Марса.'
+        )
+        Title.objects.create(
+            name='Война миров', year=1898,
+            description='Нашествие марсиан на Землю.'
+        )
+        Title.objects.create(name='Винни-Пух', year=1926)
+        assert self.search(client, 'марсиан') == [
+            'Марсианские хроники', 'Война миров'
+        ], (
+            'Проверьте, что поиск находит слова по началу в названии и '
+            'описании, а совпадения в названии идут первыми.'
+        )
+        assert self.search(client, 'марсиан землю') == ['Война миров'], (
+            'Проверьте, что поиск возвращает произведения, содержащие все '
+            'слова запроса.'
+        )
+        assert self.search(client, 'пух', year=1926) == ['Винни-Пух']
+        assert self.search(client, 'пух', year=1950) == []
+        assert len(self.search(client, '"*(')) == 3, (
+            'Запрос без слов не должен фильтровать произведения.'
+        )
+
+    def test_02_index_follows_changes(self, client, admin_client):
+        title = Title.objects.create(name='Черновик', year=2000)
+        assert self.search(client, 'черновик') == ['Черновик']
+        title.name = 'Окончательное название'
+        title.save()
+        assert self.search(client, 'черновик') == [], (
+            'Проверьте, что индекс обновляется при изменении произведения.'
+        )
+        assert self.search(client, 'окончательн') == [
+            'Окончательное название'
+        ]
+        response = admin_client.delete(f'{self.TITLES_URL}{title.id}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.search(client, 'окончательн') == [], (
+            'Проверьте, что индекс обновляется при удалении произведения.'
+        )
+
+    def test_03_rebuild_command(self, client):
+        if not TITLE_SEARCH_INDEX.is_supported(connection):
+            pytest.skip('СУБД не поддерживает полнотекстовый индекс.')
+        Title.objects.bulk_create([Title(name='Без сигналов', year=2000)])
+        assert self.search(client, 'сигналов') == []
+        call_command('rebuild-search-index')
+        assert self.search(client, 'сигналов') == ['Без сигналов'], (
+            'Проверьте, что команда rebuild-search-index перестраивает '
+            'индекс.'
+        )
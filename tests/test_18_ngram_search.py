@@ -0,0 +1,75 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Category, Genre, SearchNGram, User
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18NGramSearch:
+
+    def search(self, client, url, text):
+        response = client.get(url, {'search': text})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` с параметром `search` '
+            'возвращает ответ со статусом 200.'
+        )
+        return sorted(item['slug'] for item in response.json()['results'])
+
+    def test_01_substring_and_prefix(self, client):
+        url = '/api/v1/genres/'
+        for name, slug in (
+            ('Научная фантастика', 'sci-fi'),
+            ('Фэнтези', 'fantasy'),
+            ('Антиутопия', 'dystopia'),
+        ):
+            Genre.objects.create(name=name, slug=slug)
+        assert self.search(client, url, 'ФАНТАС') == ['sci-fi'], (
+            'Проверьте, что поиск находит подстроку названия без учета '
+            'регистра.'
+        )
+        assert self.search(client, url, 'утоп') == ['dystopia']
+        assert self.search(client, url, 'фа') == ['sci-fi'], (
+            'Проверьте, что слова короче трех символов ищутся по началу '
+            'слов названия.'
+        )
+        assert self.search(client, url, 'Ф') == ['fantasy', 'sci-fi']
+        assert self.search(client, url, 'научнаучн') == [], (
+            'Проверьте, что найденные по триграммам кандидаты проверяются '
+            'на вхождение всего слова.'
+        )
+        assert self.search(client, url, 'научная фантаст') == ['sci-fi']
+        assert self.search(client, url, 'научная фэнтези') == [], (
+            'Проверьте, что результат содержит все слова запроса.'
+        )
+
+    def test_02_index_follows_changes(self, admin_client):
+        url = '/api/v1/categories/'
+        category = Category.objects.create(name='Комиксы', slug='comics')
+        assert self.search(admin_client, url, 'комикс') == ['comics']
+        category.name = 'Графические романы'
+        category.save()
+        assert self.search(admin_client, url, 'комикс') == [], (
+            'Проверьте, что индекс обновляется при изменении объекта.'
+        )
+        assert self.search(admin_client, url, 'роман') == ['comics']
+        category.delete()
+        assert not SearchNGram.objects.filter(
+            source='reviews.category.name'
+        ).exists(), 'Проверьте, что индекс очищается при удалении объекта.'
+
+    def test_03_users_and_rebuild(self, admin_client, admin):
+        User.objects.bulk_create([
+            User(username='bulk_reader', email='bulk@yamdb.fake')
+        ])
+        response = admin_client.get('/api/v1/users/', {'search': 'reader'})
+        assert response.json()['results'] == []
+        call_command('rebuild-search-index')
+        response = admin_client.get('/api/v1/users/', {'search': 'reader'})
+        assert [
+            user['username'] for user in response.json()['results']
+        ] == ['bulk_reader'], (
+            'Проверьте, что команда rebuild-search-index перестраивает '
+            'триграммный индекс пользователей.'
+        )
@@ -0,0 +1,192 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.generator import DatasetGenerator
+from reviews.models import Comment, Review
+from reviews.search import REVIEW_SEARCH_INDEX
+from tests.test_13_explain import FULL_SCAN, LARGE_TABLES, SORT, explain
+from tests.utils import (
+    create_single_comment,
+    create_single_review,
+    create_titles
+)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19TextSearch:
+
+    REVIEWS_URL = '/api/v1/search/reviews/'
+    COMMENTS_URL = '/api/v1/search/comments/'
+
+    def search(self, client, url, **params):
+        response = client.get(url, params)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос модератора к `{url}` с параметром '
+            '`search` возвращает ответ со статусом 200.'
+        )
+        return [item['id'] for item in response.json()['results']]
+
+    def test_01_permissions(self, client, user_client, moderator_client,
+                            admin_client):
+        for url in (self.REVIEWS_URL, self.COMMENTS_URL):
+            assert client.get(url, {'search': 'спам'}).status_code == (
+                HTTPStatus.UNAUTHORIZED
+            )
+            assert user_client.get(url, {'search': 'спам'}).status_code == (
+                HTTPStatus.FORBIDDEN
+            ), (
+                f'Проверьте, что поиск `{url}` недоступен обычному '
+                'пользователю.'
+            )
+            assert admin_client.get(url, {'search': 'спам'}).status_code == (
+                HTTPStatus.OK
+            )
+            assert moderator_client.get(url).status_code == HTTPStatus.OK
+
+    def test_02_review_search_and_filters(self, admin_client, user_client,
+                                          moderator_client, user):
+        titles, _, _ = create_titles(admin_client)
+        first = create_single_review(
+            user_client, titles[0]['id'], 'Спам спам и реклама казино', 1
+        ).json()['id']
+        second = create_single_review(
+            admin_client, titles[0]['id'], 'Хороший фильм, немного спама', 9
+        ).json()['id']
+        third = create_single_review(
+            user_client, titles[1]['id'], 'Реклама в каждом кадре', 3
+        ).json()['id']
+        assert self.search(
+            moderator_client, self.REVIEWS_URL, search='спам'
+        ) == [first, second], (
+            'Проверьте, что поиск по отзывам находит слова по началу и '
+            'упорядочивает результаты по релевантности.'
+        )
+        assert self.search(
+            moderator_client, self.REVIEWS_URL, search='реклама'
+        ) in ([first, third], [third, first])
+        assert self.search(moderator_client, self.REVIEWS_URL) == [
+            third, second, first
+        ], 'Проверьте, что без поиска отзывы идут от новых к старым.'
+        assert self.search(
+            moderator_client, self.REVIEWS_URL, search='реклама',
+            title=titles[1]['id']
+        ) == [third]
+        assert self.search(
+            moderator_client, self.REVIEWS_URL, search='спам',
+            author=user.username
+        ) == [first]
+        assert self.search(
+            moderator_client, self.REVIEWS_URL, search='спам',
+            score_min=5, score_max=10
+        ) == [second], 'Проверьте фильтрацию по диапазону оценок.'
+        pub_date = Review.objects.get(pk=second).pub_date
+        assert self.search(
+            moderator_client, self.REVIEWS_URL, search='спам',
+            date_from=pub_date.isoformat()
+        ) == [second], 'Проверьте фильтрацию по дате публикации.'
+
+        response = user_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{first}/',
+            data={'text': 'Исправленный отзыв'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.search(
+            moderator_client, self.REVIEWS_URL, search='спам'
+        ) == [second], (
+            'Проверьте, что индекс отзывов обновляется при изменении текста.'
+        )
+        Review.objects.get(pk=second).delete()
+        assert self.search(
+            moderator_client, self.REVIEWS_URL, search='спам'
+        ) == []
+
+    def test_03_comment_search(self, admin_client, user_client,
+                               moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(
+            user_client, titles[0]['id'], 'Обычный отзыв', 8
+        ).json()['id']
+        comment = create_single_comment(
+            admin_client, titles[0]['id'], review, 'Оскорбительный текст'
+        ).json()['id']
+        response = moderator_client.get(
+            self.COMMENTS_URL, {'search': 'оскорбит'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        result = response.json()['results']
+        assert [item['id'] for item in result] == [comment]
+        assert result[0]['title'] == titles[0]['id']
+        assert result[0]['review'] == review
+        assert self.search(
+            moderator_client, self.COMMENTS_URL, search='оскорбит',
+            score_max=5
+        ) == [], 'Проверьте фильтрацию комментариев по оценке отзыва.'
+        Comment.objects.filter(pk=comment).get().delete()
+        assert self.search(
+            moderator_client, self.COMMENTS_URL, search='оскорбит'
+        ) == [], 'Проверьте, что индекс комментариев обновляется.'
+
+    def test_04_rebuild_command(self, admin_client, user, moderator_client):
+        if not REVIEW_SEARCH_INDEX.is_supported(connection):
+            pytest.skip('СУБД не поддерживает полнотекстовый индекс.')
+        titles, _, _ = create_titles(admin_client)
+        Review.objects.bulk_create([Review(
+            title_id=titles[0]['id'], author=user, text='Массовый импорт',
+            score=5
+        )])
+        assert self.search(
+            moderator_client, self.REVIEWS_URL, search='импорт'
+        ) == []
+        call_command('rebuild-search-index')
+        assert len(self.search(
+            moderator_client, self.REVIEWS_URL, search='импорт'
+        )) == 1, (
+            'Проверьте, что команда rebuild-search-index перестраивает '
+            'индекс отзывов.'
+        )
+
+    @pytest.mark.parametrize('url, sorted_by_index', (
+        (REVIEWS_URL, True),
+        (f'{REVIEWS_URL}?author=user1', True),
+        (f'{REVIEWS_URL}?search=фильм&score_min=5', False),
+        (COMMENTS_URL, True),
+        (f'{COMMENTS_URL}?search=сюжет&title=1', False),
+    ))
+    def test_05_no_full_table_scans(self, moderator_client, url,
+                                    sorted_by_index):
+        if connection.vendor not in FULL_SCAN:
+            pytest.skip('Разбор плана запроса не поддерживается для СУБД.')
+        DatasetGenerator(
+            users=20, categories=3, genres=5, titles=30, reviews=200,
+            comments=200, seed=1
+        ).generate()
+        with CaptureQueriesContext(connection) as context:
+            response = moderator_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+        ]
+        for sql in queries:
+            scanned = {
+                match.group(1) for match in map(
+                    FULL_SCAN[connection.vendor].search, explain(sql)
+                ) if match
+            } & LARGE_TABLES
+            assert not scanned, (
+                f'Запрос эндпоинта `{url}` просматривает таблицы '
+                f'{", ".join(sorted(scanned))} целиком: {sql}'
+            )
+        main_query = [sql for sql in queries if 'LIMIT' in sql][-1]
+        if sorted_by_index:
+            assert not any(
+                SORT[connection.vendor] in line
+                for line in explain(main_query)
+            ), (
+                f'Основной запрос эндпоинта `{url}` должен получать строки '
+                f'в порядке индекса, без сортировки: {main_query}'
+            )
@@ -0,0 +1,123 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from reviews.models import Category, Genre, Title, TitleRanking
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20Rankings:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def ranked(self, client, **params):
+        response = client.get(self.TITLES_URL, params)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` с параметром '
+            '`ordering` возвращает ответ со статусом 200.'
+        )
+        return [title['name'] for title in response.json()['results']]
+
+    @pytest.fixture
+    def titles(self, admin_client, user_client, moderator_client):
+        titles, categories, genres = create_titles(admin_client)
+        response = admin_client.post(self.TITLES_URL, data={
+            'name': 'Без отзывов', 'year': 2000,
+            'genre': [genres[0]['slug']], 'category': categories[0]['slug'],
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        terminator, die_hard = titles[0]['id'], titles[1]['id']
+        create_single_review(user_client, terminator, 'Отзыв', 6)
+        create_single_review(moderator_client, terminator, 'Отзыв', 9)
+        create_single_review(user_client, die_hard, 'Отзыв', 9)
+        return titles, categories, genres
+
+    def test_01_ordering(self, client, titles):
+        _, categories, genres = titles
+        assert self.ranked(client, ordering='-rating') == [
+            'Крепкий орешек', 'Терминатор', 'Без отзывов'
+        ], (
+            'Проверьте, что `ordering=-rating` упорядочивает произведения '
+            'по убыванию средней оценки, произведения без отзывов - в конце.'
+        )
+        assert self.ranked(client, ordering='rating') == [
+            'Без отзывов', 'Терминатор', 'Крепкий орешек'
+        ]
+        assert self.ranked(client, ordering='-reviews_count') == [
+            'Терминатор', 'Крепкий орешек', 'Без отзывов'
+        ]
+        assert self.ranked(
+            client, ordering='-rating', genre=genres[0]['slug']
+        ) == ['Терминатор', 'Без отзывов'], (
+            'Проверьте, что с фильтром `genre` используется рейтинг жанра.'
+        )
+        assert self.ranked(
+            client, ordering='-rating', category=categories[1]['slug']
+        ) == ['Крепкий орешек']
+        assert self.ranked(client, ordering='-rating', limit=1) == [
+            'Крепкий орешек'
+        ]
+        assert self.ranked(client, ordering='unknown') == sorted(
+            self.ranked(client)
+        ), 'Неизвестная сортировка не должна менять порядок по умолчанию.'
+
+    def test_02_incremental_updates(self, client, admin_client,
+                                    user_client, titles):
+        titles, categories, genres = titles
+        terminator = titles[0]['id']
+        review_id = client.get(
+            f'{self.TITLES_URL}{terminator}/reviews/'
+        ).json()['results'][-1]['id']
+        response = user_client.patch(
+            f'{self.TITLES_URL}{terminator}/reviews/{review_id}/',
+            data={'score': 10}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.ranked(client, ordering='-rating')[0] == 'Терминатор', (
+            'Проверьте, что рейтинги обновляются при изменении оценки.'
+        )
+
+        response = admin_client.patch(
+            f'{self.TITLES_URL}{terminator}/',
+            data={'genre': [genres[2]['slug']],
+                  'category': categories[1]['slug']}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.ranked(
+            client, ordering='-rating', genre=genres[0]['slug']
+        ) == ['Без отзывов'], (
+            'Проверьте, что рейтинги жанров меняются вместе с жанрами '
+            'произведения.'
+        )
+        assert self.ranked(
+            client, ordering='-rating', genre=genres[2]['slug']
+        ) == ['Терминатор', 'Крепкий орешек']
+        assert self.ranked(
+            client, ordering='-rating', category=categories[1]['slug']
+        ) == ['Терминатор', 'Крепкий орешек']
+
+        Genre.objects.filter(slug=genres[2]['slug']).get().titles.clear()
+        assert not TitleRanking.objects.filter(
+            scope='genre', title_id=terminator
+        ).exists()
+        Category.objects.filter(slug=categories[1]['slug']).get().delete()
+        assert not TitleRanking.objects.filter(scope='category').exclude(
+            title__category__isnull=False
+        ).exists(), 'Проверьте, что рейтинг удаленной категории удаляется.'
+        Title.objects.get(pk=terminator).delete()
+        assert 'Терминатор' not in self.ranked(client, ordering='-rating')
+
+    def test_03_rebuild_command(self, client, titles):
+        call_command('rebuild-ratings', '--check')
+        TitleRanking.objects.update(rating=0, reviews_count=0)
+        with pytest.raises(CommandError):
+            call_command('rebuild-ratings', '--check')
+        TitleRanking.objects.filter(scope='global').delete()
+        call_command('rebuild-ratings')
+        call_command('rebuild-ratings', '--check')
+        assert self.ranked(client, ordering='-rating') == [
+            'Крепкий орешек', 'Терминатор', 'Без отзывов'
+        ], 'Проверьте, что команда rebuild-ratings перестраивает рейтинги.'
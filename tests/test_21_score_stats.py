@@ -0,0 +1,111 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from reviews.models import Review, TitleScore
+from reviews.ratings import ScoreHistogram
+from tests.utils import create_single_review, create_titles
+
+
+def test_score_histogram_statistics():
+    histogram = ScoreHistogram({1: 1, 6: 2, 10: 1})
+    assert histogram.total == 4
+    assert histogram.mean == 5.75
+    assert histogram.percentiles() == {
+        'p25': 1, 'p50': 6, 'p75': 6, 'p90': 10
+    }, 'Проверьте расчет перцентилей методом ближайшего ранга.'
+    assert histogram.weighted(global_mean=7.0, min_votes=4) == 6.375
+    empty = ScoreHistogram({})
+    assert empty.mean is None
+    assert empty.percentile(50) is None
+    assert empty.weighted(global_mean=7.0, min_votes=4) is None
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21ScoreStats:
+
+    TITLE_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def histogram(self, title_id):
+        return dict(TitleScore.objects.filter(
+            title_id=title_id, count__gt=0
+        ).values_list('score', 'count'))
+
+    def test_01_histogram_follows_reviews(self, admin_client, user_client,
+                                          moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review_id = create_single_review(
+            user_client, title_id, 'Отзыв', 2
+        ).json()['id']
+        create_single_review(moderator_client, title_id, 'Отзыв', 8)
+        create_single_review(admin_client, title_id, 'Отзыв', 8)
+        assert self.histogram(title_id) == {2: 1, 8: 2}, (
+            'Проверьте, что гистограмма оценок обновляется при создании '
+            'отзывов.'
+        )
+        response = user_client.patch(
+            f'{self.TITLE_URL_TEMPLATE.format(title_id=title_id)}'
+            f'reviews/{review_id}/',
+            data={'score': 9}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.histogram(title_id) == {8: 2, 9: 1}, (
+            'Проверьте, что гистограмма оценок обновляется при изменении '
+            'оценки.'
+        )
+        Review.objects.get(pk=review_id).delete()
+        assert self.histogram(title_id) == {8: 2}
+
+        call_command('rebuild-ratings', '--check')
+        TitleScore.objects.filter(title_id=title_id).update(count=5)
+        with pytest.raises(CommandError):
+            call_command('rebuild-ratings', '--check')
+        call_command('rebuild-ratings')
+        assert self.histogram(title_id) == {8: 2}, (
+            'Проверьте, что команда rebuild-ratings перестраивает '
+            'гистограммы оценок.'
+        )
+
+    def test_02_optional_fields(self, client, admin_client, user_client,
+                                moderator_client, settings):
+        settings.RATING_MIN_VOTES = 2
+        titles, _, _ = create_titles(admin_client)
+        title_id, other_id = titles[0]['id'], titles[1]['id']
+        url = self.TITLE_URL_TEMPLATE.format(title_id=title_id)
+        create_single_review(user_client, title_id, 'Отзыв', 10)
+        create_single_review(moderator_client, title_id, 'Отзыв', 7)
+        create_single_review(user_client, other_id, 'Отзыв', 1)
+
+        plain = client.get(url).json()
+        for field in ('mean_rating', 'weighted_rating', 'percentiles'):
+            assert field not in plain, (
+                f'Поле `{field}` должно выводиться только по запросу.'
+            )
+        response = client.get(url, {
+            'include': 'mean_rating,weighted_rating,percentiles'
+        })
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert data['mean_rating'] == 8.5
+        # Средняя по всем оценкам (10 + 7 + 1) / 3 = 6, m = 2.
+        assert data['weighted_rating'] == 7.25, (
+            'Проверьте расчет взвешенной оценки по формуле IMDb.'
+        )
+        assert data['percentiles'] == {
+            'p25': 7, 'p50': 7, 'p75': 10, 'p90': 10
+        }
+        assert 'percentiles' not in client.get(url).json(), (
+            'Ответы с необязательными полями не должны попадать в кэш '
+            'произведения.'
+        )
+
+        response = client.get('/api/v1/titles/', {'include': 'mean_rating'})
+        ratings = {
+            title['id']: title['mean_rating']
+            for title in response.json()['results']
+        }
+        assert ratings == {title_id: 8.5, other_id: 1.0}
+        assert 'weighted_rating' not in response.json()['results'][0]
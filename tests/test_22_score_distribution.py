@@ -0,0 +1,66 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Review
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22ScoreDistribution:
+
+    URL_TEMPLATE = '/api/v1/titles/{title_id}/score-distribution/'
+
+    def get_counts(self, client, title_id):
+        response = client.get(self.URL_TEMPLATE.format(title_id=title_id))
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что GET-запрос к `/api/v1/titles/{title_id}/'
+            'score-distribution/` возвращает ответ со статусом 200.'
+        )
+        data = response.json()
+        assert [item['score'] for item in data['distribution']] == list(
+            range(1, 11)
+        ), 'Распределение должно содержать все оценки от 1 до 10.'
+        counts = {
+            item['score']: item['count']
+            for item in data['distribution'] if item['count']
+        }
+        assert data['count'] == sum(counts.values())
+        return counts
+
+    def test_01_distribution(self, client, admin_client, user_client,
+                             moderator_client, django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        assert self.get_counts(client, title_id) == {}
+        review_id = create_single_review(
+            user_client, title_id, 'Отзыв', 4
+        ).json()['id']
+        create_single_review(moderator_client, title_id, 'Отзыв', 9)
+        create_single_review(admin_client, titles[1]['id'], 'Отзыв', 9)
+        assert self.get_counts(client, title_id) == {4: 1, 9: 1}, (
+            'Проверьте, что распределение учитывает новые отзывы '
+            'произведения.'
+        )
+        with django_assert_num_queries(0):
+            assert self.get_counts(client, title_id) == {4: 1, 9: 1}
+
+        Review.objects.filter(pk=review_id).get().delete()
+        assert self.get_counts(client, title_id) == {9: 1}, (
+            'Проверьте, что кэш распределения сбрасывается при удалении '
+            'отзыва.'
+        )
+
+        url = self.URL_TEMPLATE.format(title_id=title_id)
+        assert admin_client.post(url).status_code == (
+            HTTPStatus.METHOD_NOT_ALLOWED
+        )
+        response = admin_client.delete(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что распределение удаленного произведения не '
+            'отдается из кэша.'
+        )
+        assert client.get(
+            self.URL_TEMPLATE.format(title_id='abc')
+        ).status_code == HTTPStatus.NOT_FOUND
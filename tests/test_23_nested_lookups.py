@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import (
+    create_single_comment,
+    create_single_review,
+    create_titles
+)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23NestedLookups:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def test_01_review_must_belong_to_title(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id, other_id = titles[0]['id'], titles[1]['id']
+        review_id = create_single_review(
+            admin_client, title_id, 'Отзыв', 5
+        ).json()['id']
+        comment_id = create_single_comment(
+            admin_client, title_id, review_id, 'Комментарий'
+        ).json()['id']
+        url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=other_id, review_id=review_id
+        )
+        assert user_client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что список комментариев к отзыву другого '
+            'произведения возвращает ответ со статусом 404.'
+        )
+        assert user_client.get(f'{url}{comment_id}/').status_code == (
+            HTTPStatus.NOT_FOUND
+        ), (
+            'Проверьте, что комментарий к отзыву другого произведения не '
+            'доступен по его URL.'
+        )
+        response = user_client.post(url, data={'text': 'Комментарий'})
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что нельзя создать комментарий к отзыву другого '
+            'произведения.'
+        )
+        response = admin_client.delete(f'{url}{comment_id}/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        reviews_url = self.REVIEWS_URL_TEMPLATE.format(title_id=other_id)
+        assert user_client.get(f'{reviews_url}{review_id}/').status_code == (
+            HTTPStatus.NOT_FOUND
+        )
+
+    def test_02_fixed_query_count(self, admin_client, user_client,
+                                  moderator_client,
+                                  django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review_ids = [
+            create_single_review(client, title_id, 'Отзыв', 5).json()['id']
+            for client in (admin_client, user_client, moderator_client)
+        ]
+        comment_ids = [
+            create_single_comment(
+                client, title_id, review_ids[0], 'Комментарий'
+            ).json()['id']
+            for client in (admin_client, user_client, moderator_client)
+        ]
+        reviews_url = self.REVIEWS_URL_TEMPLATE.format(title_id=title_id)
+        comments_url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=title_id, review_id=review_ids[0]
+        )
+        # Пользователь, родитель и страница вместе с авторами.
+        for url in (reviews_url, comments_url):
+            with django_assert_num_queries(3):
+                response = user_client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            assert response.json()['count'] == 3
+        # Пользователь и объект с проверкой родителя в одном запросе.
+        with django_assert_num_queries(2):
+            response = user_client.get(f'{reviews_url}{review_ids[1]}/')
+        assert response.status_code == HTTPStatus.OK
+        with django_assert_num_queries(2):
+            response = user_client.get(f'{comments_url}{comment_ids[1]}/')
+        assert response.status_code == HTTPStatus.OK
@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import pytest
+from django.db import IntegrityError, connection, connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.serializers import ModelSerializer
+from rest_framework.test import APIClient
+
+from reviews.models import Review, Title
+from tests.utils import create_single_review, create_titles
+
+THREADS = 8
+REQUESTS = 64
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24ConcurrentReviews:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def test_01_single_insert(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        for expected in (HTTPStatus.CREATED, HTTPStatus.BAD_REQUEST):
+            with CaptureQueriesContext(connection) as context:
+                response = user_client.post(
+                    url, data={'text': 'Отзыв', 'score': 5}
+                )
+            assert response.status_code == expected
+            queries = [query['sql'] for query in context.captured_queries]
+            insert = next(
+                number for number, sql in enumerate(queries)
+                if sql.startswith('INSERT INTO "reviews_review"')
+            )
+            lookups = [
+                sql for sql in queries[:insert]
+                if sql.startswith('SELECT')
+                and 'FROM "reviews_review"' in sql
+            ]
+            assert not lookups, (
+                'Проверьте, что повторный отзыв отклоняется ограничением '
+                'базы данных без предварительного запроса к отзывам.'
+            )
+        assert response.json() == {
+            'non_field_errors': ['Отзыв на это произведение уже оставлен!']
+        }
+        create_single_review(admin_client, titles[0]['id'], 'Отзыв', 7)
+        assert Title.objects.get(pk=titles[0]['id']).rating_count == 2
+
+    def test_02_parallel_duplicate_reviews(self, admin_client, token_user):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            pytest.skip(
+                'База SQLite в памяти не поддерживает параллельную запись.'
+            )
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title_id)
+
+        def post(number):
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f'Bearer {token_user["access"]}'
+            )
+            try:
+                return client.post(
+                    url, data={'text': f'Отзыв {number}', 'score': 5}
+                ).status_code
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(THREADS) as executor:
+            statuses = list(executor.map(post, range(REQUESTS)))
+
+        assert statuses.count(HTTPStatus.CREATED) == 1, (
+            'Проверьте, что из параллельных POST-запросов одного '
+            'пользователя создается ровно один отзыв.'
+        )
+        assert statuses.count(HTTPStatus.BAD_REQUEST) == REQUESTS - 1, (
+            'Проверьте, что повторные отзывы, в том числе отклоненные '
+            'ограничением базы данных, возвращают ответ со статусом 400.'
+        )
+        assert Review.objects.filter(title_id=title_id).count() == 1
+        assert Title.objects.get(pk=title_id).rating_count == 1, (
+            'Проверьте, что отклоненные отзывы не меняют рейтинг '
+            'произведения.'
+        )
+
+    def test_03_other_integrity_errors_raised(self, admin_client,
+                                              user_client, monkeypatch):
+        titles, _, _ = create_titles(admin_client)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+
+        def create(serializer, validated_data):
+            raise IntegrityError('FOREIGN KEY constraint failed')
+
+        monkeypatch.setattr(ModelSerializer, 'create', create)
+        with pytest.raises(IntegrityError):
+            user_client.post(url, data={'text': 'Отзыв', 'score': 5})
+        assert not Review.objects.exists()
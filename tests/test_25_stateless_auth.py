@@ -0,0 +1,134 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import RoleAccessToken
+from reviews.models import User
+
+
+def make_client(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25StatelessAuth:
+
+    URL_TOKEN = '/api/v1/auth/token/'
+    URL_CATEGORIES = '/api/v1/categories/'
+    URL_USERS = '/api/v1/users/'
+    URL_ME = '/api/v1/users/me/'
+
+    @pytest.fixture(autouse=True)
+    def stateless(self, settings):
+        settings.JWT_STATELESS_AUTHENTICATION = True
+
+    def test_01_token_claims(self, client, user):
+        user.confirmation_code = '12345678'
+        user.save()
+        response = client.post(self.URL_TOKEN, data={
+            'username': user.username, 'confirmation_code': '12345678'
+        })
+        assert response.status_code == HTTPStatus.OK
+        token = AccessToken(response.json()['token'])
+        assert (token['role'], token['is_staff'], token['is_active']) == (
+            'user', False, True
+        ), (
+            'Проверьте, что токен содержит роль, is_staff и is_active '
+            'пользователя.'
+        )
+
+    def test_02_no_auth_queries(self, admin, user,
+                                django_assert_num_queries):
+        admin_client = make_client(RoleAccessToken.for_user(admin))
+        user_client = make_client(RoleAccessToken.for_user(user))
+        admin_client.get(self.URL_CATEGORIES)
+        user_client.get(self.URL_CATEGORIES)
+        with django_assert_num_queries(0):
+            response = admin_client.get(self.URL_CATEGORIES)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что запрос с токеном, содержащим роль, не '
+            'загружает пользователя из базы данных.'
+        )
+        with django_assert_num_queries(0):
+            response = user_client.post(
+                self.URL_CATEGORIES, data={'name': 'Новая', 'slug': 'new'}
+            )
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        response = admin_client.post(
+            self.URL_CATEGORIES, data={'name': 'Новая', 'slug': 'new'}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        response = user_client.get(self.URL_ME)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['email'] == user.email
+
+    def test_03_cached_user_without_claims(self, admin,
+                                           django_assert_num_queries):
+        admin_client = make_client(AccessToken.for_user(admin))
+        APIClient().get(self.URL_CATEGORIES)
+        with django_assert_num_queries(1):
+            admin_client.get(self.URL_CATEGORIES)
+        with django_assert_num_queries(0):
+            response = admin_client.get(self.URL_CATEGORIES)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что пользователь токена без утверждений о роли '
+            'кэшируется.'
+        )
+
+    @pytest.mark.parametrize('token_class', (AccessToken, RoleAccessToken))
+    def test_04_role_change(self, admin, user, token_class):
+        moderator_client = make_client(token_class.for_user(user))
+        user.role = 'moderator'
+        user.save()
+        user_client = make_client(token_class.for_user(user))
+        assert user_client.get('/api/v1/search/reviews/').status_code == (
+            HTTPStatus.OK
+        )
+        demoted_client = make_client(token_class.for_user(admin))
+        response = demoted_client.patch(
+            f'{self.URL_USERS}{admin.username}/', data={'role': 'user'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = demoted_client.get(self.URL_USERS)
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что после изменения роли утверждения ранее '
+            'выданного токена не используются.'
+        )
+        assert moderator_client.get('/api/v1/search/reviews/').status_code == (
+            HTTPStatus.OK
+        )
+
+        User.objects.get(pk=user.pk).delete()
+        response = user_client.get(self.URL_CATEGORIES)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токен удаленного пользователя не принимается.'
+        )
+
+    def test_05_claims_checked_without_cached_version(
+            self, admin, django_assert_num_queries):
+        admin_client = make_client(RoleAccessToken.for_user(admin))
+        APIClient().get(self.URL_CATEGORIES)
+        with django_assert_num_queries(1):
+            response = admin_client.get(self.URL_CATEGORIES)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что при отсутствии версии утверждений в кэше она '
+            'загружается из базы данных.'
+        )
+        admin.role = 'user'
+        admin.is_staff = False
+        admin.save()
+        cache.clear()
+        response = admin_client.get(self.URL_USERS)
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что утверждения токена, выданного до изменения '
+            'роли, не принимаются и после очистки кэша.'
+        )
+        response = make_client(RoleAccessToken.for_user(admin)).get(
+            self.URL_USERS
+        )
+        assert response.status_code == HTTPStatus.FORBIDDEN
@@ -0,0 +1,82 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.authentication import RoleAccessToken
+from api.permissions import get_roles
+from tests.utils import (
+    create_single_comment,
+    create_single_review,
+    create_titles
+)
+
+
+@pytest.mark.django_db
+def test_roles_evaluated_once_per_request(moderator):
+    request = Request(APIRequestFactory().get('/'))
+    request.user = moderator
+    assert get_roles(request) == (False, True)
+    moderator.role = 'admin'
+    assert get_roles(request) == (False, True), (
+        'Проверьте, что роли пользователя вычисляются один раз за запрос.'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26PermissionQueries:
+
+    def user_queries(self, client, method, url):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(client, method)(
+                url, data={'text': 'Новый текст'}, format='json'
+            )
+        assert response.status_code in (HTTPStatus.OK, HTTPStatus.NO_CONTENT)
+        return [
+            query['sql'] for query in context.captured_queries
+            if 'FROM "reviews_user"' in query['sql']
+        ]
+
+    @pytest.mark.parametrize('stateless', (False, True))
+    def test_01_no_author_queries(self, admin_client, user, moderator,
+                                  settings, stateless):
+        settings.JWT_STATELESS_AUTHENTICATION = stateless
+        clients = {}
+        for name, owner in (('author', user), ('moderator', moderator)):
+            clients[name] = APIClient()
+            clients[name].credentials(
+                HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(owner)}'
+            )
+            # Версия утверждений токена загружается в кэш первым запросом.
+            clients[name].get('/api/v1/categories/')
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review_url = f'/api/v1/titles/{title_id}/reviews/'
+        review_id = create_single_review(
+            clients['author'], title_id, 'Отзыв', 5
+        ).json()['id']
+        review_url = f'{review_url}{review_id}/'
+        comment_url = f'{review_url}comments/'
+        comment_id = create_single_comment(
+            clients['author'], title_id, review_id, 'Комментарий'
+        ).json()['id']
+        comment_url = f'{comment_url}{comment_id}/'
+        # Без режима по утверждениям токена пользователь загружается
+        # только для аутентификации.
+        expected = 0 if stateless else 1
+        for name, method, url in (
+            ('author', 'patch', comment_url),
+            ('moderator', 'patch', comment_url),
+            ('author', 'patch', review_url),
+            ('moderator', 'patch', review_url),
+            ('moderator', 'delete', comment_url),
+            ('moderator', 'delete', review_url),
+        ):
+            queries = self.user_queries(clients[name], method, url)
+            assert len(queries) == expected, (
+                f'Проверьте, что {method.upper()}-запрос к `{url}` не '
+                'загружает автора объекта для проверки прав.'
+            )
@@ -0,0 +1,222 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.utils import timezone
+
+from reviews.mailqueue import (
+    claim_emails,
+    enqueue_email,
+    get_retry_delay,
+    send_batch
+)
+from reviews.models import OutgoingEmail
+
+
+class FailingBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        raise ConnectionRefusedError('Почтовый сервер недоступен.')
+
+
+class RecordingBackend(EmailBackend):
+
+    states = []
+
+    def send_messages(self, email_messages):
+        self.states.append((
+            connection.in_atomic_block,
+            list(OutgoingEmail.objects.values_list('status', flat=True))
+        ))
+        return super().send_messages(email_messages)
+
+
+class BadAddressBackend(EmailBackend):
+
+    def send_messages(self, email_messages):
+        if any('bad' in message.to[0] for message in email_messages):
+            raise ValueError('Некорректный адрес.')
+        return super().send_messages(email_messages)
+
+
+class InterruptingBackend(EmailBackend):
+
+    def send_messages(self, email_messages):
+        if mail.outbox:
+            raise KeyboardInterrupt
+        return super().send_messages(email_messages)
+
+
+def send_mail_command(*args):
+    out = StringIO()
+    call_command('send-mail', *args, stdout=out)
+    return out.getvalue()
+
+
+def test_retry_delay_grows_exponentially(settings):
+    settings.MAIL_QUEUE_RETRY_DELAY = 10
+    settings.MAIL_QUEUE_MAX_RETRY_DELAY = 60
+    assert [get_retry_delay(attempt).seconds for attempt in range(1, 6)] == [
+        10, 20, 40, 60, 60
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27MailQueue:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+
+    def test_01_signup_enqueues_email(self, client, settings):
+        settings.EMAIL_BACKEND = 'tests.test_27_mail_queue.FailingBackend'
+        data = {'username': 'queued', 'email': 'queued@yamdb.fake'}
+        response = client.post(self.URL_SIGNUP, data=data)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что регистрация не зависит от доступности '
+            'почтового сервера.'
+        )
+        assert len(mail.outbox) == 0
+        email = OutgoingEmail.objects.get()
+        assert (email.recipient, email.status) == (data['email'], 'pending')
+
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.locmem.EmailBackend'
+        )
+        send_mail_command()
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что команда send-mail отправляет письма из очереди.'
+        )
+        assert mail.outbox[0].to == [data['email']]
+        email.refresh_from_db()
+        assert email.status == 'sent' and email.sent_at is not None
+
+    def test_02_retry_and_failure(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_27_mail_queue.FailingBackend'
+        settings.MAIL_QUEUE_MAX_ATTEMPTS = 2
+        enqueue_email('Тема', 'Текст', ['retry@yamdb.fake'])
+        send_mail_command()
+        email = OutgoingEmail.objects.get()
+        assert (email.status, email.attempts) == ('pending', 1)
+        assert 'ConnectionRefusedError' in email.last_error
+        assert email.next_attempt_at > timezone.now(), (
+            'Проверьте, что неотправленное письмо откладывается.'
+        )
+        send_mail_command()
+        email.refresh_from_db()
+        assert email.attempts == 1, (
+            'Письмо не должно отправляться до наступления срока повторной '
+            'попытки.'
+        )
+        OutgoingEmail.objects.update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        send_mail_command()
+        email.refresh_from_db()
+        assert (email.status, email.attempts) == ('failed', 2), (
+            'Проверьте, что после MAIL_QUEUE_MAX_ATTEMPTS попыток письмо '
+            'помечается неотправленным.'
+        )
+
+    def test_03_batches_and_stats(self):
+        enqueue_email(
+            'Тема', 'Текст', [f'user{i}@yamdb.fake' for i in range(5)]
+        )
+        assert 'pending=5' in send_mail_command('--stats')
+        output = send_mail_command('--batch-size', '2')
+        assert output.count('Отправлено 2') == 2
+        assert 'Отправлено 1,' in output, (
+            'Проверьте, что письма отправляются пачками заданного размера.'
+        )
+        assert len(mail.outbox) == 5
+        assert 'pending=0 sending=0 sent=5 failed=0' in send_mail_command('--stats')
+
+    def test_04_claimed_before_sending(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_27_mail_queue.RecordingBackend'
+        RecordingBackend.states.clear()
+        enqueue_email('Тема', 'Текст', ['claim@yamdb.fake'])
+        send_mail_command()
+        assert RecordingBackend.states == [(False, ['sending'])], (
+            'Проверьте, что письма помечаются отправляемыми и эта отметка '
+            'фиксируется до отправки, которая выполняется вне транзакции.'
+        )
+        assert OutgoingEmail.objects.get().status == 'sent'
+
+    def test_05_abandoned_claim_resent(self):
+        enqueue_email('Тема', 'Текст', ['abandoned@yamdb.fake'])
+        [email] = claim_emails(OutgoingEmail.objects.all())
+        email.refresh_from_db()
+        assert email.status == 'sending'
+        assert email.next_attempt_at > timezone.now()
+        send_mail_command()
+        assert len(mail.outbox) == 0, (
+            'Письмо, взятое на отправку другим обработчиком, не должно '
+            'отправляться повторно до истечения MAIL_QUEUE_CLAIM_TIMEOUT.'
+        )
+        OutgoingEmail.objects.update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        send_mail_command()
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что письмо прерванного обработчика отправляется '
+            'снова после истечения MAIL_QUEUE_CLAIM_TIMEOUT.'
+        )
+        email.refresh_from_db()
+        assert email.status == 'sent'
+
+    @pytest.mark.usefixtures('deliver_mail_eagerly')
+    def test_06_eager_delivery_after_commit(self):
+        with transaction.atomic():
+            enqueue_email('Тема', 'Текст', ['eager@yamdb.fake'])
+            assert len(mail.outbox) == 0
+        assert len(mail.outbox) == 1
+        assert OutgoingEmail.objects.get().status == 'sent'
+
+    def test_07_unexpected_backend_error(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_27_mail_queue.BadAddressBackend'
+        settings.MAIL_QUEUE_MAX_ATTEMPTS = 2
+        enqueue_email('Тема', 'Текст', [
+            'first@yamdb.fake', 'bad@yamdb.fake', 'last@yamdb.fake'
+        ])
+        send_mail_command()
+        assert len(mail.outbox) == 2, (
+            'Проверьте, что любая ошибка отправки одного письма не прерывает '
+            'отправку остальных.'
+        )
+        bad = OutgoingEmail.objects.get(recipient='bad@yamdb.fake')
+        assert (bad.status, bad.attempts) == ('pending', 1)
+        assert 'ValueError' in bad.last_error
+        assert OutgoingEmail.objects.filter(status='sent').count() == 2
+        OutgoingEmail.objects.update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        send_mail_command()
+        bad.refresh_from_db()
+        assert (bad.status, bad.attempts) == ('failed', 2), (
+            'Проверьте, что письмо с любой ошибкой отправки помечается '
+            'неотправленным после MAIL_QUEUE_MAX_ATTEMPTS попыток.'
+        )
+        assert len(mail.outbox) == 2
+
+    def test_08_interrupted_batch_keeps_results(self, settings):
+        settings.EMAIL_BACKEND = (
+            'tests.test_27_mail_queue.InterruptingBackend'
+        )
+        enqueue_email(
+            'Тема', 'Текст', ['first@yamdb.fake', 'second@yamdb.fake']
+        )
+        with pytest.raises(KeyboardInterrupt):
+            send_batch()
+        statuses = dict(
+            OutgoingEmail.objects.values_list('recipient', 'status')
+        )
+        assert statuses == {
+            'first@yamdb.fake': 'sent', 'second@yamdb.fake': 'sending'
+        }, (
+            'Проверьте, что результат уже отправленных писем сохраняется, '
+            'даже если отправка пачки прервана.'
+        )
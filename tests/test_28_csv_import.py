@@ -0,0 +1,262 @@
+import csv
+import os
+import shutil
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from reviews import importer
+from reviews.importer import (
+    CSV_FILES,
+    DEPENDENCY_ERROR,
+    CsvImporter,
+    get_import_order,
+    iter_records
+)
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    ImportCheckpoint,
+    Review,
+    Title,
+    User
+)
+from tests.conftest import MANAGE_PATH
+
+DATA_DIR = os.path.join(MANAGE_PATH, 'data')
+TITLE_INDEXES = {
+    'title_name_id_idx', 'title_year_name_idx', 'title_category_name_idx'
+}
+
+
+def read_records(csv_file):
+    with open(csv_file, encoding='utf-8', newline='') as file:
+        return list(csv.reader(file))[1:]
+
+
+def get_index_names(table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type = 'index' AND tbl_name = %s",
+            [table]
+        )
+        return {name for name, in cursor.fetchall()}
+
+
+def copy_data(path, *names):
+    for name in names:
+        shutil.copy(os.path.join(DATA_DIR, name), path)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28CsvImport:
+
+    def test_01_import_fixture_data(self):
+        call_command('import-csv', path=DATA_DIR, stdout=StringIO())
+        for name, model in CSV_FILES:
+            expected = len(read_records(os.path.join(DATA_DIR, name)))
+            assert model.objects.count() == expected, (
+                f'Проверьте, что из файла `{name}` загружаются все записи, '
+                'в том числе многострочные.'
+            )
+        review = Review.objects.get(pk=1)
+        assert '\n' in review.text
+        call_command('rebuild-ratings', check=True, stdout=StringIO())
+
+    def test_02_import_order(self):
+        order = get_import_order(
+            model for _, model in reversed(CSV_FILES)
+        )
+        for dependent, dependency in (
+            (Title, Category),
+            (Title.genre.through, Genre),
+            (Title.genre.through, Title),
+            (Review, Title),
+            (Review, User),
+            (Comment, Review),
+        ):
+            assert order.index(dependency) < order.index(dependent), (
+                'Проверьте, что таблицы загружаются после таблиц, на '
+                'которые они ссылаются.'
+            )
+
+    def test_03_failed_dependency(self, tmp_path):
+        copy_data(tmp_path, 'category.csv', 'review.csv', 'users.csv')
+        (tmp_path / 'titles.csv').write_text(
+            'id,name,year,unknown\n1,Фильм,2000,1\n', encoding='utf-8'
+        )
+        results = {
+            os.path.basename(result.file): result
+            for result in CsvImporter().import_files([
+                (str(tmp_path / name), model) for name, model in CSV_FILES
+                if (tmp_path / name).exists()
+            ])
+        }
+        assert 'unknown' in results['titles.csv'].error
+        assert results['review.csv'].error == DEPENDENCY_ERROR, (
+            'Проверьте, что файл не загружается, если не загружена '
+            'таблица, на которую он ссылается.'
+        )
+        assert results['users.csv'].error is None
+        assert not Review.objects.exists()
+
+    def test_04_chunks_follow_multiline_records(self, tmp_path):
+        csv_file = tmp_path / 'genre.csv'
+        rows = [
+            [str(number), f'Жанр\n{number}\n"кавычки"', f'genre-{number}']
+            for number in range(1, 8)
+        ]
+        with open(csv_file, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(('id', 'name', 'slug'))
+            writer.writerows(rows)
+        csv_importer = CsvImporter(chunk_rows=2)
+        _, start = csv_importer.read_header(csv_file)
+        chunks = csv_importer.split_file(csv_file, start)
+        records = []
+        with open(csv_file, 'rb') as file:
+            for chunk_start, end in chunks:
+                file.seek(chunk_start)
+                records.append([
+                    record for record, _ in
+                    iter_records(file, chunk_start, end)
+                ])
+        assert [len(chunk) for chunk in records] == [2, 2, 2, 1], (
+            'Проверьте, что части файла содержат по chunk_rows записей '
+            'и их границы совпадают с границами многострочных записей.'
+        )
+        assert sum(records, []) == rows
+
+    def test_05_resume_after_crash(self, tmp_path, monkeypatch):
+        copy_data(tmp_path, 'category.csv', 'titles.csv')
+        ids = {int(row[0]) for row in read_records(tmp_path / 'titles.csv')}
+        read_batches = CsvImporter.read_batches
+
+        def crashing_read_batches(self, csv_file, *args, **kwargs):
+            batches = read_batches(self, csv_file, *args, **kwargs)
+            for number, batch in enumerate(batches):
+                if csv_file.endswith('titles.csv') and number == 2:
+                    raise RuntimeError('Сбой процесса')
+                yield batch
+
+        monkeypatch.setattr(
+            CsvImporter, 'read_batches', crashing_read_batches
+        )
+        with pytest.raises(RuntimeError):
+            call_command(
+                'import-csv', path=str(tmp_path), resume=True,
+                batch_size=10, stdout=StringIO()
+            )
+        checkpoint = ImportCheckpoint.objects.get(
+            file=os.path.abspath(tmp_path / 'titles.csv')
+        )
+        assert Title.objects.count() == checkpoint.rows == 20
+        assert not checkpoint.finished
+        assert not TITLE_INDEXES & get_index_names('reviews_title')
+
+        monkeypatch.setattr(CsvImporter, 'read_batches', read_batches)
+        call_command(
+            'import-csv', path=str(tmp_path), resume=True, batch_size=10,
+            stdout=StringIO()
+        )
+        assert sorted(Title.objects.values_list('pk', flat=True)) == sorted(
+            ids
+        ), (
+            'Проверьте, что возобновленный импорт загружает оставшиеся '
+            'строки без повторов.'
+        )
+        checkpoint.refresh_from_db()
+        assert checkpoint.finished and checkpoint.rows == len(ids)
+        assert TITLE_INDEXES <= get_index_names('reviews_title'), (
+            'Проверьте, что после возобновленного импорта удаленные '
+            'индексы восстанавливаются.'
+        )
+
+    def test_06_on_conflict(self, tmp_path):
+        copy_data(tmp_path, 'genre.csv')
+        files = [(str(tmp_path / 'genre.csv'), Genre)]
+        expected = len(read_records(tmp_path / 'genre.csv'))
+        CsvImporter().import_files(files)
+        [result] = CsvImporter().import_files(files)
+        assert result.error, (
+            'Проверьте, что по умолчанию повторяющиеся id вызывают ошибку.'
+        )
+        [result] = CsvImporter(on_conflict='skip').import_files(files)
+        assert result.error is None
+        assert Genre.objects.count() == expected
+
+    def test_07_concurrent_import(self, monkeypatch):
+        monkeypatch.setattr(importer, 'SINGLE_WRITER_VENDORS', ())
+        csv_importer = CsvImporter(workers=4, chunk_rows=10)
+        assert csv_importer.concurrent
+        results = csv_importer.import_files([
+            (os.path.join(DATA_DIR, name), model)
+            for name, model in CSV_FILES
+        ])
+        assert [result.error for result in results] == [None] * len(
+            CSV_FILES
+        )
+        chunks = {
+            os.path.basename(result.file): result.chunks
+            for result in results
+        }
+        assert chunks['review.csv'] > 1, (
+            'Проверьте, что большие файлы загружаются частями в '
+            'нескольких потоках.'
+        )
+        for name, model in CSV_FILES:
+            expected = len(read_records(os.path.join(DATA_DIR, name)))
+            assert model.objects.count() == expected
+        assert TITLE_INDEXES <= get_index_names('reviews_title')
+
+    def test_08_update_keeps_columns_missing_from_file(self, tmp_path):
+        call_command('import-csv', path=DATA_DIR, stdout=StringIO())
+        User.objects.filter(pk=100).update(token_version=3)
+        ratings = list(Title.objects.order_by('pk').values_list(
+            'pk', 'rating_sum', 'rating_count'
+        ))
+        comments_counts = list(
+            Review.objects.order_by('pk').values_list('pk', 'comments_count')
+        )
+        assert any(rating_count for _, _, rating_count in ratings)
+        assert any(comments_count for _, comments_count in comments_counts)
+        files = []
+        for name, model, column in (
+            ('users.csv', User, 'bio'),
+            ('titles.csv', Title, 'name'),
+            ('review.csv', Review, 'text'),
+        ):
+            with open(os.path.join(DATA_DIR, name), encoding='utf-8',
+                      newline='') as file:
+                header, *rows = csv.reader(file)
+            for row in rows:
+                row[header.index(column)] = 'Обновлено'
+            with open(tmp_path / name, 'w', encoding='utf-8',
+                      newline='') as file:
+                csv.writer(file).writerows([header, *rows])
+            files.append((str(tmp_path / name), model))
+        results = CsvImporter(on_conflict='update').import_files(files)
+        assert [result.error for result in results] == [None] * len(files)
+        assert set(Title.objects.values_list('name', flat=True)) == {
+            'Обновлено'
+        }
+        assert set(Review.objects.values_list('text', flat=True)) == {
+            'Обновлено'
+        }
+        assert list(Title.objects.order_by('pk').values_list(
+            'pk', 'rating_sum', 'rating_count'
+        )) == ratings, (
+            'Проверьте, что режим --on-conflict update не сбрасывает '
+            'рейтинг произведений, которого нет в файле.'
+        )
+        assert list(
+            Review.objects.order_by('pk').values_list('pk', 'comments_count')
+        ) == comments_counts, (
+            'Проверьте, что режим --on-conflict update не сбрасывает '
+            'количество комментариев отзывов.'
+        )
+        assert User.objects.get(pk=100).token_version == 3
@@ -0,0 +1,191 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import Avg, F
+from django.db.models.signals import post_delete
+from django.test.utils import CaptureQueriesContext
+
+from reviews.generator import DatasetGenerator
+from reviews.models import Comment, Review, Title, User
+from reviews.ratings import (
+    find_inconsistent_comments_counts,
+    find_inconsistent_ratings
+)
+from reviews.search import FULL_TEXT_INDEXES
+from tests.utils import create_single_review, create_titles
+
+
+def assert_ratings_consistent():
+    for title in Title.objects.annotate(actual=Avg('reviews__score')):
+        expected = None if title.actual is None else pytest.approx(
+            title.actual
+        )
+        assert title.rating == expected, (
+            'Проверьте, что рейтинг произведения совпадает со средней '
+            'оценкой его отзывов после любого изменения отзывов.'
+        )
+
+
+def count_search_rows(model):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT COUNT(*) FROM {FULL_TEXT_INDEXES[model].table}'
+        )
+        return cursor.fetchone()[0]
+
+
+def assert_search_index_consistent():
+    for model in (Review, Comment):
+        assert count_search_rows(model) == model.objects.count(), (
+            'Проверьте, что строки поискового индекса удаляются вместе с '
+            'отзывами и комментариями.'
+        )
+
+
+def count_delete_queries(title):
+    with CaptureQueriesContext(connection) as context:
+        title.delete()
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29Ratings:
+
+    REVIEW_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/{review_id}/'
+
+    @pytest.fixture
+    def titles(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        return [title['id'] for title in titles]
+
+    def test_01_rating_follows_reviews(self, admin_client, user_client,
+                                       moderator_client, titles):
+        reviews = [
+            create_single_review(client, titles[0], 'Отзыв', score).json()
+            for client, score in (
+                (admin_client, 3), (user_client, 8), (moderator_client, 10)
+            )
+        ]
+        create_single_review(user_client, titles[1], 'Отзыв', 5)
+        assert_ratings_consistent()
+        assert Title.objects.get(pk=titles[0]).rating == pytest.approx(7)
+
+        response = user_client.patch(
+            self.REVIEW_URL_TEMPLATE.format(
+                title_id=titles[0], review_id=reviews[1]['id']
+            ),
+            data={'score': 2}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert_ratings_consistent()
+        assert Title.objects.get(pk=titles[0]).rating == pytest.approx(5)
+
+        review = Review.objects.get(pk=reviews[2]['id'])
+        review.title_id = titles[1]
+        review.save()
+        assert_ratings_consistent()
+        assert Title.objects.get(pk=titles[1]).rating == pytest.approx(7.5)
+
+        response = admin_client.delete(self.REVIEW_URL_TEMPLATE.format(
+            title_id=titles[0], review_id=reviews[0]['id']
+        ))
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert_ratings_consistent()
+        assert Title.objects.get(pk=titles[0]).rating == pytest.approx(2)
+
+        User.objects.get(username='TestUser').delete()
+        assert_ratings_consistent()
+        assert Title.objects.get(pk=titles[0]).rating is None
+
+    def test_02_rebuild_ratings_check(self, admin_client, user_client,
+                                      titles):
+        create_single_review(admin_client, titles[0], 'Отзыв', 4)
+        create_single_review(user_client, titles[0], 'Отзыв', 9)
+        call_command('rebuild-ratings', check=True, stdout=StringIO())
+        Title.objects.filter(pk=titles[0]).update(
+            rating_sum=F('rating_sum') + 5
+        )
+        with pytest.raises(CommandError):
+            call_command('rebuild-ratings', check=True, stdout=StringIO())
+        call_command('rebuild-ratings', stdout=StringIO())
+        call_command('rebuild-ratings', check=True, stdout=StringIO())
+        assert_ratings_consistent()
+        assert Title.objects.get(pk=titles[0]).rating == pytest.approx(6.5)
+
+    def test_03_stale_title_save_keeps_rating(self, admin_client,
+                                              user_client, titles):
+        create_single_review(admin_client, titles[0], 'Отзыв', 4)
+        title = Title.objects.get(pk=titles[0])
+        create_single_review(user_client, titles[0], 'Отзыв', 8)
+        title.name = 'Новое название'
+        title.save()
+        assert not find_inconsistent_ratings().exists(), (
+            'Проверьте, что сохранение ранее загруженного произведения не '
+            'затирает его рейтинг, измененный после загрузки.'
+        )
+        title.refresh_from_db()
+        assert title.name == 'Новое название'
+        assert title.rating == pytest.approx(6)
+
+    def test_04_title_delete_does_not_touch_each_review(self):
+        DatasetGenerator(
+            users=60, categories=1, genres=1, titles=1, reviews=60,
+            comments=60, seed=1
+        ).generate()
+        large = Title.objects.get()
+        small = Title.objects.create(
+            name='Небольшое', year=2000, category=large.category
+        )
+        review = Review.objects.create(
+            title=small, author=User.objects.first(), text='Отзыв', score=5
+        )
+        Comment.objects.create(
+            review=review, author=review.author, text='Комментарий'
+        )
+        small_queries = count_delete_queries(Title.objects.get(pk=small.pk))
+        large_queries = count_delete_queries(large)
+        assert large_queries <= small_queries + 2, (
+            'Проверьте, что при удалении произведения число запросов не '
+            'растет с количеством его отзывов и комментариев: '
+            f'{small_queries} и {large_queries}.'
+        )
+        assert not Review.objects.exists() and not Comment.objects.exists()
+        assert_search_index_consistent()
+
+    def test_05_review_delete_keeps_counters(self):
+        DatasetGenerator(
+            users=20, categories=1, genres=1, titles=3, reviews=30,
+            comments=60, seed=2
+        ).generate()
+        review = Review.objects.order_by('-comments_count').first()
+        review.delete()
+        assert_ratings_consistent()
+        assert not find_inconsistent_comments_counts().exists()
+        assert_search_index_consistent()
+        Title.objects.order_by('pk').first().delete()
+        User.objects.order_by('pk').first().delete()
+        assert_ratings_consistent()
+        assert not find_inconsistent_comments_counts().exists()
+        assert_search_index_consistent()
+
+    def test_06_failed_delete_does_not_skip_later_ratings(self):
+        DatasetGenerator(
+            users=10, categories=1, genres=1, titles=1, reviews=10,
+            comments=0, seed=3
+        ).generate()
+        title = Title.objects.get()
+
+        def fail(**kwargs):
+            raise RuntimeError('Сбой удаления')
+
+        post_delete.connect(fail, sender=Review)
+        try:
+            with pytest.raises(RuntimeError), transaction.atomic():
+                title.delete()
+        finally:
+            post_delete.disconnect(fail, sender=Review)
+        Review.objects.filter(title_id=title.pk).first().delete()
+        assert_ratings_consistent()